@@ -15,7 +15,12 @@ if str(SRC_DIR) not in sys.path:
 
 from src.core.config import Config, load_config  # noqa: E402
 from src.core import db as db_module  # noqa: E402
+from src.services.duplicates import register_duplicate_job  # noqa: E402
+from src.services.face_indexer import register_face_index_job  # noqa: E402
+from src.services.indexer import register_index_job  # noqa: E402
+from src.services.job_store import JobStore  # noqa: E402
 from src.services.jobs import JobManager  # noqa: E402
+from src.services.near_duplicates import register_near_duplicate_job  # noqa: E402
 from src.ui.main_window import MainWindow  # noqa: E402
 
 
@@ -47,11 +52,19 @@ def main() -> int:
     configure_logging(Path(config.logs_dir))
     initialize_database(config)
 
-    job_manager = JobManager()
+    job_manager = JobManager(config.jobs, store=JobStore())
+    register_index_job(job_manager, config)
+    register_duplicate_job(job_manager, config)
+    register_near_duplicate_job(job_manager, config)
+    register_face_index_job(job_manager, config)
+    job_manager.resume_pending()
+    job_manager.start()
     app = QApplication(sys.argv)
     window = MainWindow(config=config, job_manager=job_manager)
     window.show()
-    return app.exec()
+    exit_code = app.exec()
+    job_manager.shutdown(interrupt=True)
+    return exit_code
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+"""Maintenance and benchmark scripts; run them from the repository root with `PYTHONPATH=.`."""
@@ -0,0 +1 @@
+"""Ingest benchmarks over synthetic photo libraries."""
@@ -0,0 +1,434 @@
+"""Benchmark the ingest path on a synthetic library and write the results as JSON.
+
+Generates (or reuses) a reproducible library from `scripts/bench/library.py`
+and times, against a fresh database:
+
+- `scan_root` on the new root and again on the unchanged root (files/s);
+- `index_new_photos` over the last `--index-sample` photos (photos/s);
+- `ensure_thumbnails` into an empty cache for `--thumbnail-sample` photos;
+- p50/p99 latency of the gallery queries in `src.core.search`.
+
+Each stage records the process's peak RSS while it ran (and, for indexing,
+the largest worker process). Peaks are exact on Linux; elsewhere they come
+from `psutil` when installed or `resource` (the peak since start-up), and
+are null where neither can measure them. Photos outside the index sample get `taken_at`
+from their folder date, so queries see a fully dated library. The 1k, 100k
+and 1m presets take about 3, 32 and 60 GB of disk. Pass `--baseline` with
+an earlier results file to print the change of every measurement.
+
+    PYTHONPATH=. python scripts/bench/ingest.py --library 1k
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Any, Callable
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from scripts.bench.library import PRESETS, LibrarySpec, ensure_library
+from src.core.bulk import bulk_update_photos
+from src.core.config import AppConfig, load_config
+from src.core.db import get_session, init_database
+from src.core.models import Photo, Root
+from src.core.search import count_photos, query_photos, query_photos_page
+from src.core.thumbnails import ensure_thumbnails
+from src.services.indexer import index_new_photos
+from src.services.scanner import scan_root
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_OUTPUT_DIR = REPO_ROOT / "data" / "benchmarks"
+DEFAULT_LIBRARY_DIR = DEFAULT_OUTPUT_DIR / "libraries"
+DEFAULT_INDEX_SAMPLE = 2_000
+DEFAULT_THUMBNAIL_SAMPLE = 200
+DEFAULT_QUERY_REPEATS = 100
+_BACKFILL_PAGE_SIZE = 10_000
+_FOLDER_DATE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+
+_QUERIES: dict[str, Callable[[Session, dict], Any]] = {
+    "recent": lambda session, _: query_photos(session),
+    "offset_middle": lambda session, state: query_photos(session, offset=state["middle"]),
+    "keyset_page_2": lambda session, state: query_photos_page(session, cursor=state["cursor"]),
+    "text": lambda session, _: query_photos(session, text="beach"),
+    "date_range": lambda session, _: query_photos(
+        session, date_from=datetime(2016, 1, 1), date_to=datetime(2016, 12, 31)
+    ),
+    "count": lambda session, _: count_photos(session),
+}
+
+
+def _reset_peak_rss() -> None:
+    # Linux resets VmHWM when "5" is written to clear_refs.
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> float | None:
+    """Peak RSS of this process in MB, or None where it cannot be measured."""
+
+    peak_kb = _vmhwm_kb("self")
+    if peak_kb is not None:
+        return round(peak_kb / 1024, 1)
+    psutil = _psutil()
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        if hasattr(info, "peak_wset"):
+            return round(info.peak_wset / 2**20, 1)
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes, except on macOS where it is bytes.
+    return round(max_rss / (2**20 if sys.platform == "darwin" else 1024), 1)
+
+
+def _vmhwm_kb(pid: str) -> int | None:
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+    for line in status.splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1])
+    return None
+
+
+def _psutil() -> Any:
+    try:
+        import psutil  # type: ignore[import-untyped]
+    except ImportError:
+        return None
+    return psutil
+
+
+class _WorkerPeakSampler(threading.Thread):
+    """Track the largest peak RSS of this process's children while running.
+
+    Reads VmHWM from /proc on Linux; elsewhere samples the children with
+    `psutil` (peak working set on Windows, current RSS otherwise). The peak
+    is None when neither is available.
+    """
+
+    def __init__(self, interval: float = 0.2):
+        super().__init__(daemon=True)
+        self.interval = interval
+        on_proc = Path("/proc/self/task").is_dir()
+        self._psutil = None if on_proc else _psutil()
+        self.peak_kb: int | None = 0 if on_proc or self._psutil is not None else None
+        self._stopped = threading.Event()
+
+    @property
+    def peak_mb(self) -> float | None:
+        return None if self.peak_kb is None else round(self.peak_kb / 1024, 1)
+
+    def run(self) -> None:
+        peak_kb = self.peak_kb
+        if peak_kb is None:
+            return
+        while not self._stopped.wait(self.interval):
+            peak_kb = self.peak_kb = max([peak_kb, *self._sample_kb()])
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+    def _sample_kb(self) -> list[int]:
+        if self._psutil is None:
+            return [kb for kb in map(_vmhwm_kb, _child_pids()) if kb is not None]
+        sizes = []
+        for child in self._psutil.Process().children(recursive=True):
+            try:
+                info = child.memory_info()
+            except self._psutil.Error:
+                continue
+            sizes.append(getattr(info, "peak_wset", info.rss) // 1024)
+        return sizes
+
+
+def _child_pids() -> list[str]:
+    pids = []
+    for children in Path("/proc/self/task").glob("*/children"):
+        try:
+            pids += children.read_text().split()
+        except OSError:
+            continue
+    return pids
+
+
+def _entry(stage: str, seconds: float, **counts) -> dict:
+    entry: dict[str, Any] = {"stage": stage, "seconds": round(seconds, 3)}
+    for name, value in counts.items():
+        entry[name] = value
+        if name in ("files", "photos", "thumbnails"):
+            entry[f"{name}_per_sec"] = round(value / seconds, 1) if seconds else None
+    entry["peak_rss_mb"] = _peak_rss_mb()
+    rates = ", ".join(f"{entry[key]} {key}" for key in entry if key.endswith("_per_sec"))
+    peak = "n/a" if entry["peak_rss_mb"] is None else f"{entry['peak_rss_mb']} MB"
+    print(f"{stage:<11} {seconds:8.2f}s  {rates}  peak RSS {peak}")
+    return entry
+
+
+def bench_scan(config: AppConfig, library_dir: Path, name: str) -> list[dict]:
+    """Scan a new root, then rescan it unchanged; both include the commit."""
+
+    entries = []
+    for stage in ("scan", "rescan"):
+        _reset_peak_rss()
+        started = perf_counter()
+        with get_session() as session:
+            root = session.scalar(select(Root).where(Root.path == str(library_dir)))
+            if root is None:
+                root = Root(path=str(library_dir), name=name)
+                session.add(root)
+                session.flush()
+            stats = scan_root(root, config, session)
+        seconds = perf_counter() - started
+        with get_session() as session:
+            photos = session.scalar(select(func.count()).select_from(Photo))
+        entries.append(
+            _entry(
+                stage,
+                seconds,
+                # Files covered: a rescan skips unchanged folders instead of listing them.
+                files=photos,
+                files_listed=stats.files_seen,
+                directories_scanned=stats.directories_scanned,
+                directories_skipped=stats.directories_skipped,
+            )
+        )
+    return entries
+
+
+def bench_index(config: AppConfig, sample: int) -> tuple[dict, int]:
+    """Index the last `sample` photos; returns the entry and the id indexing started after."""
+
+    with get_session() as session:
+        last_id = session.scalar(select(func.max(Photo.id))) or 0
+    after_id = max(0, last_id - sample)
+    _reset_peak_rss()
+    workers = _WorkerPeakSampler()
+    workers.start()
+    started = perf_counter()
+    try:
+        index_new_photos(config, after_id=after_id)
+    finally:
+        seconds = perf_counter() - started
+        workers.stop()
+    with get_session() as session:
+        photos = session.scalar(
+            select(func.count()).select_from(Photo).where(Photo.id > after_id)
+        )
+    entry = _entry("index", seconds, photos=photos, workers=config.jobs.max_workers)
+    entry["worker_peak_rss_mb"] = workers.peak_mb
+    return entry, after_id
+
+
+def bench_thumbnails(config: AppConfig, after_id: int, sample: int, cache_dir: Path) -> dict:
+    """Generate every configured size for `sample` photos into an empty cache."""
+
+    thumb_config = config.copy(update={"cache_dir": cache_dir})
+    with get_session() as session:
+        photos = [
+            SimpleNamespace(id=photo_id, relative_path=Path(relative_path), root_path=Path(root))
+            for photo_id, relative_path, root in session.execute(
+                select(Photo.id, Photo.relative_path, Root.path)
+                .join(Root, Root.id == Photo.root_id)
+                .where(Photo.id > after_id)
+                .order_by(Photo.id)
+                .limit(sample)
+            )
+        ]
+    _reset_peak_rss()
+    started = perf_counter()
+    for photo in photos:
+        ensure_thumbnails(photo, thumb_config)
+    return _entry(
+        "thumbnails",
+        perf_counter() - started,
+        photos=len(photos),
+        thumbnails=len(photos) * len(config.thumb_sizes),
+    )
+
+
+def bench_queries(repeats: int) -> list[dict]:
+    """Time each of `_QUERIES` `repeats` times, one session per call as the UI does."""
+
+    with get_session() as session:
+        state = {
+            "middle": count_photos(session) // 2,
+            "cursor": query_photos_page(session).next_cursor,
+        }
+    entries = []
+    _reset_peak_rss()
+    for name, query in _QUERIES.items():
+        with get_session() as session:
+            query(session, state)
+        samples = []
+        for _ in range(repeats):
+            started = perf_counter()
+            with get_session() as session:
+                query(session, state)
+            samples.append((perf_counter() - started) * 1000)
+        p50, p99 = np.percentile(samples, [50, 99])
+        entries.append(
+            {
+                "stage": "query",
+                "query": name,
+                "samples": repeats,
+                "p50_ms": round(float(p50), 3),
+                "p99_ms": round(float(p99), 3),
+                "mean_ms": round(float(np.mean(samples)), 3),
+            }
+        )
+        print(f"query       {name:<14} p50 {p50:8.2f} ms  p99 {p99:8.2f} ms")
+    entries.append({"stage": "query", "query": "all", "peak_rss_mb": _peak_rss_mb()})
+    return entries
+
+
+def _backfill_taken_at(chunk_size: int) -> int:
+    """Date photos indexing skipped from their folder name, as indexing would from EXIF."""
+
+    filled = 0
+    last_id = 0
+    while True:
+        with get_session() as session:
+            page = session.execute(
+                select(Photo.id, Photo.relative_path)
+                .where(Photo.id > last_id, Photo.taken_at.is_(None))
+                .order_by(Photo.id)
+                .limit(_BACKFILL_PAGE_SIZE)
+            ).all()
+            if not page:
+                return filled
+            last_id = page[-1][0]
+            rows = []
+            for photo_id, relative_path in page:
+                match = _FOLDER_DATE.search(str(relative_path))
+                if match:
+                    rows.append({"id": photo_id, "taken_at": datetime(*map(int, match.groups()))})
+            bulk_update_photos(session, rows, chunk_size)
+            filled += len(rows)
+
+
+def _compare(report: dict, baseline_path: Path) -> None:
+    """Print the relative change of each rate and latency also present in the baseline."""
+
+    def keyed(entries: list[dict]) -> dict:
+        return {(entry["stage"], entry.get("query")): entry for entry in entries}
+
+    previous = keyed(json.loads(baseline_path.read_text()).get("results", []))
+    for key, entry in keyed(report["results"]).items():
+        for metric, value in entry.items():
+            if not metric.endswith(("_per_sec", "_ms", "_mb")):
+                continue
+            before = previous.get(key, {}).get(metric)
+            if before and value is not None:
+                label = " ".join(part for part in key if part)
+                print(f"{label:<26} {metric:<18} {(value - before) / before * 100:+.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--library", choices=sorted(PRESETS), default="1k")
+    parser.add_argument("--photos", type=int, default=None, help="override the preset's size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--library-dir", type=Path, default=None)
+    parser.add_argument("--index-sample", type=int, default=DEFAULT_INDEX_SAMPLE)
+    parser.add_argument("--thumbnail-sample", type=int, default=DEFAULT_THUMBNAIL_SAMPLE)
+    parser.add_argument("--query-repeats", type=int, default=DEFAULT_QUERY_REPEATS)
+    parser.add_argument("--workers", type=int, default=None, help="index worker processes")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=None)
+    args = parser.parse_args()
+
+    preset = PRESETS[args.library]
+    spec = LibrarySpec(
+        name=preset.name if args.photos is None else f"{preset.name}-{args.photos}",
+        photos=args.photos or preset.photos,
+        scale=preset.scale,
+        seed=args.seed,
+    )
+    library_dir = args.library_dir or DEFAULT_LIBRARY_DIR / f"{spec.name}-seed{spec.seed}"
+    started = perf_counter()
+    # Generate in a separate process so its memory does not count towards the stages' peaks.
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        manifest = pool.submit(ensure_library, spec, library_dir).result()
+    print(
+        f"library     {manifest['photos']} photos, {manifest['other_files']} other files in "
+        f"{manifest['directories']} folders, {manifest['bytes'] / 1e9:.2f} GB "
+        f"(ready in {perf_counter() - started:.1f}s)"
+    )
+
+    base_config = load_config(REPO_ROOT)
+    work_dir = Path(tempfile.mkdtemp(prefix="ingest-bench-"))
+    try:
+        config = base_config.copy(
+            update={
+                "database_path": work_dir / "photos.db",
+                "cache_dir": work_dir / "cache",
+                "jobs": base_config.jobs.copy(
+                    update={"max_workers": args.workers or base_config.jobs.max_workers}
+                ),
+            }
+        )
+        init_database(config)
+        results = bench_scan(config, library_dir, spec.name)
+        index_entry, after_id = bench_index(config, args.index_sample)
+        results.append(index_entry)
+        backfilled = _backfill_taken_at(config.database.bulk_chunk_size)
+        results.append(
+            bench_thumbnails(config, after_id, args.thumbnail_sample, work_dir / "thumbnails")
+        )
+        results += bench_queries(args.query_repeats)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "benchmark": "ingest",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "library": manifest,
+        "settings": {
+            "index_sample": args.index_sample,
+            "thumbnail_sample": args.thumbnail_sample,
+            "query_repeats": args.query_repeats,
+            "taken_at_backfilled": backfilled,
+            "thumb_sizes": dict(config.thumb_sizes),
+        },
+        "results": results,
+    }
+    output = args.output or DEFAULT_OUTPUT_DIR / (
+        f"ingest-{spec.name}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"results written to {output}")
+    if args.baseline is not None:
+        _compare(report, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
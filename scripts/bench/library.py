@@ -0,0 +1,197 @@
+"""Reproducible synthetic photo libraries for the ingest benchmarks."""
+from __future__ import annotations
+
+import io
+import json
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+
+MANIFEST_NAME = "manifest.json"
+# Distinct encoded images per camera; every file still gets its own EXIF block.
+TEMPLATES_PER_CAMERA = 4
+FIRST_YEAR, LAST_YEAR = 2008, 2024
+
+# (make, model, native resolution, lens, is a phone) — the cameras of a typical library.
+_CAMERAS = [
+    ("Apple", "iPhone 13", (4032, 3024), "iPhone 13 back dual wide camera 5.1mm f/1.6", True),
+    ("samsung", "SM-G991B", (4000, 3000), None, True),
+    ("Google", "Pixel 7", (4080, 3072), None, True),
+    ("Canon", "Canon EOS R6", (5472, 3648), "RF24-105mm F4 L IS USM", False),
+    ("SONY", "ILCE-7M3", (6000, 4000), "FE 35mm F1.8", False),
+    ("FUJIFILM", "X-T4", (6240, 4160), "XF23mmF2 R WR", False),
+]
+_CAMERA_WEIGHTS = [0.35, 0.2, 0.15, 0.12, 0.1, 0.08]
+_EVENT_WORDS = [
+    "beach", "birthday", "christmas", "garden", "hike", "holiday", "party",
+    "school", "snow", "wedding", "zoo", "city trip", "family", "camping",
+]
+# Files that sit next to photos but are not photos.
+_SIDECARS = [(".xmp", 0.06, 4_000), (".aae", 0.03, 1_500), (".mov", 0.02, 400_000)]
+
+
+@dataclass(frozen=True)
+class LibrarySpec:
+    """Shape of a synthetic library; the same spec and seed give identical files."""
+
+    name: str
+    photos: int
+    # Camera resolutions are multiplied by `scale` so large presets fit on disk.
+    scale: float = 1.0
+    seed: int = 0
+
+
+# Average file sizes including EXIF and sidecars: 3.3 MB, 0.3 MB and 60 KB.
+PRESETS = {
+    "1k": LibrarySpec("1k", 1_000),
+    "100k": LibrarySpec("100k", 100_000, scale=0.3),
+    "1m": LibrarySpec("1m", 1_000_000, scale=0.1),
+}
+
+
+def ensure_library(spec: LibrarySpec, directory: Path) -> dict:
+    """Generate the library in `directory` unless a manifest for the same spec is there.
+
+    Returns the manifest: the spec plus file, byte and directory counts.
+    """
+
+    manifest_path = directory / MANIFEST_NAME
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+        if manifest.get("spec") == asdict(spec):
+            return manifest
+    directory.mkdir(parents=True, exist_ok=True)
+
+    rng = np.random.default_rng(spec.seed)
+    templates = [
+        [
+            _encode_template(rng, _scaled(resolution, spec.scale))
+            for _ in range(TEMPLATES_PER_CAMERA)
+        ]
+        for _, _, resolution, _, _ in _CAMERAS
+    ]
+    counts = {"photos": 0, "other_files": 0, "bytes": 0}
+    folders = set()
+    for folder, taken_at, size in _plan_directories(rng, spec.photos):
+        target = directory / folder
+        target.mkdir(parents=True, exist_ok=True)
+        folders.add(folder)
+        camera = int(rng.choice(len(_CAMERAS), p=_CAMERA_WEIGHTS))
+        prefix = "IMG_" if _CAMERAS[camera][4] else "DSC_"
+        for _ in range(size):
+            taken_at += timedelta(seconds=int(rng.integers(5, 600)))
+            name = f"{prefix}{counts['photos'] + 1:07d}"
+            template = templates[camera][int(rng.integers(TEMPLATES_PER_CAMERA))]
+            data = _with_exif(template, _exif_block(rng, camera, taken_at))
+            counts["bytes"] += _write(target / f"{name}.jpg", data, taken_at)
+            counts["photos"] += 1
+            for suffix, share, length in _SIDECARS:
+                if rng.random() < share:
+                    counts["bytes"] += _write(target / f"{name}{suffix}", bytes(length), taken_at)
+                    counts["other_files"] += 1
+
+    manifest = {"spec": asdict(spec), **counts, "directories": len(folders)}
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def _plan_directories(rng: np.random.Generator, photos: int):
+    """Yield `(folder, start time, photo count)` until `photos` photos are placed.
+
+    Most photos sit in dated event folders (`2016/2016-05-03 beach`) of a
+    few to a few hundred photos; a fifth come from camera imports laid out
+    as `Imports/2016-05-03/DCIM/100CANON` with up to 999 photos each.
+    """
+
+    start = datetime(FIRST_YEAR, 1, 1)
+    days = (datetime(LAST_YEAR, 12, 31) - start).days
+    placed = 0
+    while placed < photos:
+        taken_at = start + timedelta(days=int(rng.integers(days)), hours=int(rng.integers(8, 20)))
+        if rng.random() < 0.2:
+            size = int(rng.integers(200, 1000))
+            folder = f"Imports/{taken_at:%Y-%m-%d}/DCIM/{int(rng.integers(100, 120))}CAMERA"
+        else:
+            size = max(1, min(int(rng.lognormal(3.5, 1.0)), 600))
+            word = _EVENT_WORDS[int(rng.integers(len(_EVENT_WORDS)))]
+            folder = f"{taken_at:%Y}/{taken_at:%Y-%m-%d} {word}"
+        size = min(size, photos - placed)
+        placed += size
+        yield folder, taken_at, size
+
+
+def _scaled(resolution: tuple[int, int], scale: float) -> tuple[int, int]:
+    return max(64, round(resolution[0] * scale)), max(48, round(resolution[1] * scale))
+
+
+def _encode_template(rng: np.random.Generator, size: tuple[int, int]) -> bytes:
+    """Encode a photo-like JPEG: smooth regions with fine detail, about 0.2 bytes per pixel."""
+
+    width, height = size
+    coarse = Image.effect_noise((max(1, width // 32), max(1, height // 32)), 60)
+    medium = Image.effect_noise((max(1, width // 4), max(1, height // 4)), 40)
+    detail = Image.effect_noise(size, 18)
+    luma = Image.blend(
+        Image.blend(coarse.resize(size, Image.BICUBIC), medium.resize(size, Image.BILINEAR), 0.4),
+        detail,
+        0.25,
+    )
+    tints = rng.integers(40, 220, 3)
+    image = Image.merge("RGB", [luma.point(lambda v, t=int(t): (v * 3 + t) // 4) for t in tints])
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def _exif_block(rng: np.random.Generator, camera: int, taken_at: datetime) -> bytes:
+    """EXIF laid out as cameras write it: IFD0, the Exif sub-IFD and, for phones, GPS."""
+
+    make, model, _, lens, phone = _CAMERAS[camera]
+    stamp = f"{taken_at:%Y:%m:%d %H:%M:%S}"
+    exif = Image.Exif()
+    exif[0x010F] = make
+    exif[0x0110] = model
+    exif[0x0131] = "Firmware 1.0"
+    exif[0x0132] = stamp
+    exif[0x0112] = 6 if phone and rng.random() < 0.3 else 1
+    details = exif.get_ifd(0x8769)
+    details[0x9003] = stamp
+    details[0x9004] = stamp
+    details[0x829A] = (1, int(rng.choice([30, 60, 125, 250, 500, 1000])))
+    details[0x829D] = (int(rng.choice([16, 18, 28, 40, 56, 80])), 10)
+    details[0x8827] = int(rng.choice([50, 100, 200, 400, 800, 3200]))
+    details[0x920A] = (int(rng.integers(40, 1050)), 10)
+    if lens is not None:
+        details[0xA434] = lens
+    # Maker notes make up most of a real EXIF block.
+    notes = int(rng.integers(2_000, 30_000))
+    details[0x927C] = rng.integers(0, 256, notes, dtype=np.uint8).tobytes()
+    if phone and rng.random() < 0.7:
+        gps = exif.get_ifd(0x8825)
+        latitude, longitude = rng.uniform(-60, 70), rng.uniform(-180, 180)
+        gps[1], gps[2] = ("N" if latitude >= 0 else "S"), _degrees(abs(latitude))
+        gps[3], gps[4] = ("E" if longitude >= 0 else "W"), _degrees(abs(longitude))
+    return exif.tobytes()
+
+
+def _degrees(value: float) -> tuple[float, float, float]:
+    minutes = (value % 1) * 60
+    return float(int(value)), float(int(minutes)), round((minutes % 1) * 60, 2)
+
+
+def _with_exif(template: bytes, exif: bytes) -> bytes:
+    """Insert an APP1 EXIF segment right after the JPEG start-of-image marker."""
+
+    return template[:2] + b"\xff\xe1" + (len(exif) + 2).to_bytes(2, "big") + exif + template[2:]
+
+
+def _write(path: Path, data: bytes, modified: datetime) -> int:
+    path.write_bytes(data)
+    timestamp = modified.timestamp()
+    os.utime(path, (timestamp, timestamp))
+    return len(data)
@@ -0,0 +1,115 @@
+"""Compare ORM unit-of-work writes with the bulk persistence layer (rows per second)."""
+from __future__ import annotations
+
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from src.core.bulk import DEFAULT_CHUNK_SIZE, bulk_insert_photos, bulk_upsert_exif, exif_row
+from src.core.db import Base
+from src.core.models import ExifData, Photo, Root
+
+
+ROW_COUNT = 50_000
+
+_EXIF = {
+    "camera_make": "BenchCam",
+    "camera_model": "Model 1",
+    "lens_model": "50mm",
+    "iso": 200,
+    "f_number": 2.8,
+    "exposure_time": "1/125",
+    "focal_length": 50.0,
+    "gps_lat": 52.1,
+    "gps_lon": 4.3,
+    "original_datetime": datetime(2023, 5, 1, 12, 0, 0),
+}
+
+
+def _photo_rows(root_id: int) -> list[dict]:
+    imported_at = datetime.utcnow()
+    return [
+        {
+            "root_id": root_id,
+            "relative_path": f"dir{i // 1000:04d}/IMG_{i:06d}.jpg",
+            "filename": f"IMG_{i:06d}.jpg",
+            "filesize": 3_000_000 + i,
+            "mtime": 1_700_000_000 + i,
+            "status": "active",
+            "imported_at": imported_at,
+            "thumb_status": "none",
+        }
+        for i in range(ROW_COUNT)
+    ]
+
+
+def _new_session(work_dir: Path, name: str) -> tuple[Session, int]:
+    engine = create_engine(f"sqlite+pysqlite:///{work_dir / name}", future=True)
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    root = Root(path=str(work_dir), name=name)
+    session.add(root)
+    session.commit()
+    return session, root.id
+
+
+def _report(label: str, rows: int, duration: float) -> None:
+    print(f"{label:<28} {rows / duration:>10,.0f} rows/s")
+
+
+def bench_orm(work_dir: Path) -> None:
+    session, root_id = _new_session(work_dir, "orm.db")
+    rows = _photo_rows(root_id)
+
+    start = perf_counter()
+    for row in rows:
+        session.add(Photo(**row))
+    session.commit()
+    _report("ORM insert photos", len(rows), perf_counter() - start)
+
+    photos = session.scalars(select(Photo)).all()
+    start = perf_counter()
+    for photo in photos:
+        record = ExifData(photo_id=photo.id, **_EXIF)
+        session.add(record)
+    session.commit()
+    _report("ORM insert exif", len(photos), perf_counter() - start)
+    session.close()
+
+
+def bench_bulk(work_dir: Path) -> None:
+    session, root_id = _new_session(work_dir, "bulk.db")
+    rows = _photo_rows(root_id)
+
+    start = perf_counter()
+    bulk_insert_photos(session, rows, DEFAULT_CHUNK_SIZE)
+    session.commit()
+    _report("bulk insert photos", len(rows), perf_counter() - start)
+
+    photo_ids = session.scalars(select(Photo.id)).all()
+    exif_rows = [exif_row(photo_id, _EXIF) for photo_id in photo_ids]
+    start = perf_counter()
+    bulk_upsert_exif(session, exif_rows, DEFAULT_CHUNK_SIZE)
+    session.commit()
+    _report("bulk upsert exif (insert)", len(exif_rows), perf_counter() - start)
+
+    start = perf_counter()
+    bulk_upsert_exif(session, exif_rows, DEFAULT_CHUNK_SIZE)
+    session.commit()
+    _report("bulk upsert exif (update)", len(exif_rows), perf_counter() - start)
+    session.close()
+
+
+if __name__ == "__main__":
+    work_dir = Path(tempfile.mkdtemp(prefix="bulk-bench-"))
+    try:
+        print(f"{ROW_COUNT:,} rows, chunk size {DEFAULT_CHUNK_SIZE}")
+        bench_orm(work_dir)
+        bench_bulk(work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,66 @@
+"""Time face clustering and incremental assignment over synthetic embeddings."""
+from __future__ import annotations
+
+import resource
+import sys
+from time import perf_counter
+
+import numpy as np
+
+from src.core.clustering import assign_to_clusters, cluster_embeddings
+from src.core.face_store import EMBEDDING_DIM
+
+
+DEFAULT_FACE_COUNT = 200_000
+# Faces per synthetic person vary, as in a real library (a few people dominate).
+MEAN_FACES_PER_PERSON = 8
+NEW_FACE_COUNT = 1_000
+
+
+def _synthetic_faces(rng: np.random.Generator, count: int) -> tuple[np.ndarray, np.ndarray]:
+    people = max(1, count // MEAN_FACES_PER_PERSON)
+    identity = np.minimum(rng.zipf(1.6, count) - 1, people - 1)
+    identity = rng.permutation(people)[identity]
+    centres = rng.standard_normal((people, EMBEDDING_DIM), dtype=np.float32)
+    faces = np.empty((count, EMBEDDING_DIM), dtype=np.float32)
+    for start in range(0, count, 65_536):
+        rows = identity[start : start + 65_536]
+        noise = rng.standard_normal((len(rows), EMBEDDING_DIM), dtype=np.float32)
+        faces[start : start + len(rows)] = centres[rows] + 0.7 * noise
+    return faces, identity
+
+
+def _purity(clusters, identity: np.ndarray) -> float:
+    majority = 0
+    for cluster in clusters:
+        _, counts = np.unique(identity[cluster.face_indices], return_counts=True)
+        majority += counts.max()
+    return majority / len(identity)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FACE_COUNT
+    rng = np.random.default_rng(2024)
+    faces, identity = _synthetic_faces(rng, count + NEW_FACE_COUNT)
+    existing, new = faces[:count], faces[count:]
+
+    started = perf_counter()
+    clusters = cluster_embeddings(existing)
+    elapsed = perf_counter() - started
+    print(
+        f"cluster_embeddings: {count} faces of {len(np.unique(identity[:count]))} people "
+        f"in {elapsed:.1f} s, {len(clusters)} clusters, "
+        f"purity {_purity(clusters, identity[:count]):.3f}"
+    )
+
+    started = perf_counter()
+    updated = assign_to_clusters(clusters, existing, new)
+    elapsed = perf_counter() - started
+    joined = sum(len(c.face_indices) for c in updated[: len(clusters)]) - count
+    print(f"assign_to_clusters: {NEW_FACE_COUNT} new faces in {elapsed:.2f} s, {joined} joined")
+    peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak RSS {peak_mib:.0f} MiB (embeddings alone {faces.nbytes / 2**20:.0f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,454 @@
-"""Benchmark InsightFace embedding throughput."""
+"""Benchmark face indexing throughput per pipeline stage and write the results as JSON.
+
+Generates a synthetic JPEG corpus with drawn faces, then measures images/s
+and faces/s for decode, detect, align, embed and persist at each batch size
+and worker count, plus the whole `FaceIndexer` pipeline. Stages that need
+the InsightFace models (detect, embed, pipeline) are recorded as skipped
+when the models or onnxruntime are unavailable. Pass `--baseline` with an
+earlier results file to print the change of every measurement.
+
+    PYTHONPATH=. python scripts/benchmark_faces.py --batch-sizes 1,8,32 --workers 1,2,4
+"""
 from __future__ import annotations
 
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 from time import perf_counter
+from typing import Any, Callable, Sequence
+
+import numpy as np
+from PIL import Image, ImageDraw
+from sqlalchemy import delete, update
+
+from src.core.ann import IVFIndex
+from src.core.bulk import bulk_update_photos
+from src.core.config import AppConfig, load_config
+from src.core.db import get_session, init_database
+from src.core.face_store import EMBEDDING_DIM, FaceStore, embeddings_path
+from src.core.faces import (
+    _ARCFACE_LANDMARKS,
+    ALIGNED_SIZE,
+    DETECTOR_MODEL,
+    RECOGNIZER_MODEL,
+    DecodedImage,
+    FaceDetection,
+    FaceEmbedder,
+    decode_image,
+)
+from src.core.models import Face, Photo, Root
+from src.services.face_indexer import FaceIndexer
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_OUTPUT_DIR = REPO_ROOT / "data" / "benchmarks"
+PHOTO_SIZE = (3000, 2000)
+MAX_FACES_PER_PHOTO = 4
+# Aligned crops embedded per (batch size, worker count) measurement.
+EMBED_FACES = 256
+# Approximate nearest-neighbour sweep (`--ann`).
+ANN_FACE_COUNT = 200_000
+ANN_FACES_PER_PERSON = 10
+ANN_QUERY_COUNT = 200
+ANN_TOP_K = 10
+ANN_NPROBES = (1, 2, 4, 8, 16, 32, 64)
+
+
+def _parse_counts(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def _make_corpus(
+    directory: Path, count: int, rng: np.random.Generator
+) -> tuple[list[Path], list[list[np.ndarray]]]:
+    """Write `count` JPEGs with up to `MAX_FACES_PER_PHOTO` drawn faces each.
+
+    Returns the paths and, per photo, the five landmarks of each drawn face
+    in original pixels.
+    """
+
+    paths, landmarks = [], []
+    exif = Image.Exif()
+    exif[0x010F] = "BenchCam"
+    for index in range(count):
+        background = Image.effect_noise((PHOTO_SIZE[0] // 10, PHOTO_SIZE[1] // 10), 40)
+        tint = tuple(int(value) for value in rng.integers(60, 200, 3))
+        image = Image.merge(
+            "RGB", [background.point(lambda v, t=t: (v + t) // 2) for t in tint]
+        ).resize(PHOTO_SIZE, Image.BILINEAR)
+        draw = ImageDraw.Draw(image)
+        faces = []
+        for _ in range(int(rng.integers(0, MAX_FACES_PER_PHOTO + 1))):
+            width = float(rng.uniform(150, 600))
+            x = float(rng.uniform(0, PHOTO_SIZE[0] - width))
+            y = float(rng.uniform(0, PHOTO_SIZE[1] - 1.3 * width))
+            points = np.array([x, y]) + width * (_ARCFACE_LANDMARKS - 8) / 96
+            draw.ellipse([x, y, x + width, y + 1.3 * width], fill=(224, 172, 140))
+            for px, py in points[:2]:
+                draw.ellipse([px - width / 16, py - width / 24, px + width / 16, py + width / 24],
+                             fill=(40, 30, 30))
+            draw.line([tuple(points[3]), tuple(points[4])], fill=(150, 60, 60), width=6)
+            faces.append(points)
+        path = directory / f"photo_{index:04d}.jpg"
+        image.save(path, quality=90, exif=exif)
+        paths.append(path)
+        landmarks.append(faces)
+    return paths, landmarks
+
+
+def _run_threaded(items: Sequence[Any], work: Callable[[Any], Any], workers: int) -> float:
+    started = perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        list(executor.map(work, items))
+    return perf_counter() - started
+
+
+def _entry(stage: str, seconds: float, images: int | None, faces: int | None, **params) -> dict:
+    entry: dict[str, Any] = {"stage": stage, **params, "seconds": round(seconds, 4)}
+    if images is not None:
+        entry["images"] = images
+        entry["images_per_sec"] = round(images / seconds, 2) if seconds else None
+    if faces is not None:
+        entry["faces"] = faces
+        entry["faces_per_sec"] = round(faces / seconds, 2) if seconds else None
+    settings = " ".join(f"{key}={value}" for key, value in params.items())
+    images_rate, faces_rate = entry.get("images_per_sec") or "-", entry.get("faces_per_sec") or "-"
+    print(f"{stage:<9} {settings}  {images_rate} images/s, {faces_rate} faces/s")
+    return entry
+
+
+def _models_unavailable(model_dir: Path) -> str | None:
+    if importlib.util.find_spec("onnxruntime") is None:
+        return "onnxruntime is not installed"
+    for name in (DETECTOR_MODEL, RECOGNIZER_MODEL):
+        if not (model_dir / name).exists():
+            return f"model {model_dir / name} not found"
+    return None
+
+
+def _onnxruntime_version() -> str | None:
+    if importlib.util.find_spec("onnxruntime") is None:
+        return None
+    import onnxruntime
+
+    return onnxruntime.__version__
+
+
+def _embedders(model_dir: Path, workers: int) -> Callable[[], FaceEmbedder]:
+    local = threading.local()
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    def embedder() -> FaceEmbedder:
+        if not hasattr(local, "embedder"):
+            local.embedder = FaceEmbedder(model_dir, intra_op_threads=threads)
+        return local.embedder
+
+    return embedder
+
+
+def bench_decode(paths: list[Path], worker_counts: list[int]) -> list[dict]:
+    return [
+        _entry("decode", _run_threaded(paths, decode_image, workers), len(paths), None,
+               workers=workers)
+        for workers in worker_counts
+    ]
+
+
+def bench_detect(
+    images: list[DecodedImage], worker_counts: list[int], model_dir: Path
+) -> list[dict]:
+    entries = []
+    for workers in worker_counts:
+        embedder = _embedders(model_dir, workers)
+        _run_threaded(images[:workers], lambda image: embedder().detect(image), workers)
+        found: list[int] = []
+        seconds = _run_threaded(
+            images, lambda image: found.append(len(embedder().detect(image))), workers
+        )
+        entries.append(_entry("detect", seconds, len(images), sum(found), workers=workers))
+    return entries
+
+
+def bench_align(
+    images: list[DecodedImage], landmarks: list[list[np.ndarray]], worker_counts: list[int]
+) -> list[dict]:
+    aligner = FaceEmbedder(Path("unused"))
+    work = [
+        (image, FaceDetection(box=np.zeros(4), score=1.0, landmarks=points / image.scale))
+        for image, faces in zip(images, landmarks)
+        for points in faces
+    ]
+    return [
+        _entry(
+            "align",
+            _run_threaded(work, lambda item: aligner.align(*item), workers),
+            None,
+            len(work),
+            workers=workers,
+        )
+        for workers in worker_counts
+    ]
+
+
+def bench_embed(
+    batch_sizes: list[int], worker_counts: list[int], model_dir: Path, rng: np.random.Generator
+) -> list[dict]:
+    crops = rng.integers(0, 256, (EMBED_FACES, ALIGNED_SIZE, ALIGNED_SIZE, 3), dtype=np.uint8)
+    entries = []
+    for workers in worker_counts:
+        embedder = _embedders(model_dir, workers)
+        for batch_size in batch_sizes:
+            batches = [
+                crops[start : start + batch_size] for start in range(0, EMBED_FACES, batch_size)
+            ]
+            _run_threaded(batches[:workers], lambda batch: embedder().embed(batch), workers)
+            seconds = _run_threaded(batches, lambda batch: embedder().embed(batch), workers)
+            entries.append(
+                _entry("embed", seconds, None, EMBED_FACES, batch_size=batch_size, workers=workers)
+            )
+    return entries
+
+
+def bench_persist(
+    config: AppConfig,
+    photo_ids: list[int],
+    landmarks: list[list[np.ndarray]],
+    batch_sizes: list[int],
+    rng: np.random.Generator,
+) -> list[dict]:
+    """Time `FaceStore.add_photo_faces` plus the `faces_indexed_at` update per transaction."""
+
+    items = [
+        (
+            photo_id,
+            [
+                FaceDetection(box=np.array([*points.min(0), *points.max(0)]), score=1.0,
+                              landmarks=points)
+                .to_detected_face(1.0, rng.normal(size=EMBEDDING_DIM).astype(np.float32))
+                for points in faces
+            ],
+        )
+        for photo_id, faces in zip(photo_ids, landmarks)
+    ]
+    face_count = sum(len(faces) for _, faces in items)
+    entries = []
+    for batch_size in batch_sizes:
+        _reset_faces(config)
+        with get_session() as session:
+            store = FaceStore.open(config, session)
+        started = perf_counter()
+        for start in range(0, len(items), batch_size):
+            chunk = items[start : start + batch_size]
+            now = datetime.utcnow()
+            with get_session() as session:
+                store.add_photo_faces(session, chunk)
+                bulk_update_photos(
+                    session, [{"id": photo_id, "faces_indexed_at": now} for photo_id, _ in chunk]
+                )
+        seconds = perf_counter() - started
+        entries.append(_entry("persist", seconds, len(items), face_count, batch_size=batch_size))
+    return entries
+
+
+def bench_pipeline(
+    config: AppConfig,
+    photos: list[tuple[int, Path]],
+    batch_sizes: list[int],
+    worker_counts: list[int],
+) -> list[dict]:
+    entries = []
+    for workers in worker_counts:
+        for batch_size in batch_sizes:
+            _reset_faces(config)
+            face_config = config.face_recognition.copy(
+                update={"workers": workers, "batch_size": batch_size}
+            )
+            indexer = FaceIndexer(config.copy(update={"face_recognition": face_config}))
+            stats = indexer.index_faces(photos)
+            entry = _entry(
+                "pipeline",
+                stats.wall_seconds,
+                stats.photos,
+                stats.faces,
+                batch_size=batch_size,
+                workers=workers,
+            )
+            entry["stage_seconds"] = {
+                stage: round(seconds, 4) for stage, seconds in stats.stage_seconds.items()
+            }
+            entries.append(entry)
+    return entries
+
+
+def bench_ann(rng: np.random.Generator) -> dict:
+    """Recall@k and latency of `IVFIndex` against a brute-force scan, per nprobe."""
+
+    people = rng.normal(size=(ANN_FACE_COUNT // ANN_FACES_PER_PERSON, EMBEDDING_DIM))
+    embeddings = np.repeat(people.astype(np.float32), ANN_FACES_PER_PERSON, axis=0)
+    embeddings += rng.normal(scale=0.7, size=embeddings.shape).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    queries = embeddings[rng.choice(ANN_FACE_COUNT, ANN_QUERY_COUNT, replace=False)]
+
+    started = perf_counter()
+    exact = []
+    for query in queries:
+        scores = embeddings @ query
+        exact.append(set(np.argpartition(scores, -ANN_TOP_K)[-ANN_TOP_K:].tolist()))
+    brute_ms = (perf_counter() - started) * 1000 / ANN_QUERY_COUNT
+
+    started = perf_counter()
+    index = IVFIndex.build(np.arange(ANN_FACE_COUNT), embeddings)
+    result: dict[str, Any] = {
+        "faces": ANN_FACE_COUNT,
+        "lists": index.n_lists,
+        "build_seconds": round(perf_counter() - started, 3),
+        "brute_force_ms": round(brute_ms, 3),
+        "sweep": [],
+    }
+    print(f"ann       brute force {brute_ms:.2f} ms/query, {index.n_lists} lists")
+    for nprobe in ANN_NPROBES:
+        started = perf_counter()
+        found = [index.search(query, k=ANN_TOP_K, nprobe=nprobe) for query in queries]
+        latency_ms = (perf_counter() - started) * 1000 / ANN_QUERY_COUNT
+        hits = sum(
+            len(expected & {face_id for face_id, _ in matches})
+            for expected, matches in zip(exact, found)
+        )
+        recall = hits / (ANN_TOP_K * ANN_QUERY_COUNT)
+        result["sweep"].append(
+            {"nprobe": nprobe, "recall": round(recall, 4), "latency_ms": round(latency_ms, 3)}
+        )
+        print(f"ann       nprobe={nprobe} recall@{ANN_TOP_K} {recall:.3f}, {latency_ms:.2f} ms")
+    return result
+
+
+def _reset_faces(config: AppConfig) -> None:
+    with get_session() as session:
+        session.execute(delete(Face))
+        session.execute(update(Photo).values(faces_indexed_at=None))
+    embeddings_path(config).unlink(missing_ok=True)
+
+
+def _compare(results: dict, baseline_path: Path) -> None:
+    """Print the relative change of each matching throughput measurement."""
+
+    baseline = json.loads(baseline_path.read_text())
+
+    def keyed(entries: list[dict]) -> dict:
+        return {
+            (entry["stage"], entry.get("batch_size"), entry.get("workers")): entry
+            for entry in entries
+            if "skipped" not in entry
+        }
+
+    previous = keyed(baseline.get("results", []))
+    for key, entry in keyed(results["results"]).items():
+        if key not in previous:
+            continue
+        for metric in ("images_per_sec", "faces_per_sec"):
+            before, after = previous[key].get(metric), entry.get(metric)
+            if before and after:
+                change = (after - before) / before * 100
+                print(f"{key[0]:<9} batch={key[1]} workers={key[2]} {metric}: {change:+.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--photos", type=int, default=100)
+    parser.add_argument("--batch-sizes", type=_parse_counts, default=[1, 8, 32])
+    parser.add_argument("--workers", type=_parse_counts, default=[1, 2, 4])
+    parser.add_argument("--model-dir", type=Path, default=None)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--ann", action="store_true", help="also run the ANN recall/latency sweep")
+    parser.add_argument("--seed", type=int, default=2024)
+    args = parser.parse_args()
+
+    base_config = load_config(REPO_ROOT)
+    model_dir = args.model_dir or base_config.face_recognition.model_dir
+    unavailable = _models_unavailable(model_dir)
+    rng = np.random.default_rng(args.seed)
+
+    work_dir = Path(tempfile.mkdtemp(prefix="face-bench-"))
+    try:
+        config = base_config.copy(
+            update={
+                "database_path": work_dir / "photos.db",
+                "cache_dir": work_dir / "cache",
+                "face_recognition": base_config.face_recognition.copy(
+                    update={"model_dir": model_dir}
+                ),
+            }
+        )
+        init_database(config)
+        corpus_dir = work_dir / "corpus"
+        corpus_dir.mkdir()
+        started = perf_counter()
+        paths, landmarks = _make_corpus(corpus_dir, args.photos, rng)
+        print(f"corpus    {len(paths)} photos generated in {perf_counter() - started:.1f}s")
+        with get_session() as session:
+            root = Root(path=str(corpus_dir), name="corpus")
+            session.add(root)
+            session.flush()
+            photos = [Photo(root_id=root.id, relative_path=p.name, filename=p.name) for p in paths]
+            session.add_all(photos)
+            session.flush()
+            photo_ids = [photo.id for photo in photos]
+
+        results = bench_decode(paths, args.workers)
+        images = [decode_image(path) for path in paths]
+        results += bench_align(images, landmarks, args.workers)
+        if unavailable is None:
+            results += bench_detect(images, args.workers, model_dir)
+            results += bench_embed(args.batch_sizes, args.workers, model_dir, rng)
+        else:
+            print(f"detect, embed and pipeline skipped: {unavailable}")
+            results += [{"stage": stage, "skipped": unavailable} for stage in ("detect", "embed")]
+        results += bench_persist(config, photo_ids, landmarks, args.batch_sizes, rng)
+        if unavailable is None:
+            results += bench_pipeline(
+                config, list(zip(photo_ids, paths)), args.batch_sizes, args.workers
+            )
+        else:
+            results.append({"stage": "pipeline", "skipped": unavailable})
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "benchmark": "faces",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "onnxruntime": _onnxruntime_version(),
+        },
+        "corpus": {
+            "photos": len(paths),
+            "faces": sum(len(faces) for faces in landmarks),
+            "photo_size": list(PHOTO_SIZE),
+        },
+        "results": results,
+    }
+    if args.ann:
+        report["ann"] = bench_ann(rng)
 
-from src.core.faces import FaceEmbedder
+    output = args.output or DEFAULT_OUTPUT_DIR / f"faces-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"results written to {output}")
+    if args.baseline is not None:
+        _compare(report, args.baseline)
 
 
 if __name__ == "__main__":
-    model_path = Path("data/models/w600k_r50.onnx")
-    embedder = FaceEmbedder(model_path)
-    start = perf_counter()
-    _ = embedder.detect_and_embed(Path("/dev/null"))
-    duration = perf_counter() - start
-    print(f"Ran dummy embedding in {duration:.4f}s using model {model_path}")
+    main()
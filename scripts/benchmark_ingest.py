@@ -0,0 +1,80 @@
+"""Benchmark decodes per photo for EXIF + multi-size thumbnail extraction."""
+from __future__ import annotations
+
+import shutil
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from types import SimpleNamespace
+
+from PIL import Image, ImageFile
+
+from src.core.config import load_config
+from src.core.exif import extract_exif
+from src.core.thumbnails import _normalize_sizes, generate_thumbnail, ingest_image
+
+
+PHOTO_COUNT = 20
+PHOTO_SIZE = (4000, 3000)
+
+_decodes = 0
+_original_load = ImageFile.ImageFile.load
+
+
+def _counting_load(self):
+    global _decodes
+    if self.tile:
+        _decodes += 1
+    return _original_load(self)
+
+
+def _make_corpus(directory: Path) -> list[SimpleNamespace]:
+    photos = []
+    for index in range(PHOTO_COUNT):
+        path = directory / f"photo_{index:03d}.jpg"
+        exif = Image.Exif()
+        exif[0x010F] = "BenchCam"
+        exif[0x0112] = 6
+        Image.effect_noise(PHOTO_SIZE, 64).convert("RGB").save(path, quality=90, exif=exif)
+        photos.append(SimpleNamespace(id=index, relative_path=Path(path.name), root_path=directory))
+    return photos
+
+
+def _run(label: str, photos: list[SimpleNamespace], ingest) -> None:
+    global _decodes
+    _decodes = 0
+    start = perf_counter()
+    for photo in photos:
+        ingest(photo)
+    duration = perf_counter() - start
+    print(
+        f"{label:<10} {_decodes / len(photos):5.2f} decodes/photo  "
+        f"{len(photos) / duration:6.2f} photos/s"
+    )
+
+
+if __name__ == "__main__":
+    repo_root = Path(__file__).resolve().parents[1]
+    config = load_config(repo_root)
+    work_dir = Path(tempfile.mkdtemp(prefix="ingest-bench-"))
+    try:
+        photos = _make_corpus(work_dir)
+        ImageFile.ImageFile.load = _counting_load
+        sizes = _normalize_sizes(None, config.thumb_sizes)
+
+        def legacy(photo: SimpleNamespace) -> None:
+            extract_exif(photo.root_path / photo.relative_path)
+            for size_label in sizes:
+                generate_thumbnail(photo, size_label, legacy_config)
+
+        def single_decode(photo: SimpleNamespace) -> None:
+            ingest_image(photo, ingest_config)
+
+        legacy_config = config.copy(update={"cache_dir": work_dir / "legacy"})
+        ingest_config = config.copy(update={"cache_dir": work_dir / "ingest"})
+        print(f"{PHOTO_COUNT} photos at {PHOTO_SIZE[0]}x{PHOTO_SIZE[1]}, sizes={sizes}")
+        _run("legacy", photos, legacy)
+        _run("ingest", photos, single_decode)
+    finally:
+        ImageFile.ImageFile.load = _original_load
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,69 @@
+"""Time near-duplicate grouping over synthetic perceptual hashes against a brute-force scan."""
+from __future__ import annotations
+
+from time import perf_counter
+
+import numpy as np
+
+from src.core.phash import DEFAULT_RADIUS, PerceptualHashIndex
+
+
+PHOTO_COUNT = 500_000
+# Fraction of photos that get a planted near-duplicate (burst shot, re-encode).
+NEAR_DUPLICATE_FRACTION = 0.05
+# Fraction of photos that are near-uniform images (black frames, blank skies).
+DEGENERATE_FRACTION = 0.01
+BRUTE_FORCE_SAMPLE = 2_000
+
+
+def _synthetic_hashes(rng: np.random.Generator) -> np.ndarray:
+    # Bits of real dHashes are biased rather than fair coins; draw each bit
+    # with its own probability (mostly 0.3-0.7) so chunk buckets are uneven.
+    bit_odds = rng.beta(8.0, 8.0, 64)
+    bits = rng.random((PHOTO_COUNT, 64)) < bit_odds
+    hashes = np.packbits(bits, axis=1).view(">u8").reshape(-1).astype(np.uint64)
+
+    planted = rng.choice(PHOTO_COUNT, int(PHOTO_COUNT * NEAR_DUPLICATE_FRACTION), replace=False)
+    sources = rng.choice(PHOTO_COUNT, len(planted), replace=False)
+    flips = rng.integers(0, DEFAULT_RADIUS + 1, len(planted))
+    for target, source, count in zip(planted, sources, flips):
+        mask = 0
+        for bit in rng.choice(64, int(count), replace=False):
+            mask |= 1 << int(bit)
+        hashes[target] = hashes[source] ^ np.uint64(mask)
+
+    degenerate = rng.choice(PHOTO_COUNT, int(PHOTO_COUNT * DEGENERATE_FRACTION), replace=False)
+    hashes[degenerate] = np.uint64(0)
+    return hashes.view(np.int64)
+
+
+def main() -> None:
+    rng = np.random.default_rng(2024)
+    hashes = _synthetic_hashes(rng)
+    index = PerceptualHashIndex(np.arange(1, PHOTO_COUNT + 1), hashes)
+
+    started = perf_counter()
+    groups = index.near_duplicate_groups(DEFAULT_RADIUS)
+    grouped = perf_counter() - started
+    print(
+        f"near_duplicate_groups: {PHOTO_COUNT} hashes, radius {DEFAULT_RADIUS}: "
+        f"{grouped:.2f} s, {len(groups)} groups covering {sum(map(len, groups))} photos"
+    )
+
+    started = perf_counter()
+    for phash in hashes[:100]:
+        index.similar_to(int(phash), DEFAULT_RADIUS)
+    print(f"similar_to: {(perf_counter() - started) * 10:.1f} ms per query")
+
+    started = perf_counter()
+    for phash in hashes[:BRUTE_FORCE_SAMPLE]:
+        index.similar_to(int(phash), DEFAULT_RADIUS)
+    sampled = perf_counter() - started
+    print(
+        f"brute force all pairs (extrapolated from {BRUTE_FORCE_SAMPLE} scans): "
+        f"{sampled * PHOTO_COUNT / BRUTE_FORCE_SAMPLE:.0f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Measure per-keystroke search latency: FTS5 prefix search vs. filename ILIKE scans."""
+from __future__ import annotations
+
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from src.core.bulk import bulk_insert_photos, bulk_upsert_exif, exif_row
+from src.core.db import Base
+from src.core.models import Photo, PhotoTag, Root, Tag
+from src.core.search import query_photos
+
+
+DEFAULT_ROWS = 500_000
+# A broad term (about one photo in nine) and a near-unique filename.
+TYPED_QUERIES = ["holiday", "img_0123456"]
+REPEATS = 5
+
+_WORDS = ["beach", "family", "holiday", "garden", "birthday", "hike", "city", "snow", "party"]
+_CAMERAS = [("Canon", "EOS R6"), ("Nikon", "Z6"), ("Fujifilm", "X-T4"), ("Apple", "iPhone 13")]
+
+
+def _populate(session: Session, rows: int) -> None:
+    rng = random.Random(42)
+    root = Root(path="/library", name="library")
+    session.add(root)
+    tags = [Tag(name=word) for word in _WORDS]
+    session.add_all(tags)
+    session.flush()
+
+    epoch = datetime(2000, 1, 1)
+
+    def _photo(i: int) -> dict:
+        folder = f"{2000 + i % 24}/{rng.choice(_WORDS)}_{i // 5000:03d}"
+        filename = f"IMG_{i:07d}.jpg"
+        return {
+            "root_id": root.id,
+            "relative_path": f"{folder}/{filename}",
+            "filename": filename,
+            "taken_at": epoch + timedelta(seconds=rng.randrange(24 * 365 * 86400)),
+        }
+
+    bulk_insert_photos(session, (_photo(i) for i in range(rows)), chunk_size=5000)
+    photo_ids = session.scalars(select(Photo.id)).all()
+
+    exif_rows = []
+    for photo_id in photo_ids:
+        make, model = rng.choice(_CAMERAS)
+        exif_rows.append(exif_row(photo_id, {"camera_make": make, "camera_model": model}))
+    bulk_upsert_exif(session, exif_rows, chunk_size=5000)
+
+    tag_rows = [
+        {"photo_id": photo_id, "tag_id": rng.choice(tags).id}
+        for photo_id in rng.sample(photo_ids, len(photo_ids) // 10)
+    ]
+    session.execute(insert(PhotoTag), tag_rows)
+    session.commit()
+
+
+def _ilike_query(session: Session, text: str) -> None:
+    # The text filter query_photos used before the FTS index existed.
+    stmt = (
+        select(Photo)
+        .where(Photo.filename.ilike(f"%{text}%"))
+        .order_by(Photo.taken_at.desc(), Photo.id.desc())
+        .limit(200)
+    )
+    session.scalars(stmt).all()
+
+
+def _fts_query(session: Session, text: str) -> None:
+    query_photos(session, text=text)
+
+
+def _keystroke_latencies(session: Session, search, typed: str) -> list[float]:
+    latencies = []
+    for length in range(1, len(typed) + 1):
+        prefix = typed[:length]
+        samples = []
+        for _ in range(REPEATS):
+            start = perf_counter()
+            search(session, prefix)
+            samples.append(perf_counter() - start)
+        latencies.append(statistics.median(samples))
+    return latencies
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    work_dir = Path(tempfile.mkdtemp(prefix="search-bench-"))
+    try:
+        engine = create_engine(f"sqlite+pysqlite:///{work_dir / 'search.db'}", future=True)
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            start = perf_counter()
+            _populate(session, rows)
+            print(f"Populated {rows:,} photos in {perf_counter() - start:.1f}s")
+
+            for typed in TYPED_QUERIES:
+                ilike = _keystroke_latencies(session, _ilike_query, typed)
+                fts = _keystroke_latencies(session, _fts_query, typed)
+
+                print(f"\n{'keystroke':<12} {'ILIKE (ms)':>11} {'FTS5 (ms)':>10}")
+                for length, (slow, fast) in enumerate(zip(ilike, fts), start=1):
+                    print(f"{typed[:length]:<12} {slow * 1000:11.1f} {fast * 1000:10.1f}")
+        engine.dispose()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,85 @@
+"""Compare JPEG draft-mode thumbnail decoding against full decodes for speed and quality."""
+from __future__ import annotations
+
+import shutil
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from types import SimpleNamespace
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from src.core.config import load_config
+from src.core.thumbnails import generate_thumbnail
+
+
+SOURCE_SIZE = (8000, 6000)
+REPEATS = 3
+
+
+def _make_source(path: Path) -> None:
+    """Write a large JPEG with smooth gradients and hard edges."""
+
+    width, height = SOURCE_SIZE
+    red = Image.linear_gradient("L").resize(SOURCE_SIZE)
+    green = Image.radial_gradient("L").resize(SOURCE_SIZE)
+    blue = red.transpose(Image.Transpose.ROTATE_90).resize(SOURCE_SIZE)
+    image = Image.merge("RGB", (red, green, blue))
+    draw = ImageDraw.Draw(image)
+    for offset in range(0, width, width // 40):
+        draw.line([(offset, 0), (width - offset, height)], fill=(255, 255, 255), width=6)
+    image.save(path, quality=92)
+
+
+def _psnr(reference: Path, candidate: Path) -> float:
+    with Image.open(reference) as ref, Image.open(candidate) as cand:
+        a = np.asarray(ref.convert("RGB"), dtype=np.float64)
+        b = np.asarray(cand.convert("RGB").resize(ref.size), dtype=np.float64)
+    mse = float(np.mean((a - b) ** 2))
+    if mse == 0:
+        return float("inf")
+    return 10 * np.log10(255.0**2 / mse)
+
+
+def _time_thumbnail(photo: SimpleNamespace, size_label: str, config) -> tuple[float, Path]:
+    best = float("inf")
+    destination = None
+    for _ in range(REPEATS):
+        start = perf_counter()
+        destination = generate_thumbnail(photo, size_label, config)
+        best = min(best, perf_counter() - start)
+    return best, destination
+
+
+if __name__ == "__main__":
+    repo_root = Path(__file__).resolve().parents[1]
+    config = load_config(repo_root)
+    work_dir = Path(tempfile.mkdtemp(prefix="draft-bench-"))
+    try:
+        _make_source(work_dir / "source.jpg")
+        photo = SimpleNamespace(id=1, relative_path=Path("source.jpg"), root_path=work_dir)
+        full_config = config.copy(
+            update={
+                "cache_dir": work_dir / "full",
+                "thumbnails": config.thumbnails.copy(update={"jpeg_draft_mode": False}),
+            }
+        )
+        draft_config = config.copy(
+            update={
+                "cache_dir": work_dir / "draft",
+                "thumbnails": config.thumbnails.copy(update={"jpeg_draft_mode": True}),
+            }
+        )
+
+        print(f"Source {SOURCE_SIZE[0]}x{SOURCE_SIZE[1]} JPEG, best of {REPEATS}")
+        print(f"{'size':<8} {'full (s)':>9} {'draft (s)':>10} {'speedup':>8} {'PSNR (dB)':>10}")
+        for size_label in sorted(config.thumb_sizes, key=config.thumb_sizes.get):
+            full_time, full_path = _time_thumbnail(photo, size_label, full_config)
+            draft_time, draft_path = _time_thumbnail(photo, size_label, draft_config)
+            print(
+                f"{size_label:<8} {full_time:9.3f} {draft_time:10.3f} "
+                f"{full_time / draft_time:7.1f}x {_psnr(full_path, draft_path):10.2f}"
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,29 @@
+"""Compact the packed thumbnail store, dropping thumbnails of deleted photos.
+
+Run while the application is closed: the store must have a single writer.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+from sqlalchemy import select
+
+from src.core.config import load_config
+from src.core.db import get_session, init_database
+from src.core.models import Photo
+from src.core.thumb_store import get_packed_store
+
+
+if __name__ == "__main__":
+    repo_root = Path(__file__).resolve().parents[1]
+    config = load_config(repo_root)
+    init_database(config)
+    with get_session() as session:
+        live_ids = set(session.scalars(select(Photo.id)))
+
+    result = get_packed_store(config).compact(live_ids)
+    print(
+        f"Kept {result.kept} thumbnails, dropped {result.dropped}; "
+        f"reclaimed {result.reclaimed_bytes / (1024 * 1024):.1f} MiB "
+        f"({result.bytes_before:,} -> {result.bytes_after:,} bytes)"
+    )
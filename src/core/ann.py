@@ -0,0 +1,393 @@
+"""Approximate nearest-neighbour search over face embeddings (inverted file index)."""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from .config import AppConfig
+from .face_store import FaceStore
+
+
+DEFAULT_NPROBE = 32
+ANN_INDEX_STEM = "face_ann"
+
+# Rows scored against the centroids per matrix product while assigning.
+_ASSIGN_BLOCK = 8192
+# Training points sampled per list for k-means.
+_TRAIN_POINTS_PER_LIST = 64
+# Scores held at once by `knn_graph` (64 MiB of float32).
+_SCORE_BUDGET = 16 * 1024 * 1024
+# A saved index is rebuilt once its size calls for this many times its lists,
+# i.e. after growing about fourfold since it was trained.
+_REBUILD_LIST_RATIO = 2
+
+
+def ann_index_path(config: AppConfig) -> Path:
+    """Path prefix of the persisted index, next to the database."""
+
+    return Path(config.database_path).parent / ANN_INDEX_STEM
+
+
+def default_list_count(size: int) -> int:
+    return max(1, min(size, int(round(np.sqrt(size)))))
+
+
+class _ListTail:
+    """Growable (ids, vectors) appended to one inverted list since the last save."""
+
+    def __init__(self, dim: int) -> None:
+        self.ids = np.empty(0, dtype=np.int64)
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.size = 0
+
+    def extend(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        end = self.size + len(ids)
+        if end > len(self.ids):
+            capacity = max(end, 2 * len(self.ids), 16)
+            self.ids = np.resize(self.ids, capacity)
+            grown = np.empty((capacity, self.vectors.shape[1]), dtype=np.float32)
+            grown[: self.size] = self.vectors[: self.size]
+            self.vectors = grown
+        self.ids[self.size : end] = ids
+        self.vectors[self.size : end] = vectors
+        self.size = end
+
+
+class IVFIndex:
+    """Inverted file index with spherical k-means centroids, for cosine similarity.
+
+    Vectors are L2-normalized and partitioned into `n_lists` lists by their
+    nearest centroid. A query scores the centroids, then only the vectors
+    of the `nprobe` closest lists, so cost drops from n to about
+    n * nprobe / n_lists dot products; raising `nprobe` trades latency for
+    recall (`nprobe == n_lists` is exact).
+
+    Vectors added after `build` go to their nearest existing centroid; if
+    the data drifts far from the training set, rebuild. Removed ids are
+    tombstoned until the next `save`. Saved indexes are reopened with the
+    vectors memory-mapped, so loading is instant and pages are shared with
+    the OS cache.
+    """
+
+    def __init__(self, centroids: np.ndarray, nprobe: int = DEFAULT_NPROBE) -> None:
+        self.centroids = _normalize(centroids)
+        self.dim = self.centroids.shape[1]
+        self.nprobe = nprobe
+        self._base_ids = np.empty(0, dtype=np.int64)
+        self._base_vectors = np.empty((0, self.dim), dtype=np.float32)
+        self._offsets = np.zeros(self.n_lists + 1, dtype=np.int64)
+        self._tails: dict[int, _ListTail] = {}
+        self._deleted: set[int] = set()
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    def __len__(self) -> int:
+        size = len(self._base_ids) + sum(tail.size for tail in self._tails.values())
+        return size - len(self._deleted)
+
+    @classmethod
+    def train(
+        cls,
+        vectors: np.ndarray,
+        n_lists: int | None = None,
+        *,
+        iterations: int = 10,
+        nprobe: int = DEFAULT_NPROBE,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """Fit centroids with spherical k-means on a sample of `vectors`; the index is empty."""
+
+        if len(vectors) == 0:
+            raise ValueError("Cannot train an index without vectors")
+        rng = np.random.default_rng(seed)
+        n_lists = min(n_lists or default_list_count(len(vectors)), len(vectors))
+        sample_size = min(len(vectors), n_lists * _TRAIN_POINTS_PER_LIST)
+        sample = _normalize(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = _nearest(sample, centroids)
+            order = np.argsort(assignment, kind="stable")
+            counts = np.bincount(assignment, minlength=n_lists)
+            filled = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)))[filled]
+            sums = np.empty_like(centroids)
+            sums[filled] = np.add.reduceat(sample[order], starts, axis=0)
+            # Re-seed lists that lost every point instead of leaving them dead.
+            empty = np.flatnonzero(counts == 0)
+            sums[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+            centroids = _normalize(sums)
+        return cls(centroids, nprobe=nprobe)
+
+    @classmethod
+    def build(
+        cls,
+        ids: Iterable[int],
+        vectors: np.ndarray,
+        n_lists: int | None = None,
+        **train_options,
+    ) -> "IVFIndex":
+        """Train on `vectors` and add them all, laid out contiguously per list."""
+
+        index = cls.train(vectors, n_lists, **train_options)
+        index._set_base(_as_ids(ids), vectors)
+        return index
+
+    def ids(self) -> np.ndarray:
+        """Every indexed id, in no particular order."""
+
+        parts = [self._base_ids] + [tail.ids[: tail.size] for tail in self._tails.values()]
+        ids = np.concatenate(parts)
+        if self._deleted:
+            ids = ids[~np.isin(ids, np.fromiter(self._deleted, dtype=np.int64))]
+        return ids
+
+    def add(self, ids: Iterable[int], vectors: np.ndarray) -> None:
+        """Insert vectors under their nearest existing centroid."""
+
+        ids = _as_ids(ids)
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        self._deleted.difference_update(ids.tolist())
+        assignment = _nearest(vectors, self.centroids)
+        for list_no in np.unique(assignment):
+            members = assignment == list_no
+            tail = self._tails.setdefault(int(list_no), _ListTail(self.dim))
+            tail.extend(ids[members], vectors[members])
+
+    def remove(self, ids: Iterable[int]) -> None:
+        self._deleted.update(int(face_id) for face_id in ids)
+
+    def search(
+        self, query: np.ndarray, k: int = 10, nprobe: int | None = None
+    ) -> list[tuple[int, float]]:
+        """Return up to `k` `(id, cosine similarity)` pairs, most similar first."""
+
+        query = _normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        probes = min(nprobe or self.nprobe, self.n_lists)
+        lists = np.argpartition(self.centroids @ query, -probes)[-probes:]
+
+        id_parts: list[np.ndarray] = []
+        score_parts: list[np.ndarray] = []
+        for list_no in lists.tolist():
+            start, end = self._offsets[list_no], self._offsets[list_no + 1]
+            if end > start:
+                id_parts.append(self._base_ids[start:end])
+                score_parts.append(self._base_vectors[start:end] @ query)
+            tail = self._tails.get(list_no)
+            if tail is not None and tail.size:
+                id_parts.append(tail.ids[: tail.size])
+                score_parts.append(tail.vectors[: tail.size] @ query)
+        if not id_parts:
+            return []
+
+        ids = np.concatenate(id_parts)
+        scores = np.concatenate(score_parts)
+        if self._deleted:
+            keep = ~np.isin(ids, np.fromiter(self._deleted, dtype=np.int64))
+            ids, scores = ids[keep], scores[keep]
+        if len(ids) > k:
+            best = np.argpartition(scores, -k)[-k:]
+            ids, scores = ids[best], scores[best]
+        order = np.argsort(-scores, kind="stable")
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+    def knn_graph(
+        self, k: int, nprobe: int | None = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Find the `k` nearest other indexed vectors of every indexed vector.
+
+        Returns `(ids, neighbours, scores)`: `ids` has one entry per vector,
+        and row i of the `(n, k)` `neighbours`/`scores` arrays holds the ids
+        and similarities of its neighbours, best first, padded with -1 and
+        -inf when fewer exist. Members of one list share the `nprobe` lists
+        closest to its centroid, so each list is scored against its
+        candidates with one matrix product rather than n separate searches.
+        """
+
+        probes = min(nprobe or self.nprobe, self.n_lists)
+        members = [self._members(list_no) for list_no in range(self.n_lists)]
+        closeness = self.centroids @ self.centroids.T
+        np.fill_diagonal(closeness, np.inf)
+        probe_lists = np.argsort(-closeness, axis=1, kind="stable")[:, :probes]
+
+        id_parts, neighbour_parts, score_parts = [], [], []
+        for list_no, (query_ids, query_vectors) in enumerate(members):
+            if not len(query_ids):
+                continue
+            # The list itself comes first, so each query's own column is known.
+            candidates = [members[other] for other in probe_lists[list_no]]
+            candidate_ids = np.concatenate([ids for ids, _ in candidates])
+            candidate_vectors = np.concatenate([vectors for _, vectors in candidates])
+            width = min(k, len(candidate_ids) - 1)
+            block = max(1, _SCORE_BUDGET // len(candidate_ids))
+            for start in range(0, len(query_ids), block):
+                rows = np.arange(min(block, len(query_ids) - start))
+                scores = np.asarray(query_vectors[start : start + len(rows)]) @ candidate_vectors.T
+                scores[rows, start + rows] = -np.inf
+                neighbours = np.full((len(rows), k), -1, dtype=np.int64)
+                best_scores = np.full((len(rows), k), -np.inf, dtype=np.float32)
+                if width > 0:
+                    best = np.argpartition(scores, -width, axis=1)[:, -width:]
+                    top = np.take_along_axis(scores, best, axis=1)
+                    order = np.argsort(-top, axis=1, kind="stable")
+                    best = np.take_along_axis(best, order, axis=1)
+                    neighbours[:, :width] = candidate_ids[best]
+                    best_scores[:, :width] = np.take_along_axis(top, order, axis=1)
+                id_parts.append(query_ids[start : start + len(rows)])
+                neighbour_parts.append(neighbours)
+                score_parts.append(best_scores)
+        if not id_parts:
+            empty = np.empty((0, k))
+            return np.empty(0, dtype=np.int64), empty.astype(np.int64), empty.astype(np.float32)
+        return (
+            np.concatenate(id_parts),
+            np.concatenate(neighbour_parts),
+            np.concatenate(score_parts),
+        )
+
+    def save(self, path: Path) -> None:
+        """Write the index to `<path>.npz` and `<path>.vectors.npy`, folding in changes."""
+
+        ids, vectors, offsets = self._merged()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        vectors_path, meta_path = _paths(path)
+        temporary_vectors = vectors_path.with_name(vectors_path.name + ".tmp")
+        temporary_meta = meta_path.with_name(meta_path.name + ".tmp")
+        with open(temporary_vectors, "wb") as handle:
+            np.save(handle, vectors)
+        with open(temporary_meta, "wb") as handle:
+            np.savez(
+                handle,
+                centroids=self.centroids,
+                ids=ids,
+                offsets=offsets,
+                nprobe=np.array(self.nprobe),
+            )
+        self._base_vectors = np.empty((0, self.dim), dtype=np.float32)
+        os.replace(temporary_vectors, vectors_path)
+        os.replace(temporary_meta, meta_path)
+        self._base_ids, self._offsets = ids, offsets
+        self._base_vectors = np.load(vectors_path, mmap_mode="r")
+        self._tails.clear()
+        self._deleted.clear()
+
+    @classmethod
+    def load(cls, path: Path) -> "IVFIndex | None":
+        """Open a saved index, or return None if it is missing or inconsistent."""
+
+        vectors_path, meta_path = _paths(Path(path))
+        if not (vectors_path.exists() and meta_path.exists()):
+            return None
+        with np.load(meta_path) as meta:
+            index = cls(meta["centroids"], nprobe=int(meta["nprobe"]))
+            ids, offsets = meta["ids"], meta["offsets"]
+        vectors = np.load(vectors_path, mmap_mode="r")
+        if vectors.shape != (len(ids), index.dim) or offsets[-1] != len(ids):
+            return None
+        index._base_ids, index._offsets, index._base_vectors = ids, offsets, vectors
+        return index
+
+    def _set_base(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        assignment = _nearest(vectors, self.centroids)
+        order = np.argsort(assignment, kind="stable")
+        self._base_ids = ids[order]
+        # One reordered copy, normalized in place, so building needs no more
+        # than the input plus the index (the input may be a memory map).
+        self._base_vectors = np.asarray(vectors[order], dtype=np.float32)
+        for start in range(0, len(order), _ASSIGN_BLOCK):
+            block = self._base_vectors[start : start + _ASSIGN_BLOCK]
+            block /= np.maximum(
+                np.linalg.norm(block, axis=1, keepdims=True), np.finfo(np.float32).tiny
+            )
+        counts = np.bincount(assignment, minlength=self.n_lists)
+        self._offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self._tails.clear()
+        self._deleted.clear()
+
+    def _members(self, list_no: int) -> tuple[np.ndarray, np.ndarray]:
+        start, end = self._offsets[list_no], self._offsets[list_no + 1]
+        ids, vectors = self._base_ids[start:end], self._base_vectors[start:end]
+        tail = self._tails.get(list_no)
+        if tail is not None and tail.size:
+            ids = np.concatenate([ids, tail.ids[: tail.size]])
+            vectors = np.concatenate([vectors, tail.vectors[: tail.size]])
+        if self._deleted:
+            keep = ~np.isin(ids, np.fromiter(self._deleted, dtype=np.int64))
+            ids, vectors = ids[keep], vectors[keep]
+        return ids, vectors
+
+    def _merged(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        members = [self._members(list_no) for list_no in range(self.n_lists)]
+        counts = [len(ids) for ids, _ in members]
+        offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return (
+            np.concatenate([ids for ids, _ in members]),
+            np.concatenate([vectors for _, vectors in members]).astype(np.float32, copy=False),
+            offsets,
+        )
+
+
+def open_ann_index(
+    config: AppConfig, store: FaceStore, nprobe: int | None = None
+) -> IVFIndex | None:
+    """Load the saved index and bring it in line with `store`, building it if needed.
+
+    Faces added or removed since the last save are applied incrementally
+    and the index is saved again. It is rebuilt instead when it is missing
+    or when the store has outgrown its lists (`_REBUILD_LIST_RATIO`), since
+    added faces only join the lists trained on the original faces. Returns
+    None for an empty store.
+    """
+
+    face_ids, rows = store.live()
+    if not len(face_ids):
+        return None
+    path = ann_index_path(config)
+    index = IVFIndex.load(path)
+    if (
+        index is None
+        or index.dim != store.matrix.dim
+        or index.n_lists * _REBUILD_LIST_RATIO < default_list_count(len(face_ids))
+    ):
+        index = IVFIndex.build(face_ids, store.matrix.view[rows])
+        index.save(path)
+    else:
+        indexed = index.ids()
+        removed = np.setdiff1d(indexed, face_ids, assume_unique=True)
+        missing = np.isin(face_ids, indexed, invert=True)
+        index.remove(removed.tolist())
+        if missing.any():
+            index.add(face_ids[missing], store.matrix.view[rows[missing]])
+        if len(removed) or missing.any():
+            index.save(path)
+    if nprobe is not None:
+        index.nprobe = nprobe
+    return index
+
+
+def _as_ids(ids: Iterable[int]) -> np.ndarray:
+    return np.asarray(ids if isinstance(ids, np.ndarray) else list(ids), dtype=np.int64)
+
+
+def _paths(path: Path) -> tuple[Path, Path]:
+    return path.with_name(path.name + ".vectors.npy"), path.with_name(path.name + ".npz")
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _ASSIGN_BLOCK):
+        block = np.asarray(vectors[start : start + _ASSIGN_BLOCK], dtype=np.float32)
+        assignment[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, np.finfo(np.float32).tiny)
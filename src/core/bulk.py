@@ -0,0 +1,126 @@
+"""Bulk persistence helpers for high-volume photo and EXIF writes.
+
+These bypass the ORM unit of work and issue Core `INSERT`/`UPDATE`
+statements with executemany, so callers must not hold ORM instances of the
+rows they write in the same session.
+"""
+from __future__ import annotations
+
+from itertools import groupby, islice
+from typing import Any, Iterable, Iterator, Mapping
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .models import ExifData, FileHash, Photo
+
+
+DEFAULT_CHUNK_SIZE = 500
+
+Row = Mapping[str, Any]
+
+_PHOTO_TABLE = Photo.__table__
+_EXIF_TABLE = ExifData.__table__
+_FILE_HASH_TABLE = FileHash.__table__
+_EXIF_COLUMNS = [column.name for column in _EXIF_TABLE.columns if column.name != "photo_id"]
+
+
+def _chunks(rows: Iterable[Row], chunk_size: int) -> Iterator[list[Row]]:
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def bulk_insert_photos(
+    session: Session, rows: Iterable[Row], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """Insert new photo rows in executemany chunks, returning the number inserted.
+
+    Column defaults (status, imported_at, thumb_status, ...) are applied for
+    keys that are omitted; every row in a call must provide the same keys.
+    """
+
+    inserted = 0
+    for chunk in _chunks(rows, chunk_size):
+        session.execute(insert(_PHOTO_TABLE), chunk)
+        inserted += len(chunk)
+    return inserted
+
+
+def bulk_update_photos(
+    session: Session, rows: Iterable[Row], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """Update photos by primary key, returning the number of rows submitted.
+
+    Each row must carry `id` plus the columns to change. Rows with differing
+    column sets are grouped so every executemany batch shares one statement.
+    """
+
+    def _columns(row: Row) -> tuple[str, ...]:
+        return tuple(sorted(key for key in row if key != "id"))
+
+    updated = 0
+    for columns, group in groupby(sorted(rows, key=_columns), key=_columns):
+        if not columns:
+            continue
+        stmt = (
+            update(_PHOTO_TABLE)
+            .where(_PHOTO_TABLE.c.id == bindparam("_id"))
+            .values({name: bindparam(f"_{name}") for name in columns})
+        )
+        for chunk in _chunks(group, chunk_size):
+            params = [{f"_{key}": value for key, value in row.items()} for row in chunk]
+            session.execute(stmt, params)
+            updated += len(chunk)
+    return updated
+
+
+def exif_row(photo_id: int, exif_data: Mapping[str, Any]) -> dict[str, Any]:
+    """Build an `exif_data` row from normalized EXIF values."""
+
+    row = {name: exif_data.get(name) for name in _EXIF_COLUMNS}
+    row["photo_id"] = photo_id
+    return row
+
+
+def bulk_upsert_exif(
+    session: Session, rows: Iterable[Row], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """Insert or replace EXIF rows keyed by `photo_id` with INSERT ... ON CONFLICT DO UPDATE."""
+
+    stmt = sqlite_insert(_EXIF_TABLE)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[_EXIF_TABLE.c.photo_id],
+        set_={name: stmt.excluded[name] for name in _EXIF_COLUMNS},
+    )
+
+    written = 0
+    for chunk in _chunks(rows, chunk_size):
+        session.execute(stmt, chunk)
+        written += len(chunk)
+    return written
+
+
+def bulk_upsert_file_hashes(
+    session: Session, rows: Iterable[Row], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """Insert or replace hash cache rows keyed by `path`."""
+
+    stmt = sqlite_insert(_FILE_HASH_TABLE)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[_FILE_HASH_TABLE.c.path],
+        set_={
+            column.name: stmt.excluded[column.name]
+            for column in _FILE_HASH_TABLE.columns
+            if column.name != "path"
+        },
+    )
+
+    written = 0
+    for chunk in _chunks(rows, chunk_size):
+        session.execute(stmt, chunk)
+        written += len(chunk)
+    return written
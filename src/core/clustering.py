@@ -2,10 +2,27 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, List
+from typing import Iterable, List, Sequence
 
 import numpy as np
 
+from .ann import IVFIndex
+
+
+# Cosine similarity above which two faces are linked in the neighbour graph.
+DEFAULT_SIMILARITY_THRESHOLD = 0.5
+DEFAULT_NEIGHBOURS = 16
+DEFAULT_ITERATIONS = 20
+# Up to this many faces the graph is built from exact blocked similarities;
+# above it from the IVF index, probing `DEFAULT_GRAPH_NPROBE` lists.
+EXACT_GRAPH_LIMIT = 20_000
+DEFAULT_GRAPH_NPROBE = 8
+
+# Similarity scores held at once by the blocked exact scan (64 MiB of float32).
+_SCORE_BUDGET = 16 * 1024 * 1024
+# Chinese Whispers updates one random batch of nodes at a time.
+_UPDATE_BATCHES = 8
+
 
 @dataclass
 class ClusterResult:
@@ -13,7 +30,231 @@ class ClusterResult:
     face_indices: List[int]
 
 
-def cluster_embeddings(embeddings: Iterable[np.ndarray]) -> List[ClusterResult]:
-    """Placeholder clustering strategy; replace with DBSCAN/HDBSCAN later."""
-    _ = embeddings
-    return []
+def cluster_embeddings(
+    embeddings: Iterable[np.ndarray],
+    *,
+    threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+    neighbours: int = DEFAULT_NEIGHBOURS,
+    iterations: int = DEFAULT_ITERATIONS,
+    nprobe: int = DEFAULT_GRAPH_NPROBE,
+    seed: int = 0,
+) -> List[ClusterResult]:
+    """Group face embeddings into people with Chinese Whispers over a kNN graph.
+
+    Each face is linked to its `neighbours` most similar faces with cosine
+    similarity of at least `threshold`, then every face repeatedly adopts
+    the label carrying the most similarity among its links until labels
+    settle. The number of people is not fixed in advance, and faces with
+    no close neighbour stay on their own.
+
+    Memory is O(n * neighbours) on top of one normalized copy of the
+    embeddings, which may be passed as a memory-mapped matrix. Clusters
+    are returned largest first; `face_indices` are positions in
+    `embeddings`.
+    """
+
+    vectors = _as_matrix(embeddings)
+    if not len(vectors):
+        return []
+
+    sources, targets, weights = _graph_edges(vectors, threshold, neighbours, nprobe)
+    labels = np.arange(len(vectors), dtype=np.int64)
+    sources, targets, weights = (
+        np.concatenate([sources, targets]),
+        np.concatenate([targets, sources]),
+        np.concatenate([weights, weights]),
+    )
+    _chinese_whispers(labels, sources, targets, weights, iterations, seed)
+    return [
+        ClusterResult(cluster_id=cluster_id, face_indices=members)
+        for cluster_id, members in enumerate(_groups(labels, np.arange(len(labels))))
+    ]
+
+
+def assign_to_clusters(
+    clusters: Sequence[ClusterResult],
+    existing: np.ndarray,
+    new_embeddings: Iterable[np.ndarray],
+    *,
+    index: IVFIndex | None = None,
+    threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+    neighbours: int = DEFAULT_NEIGHBOURS,
+    iterations: int = DEFAULT_ITERATIONS,
+    nprobe: int = DEFAULT_GRAPH_NPROBE,
+    seed: int = 0,
+) -> List[ClusterResult]:
+    """Add new faces to existing clusters without reclustering the library.
+
+    `clusters` index into `existing`; new face i gets index
+    `len(existing) + i`. Each new face is linked to its nearest existing
+    faces and to the other new faces, and Chinese Whispers runs with the
+    existing faces' labels held fixed, so a new face joins the cluster
+    its neighbours vote for, or forms a new cluster with other new faces.
+    Existing clusters keep their ids and gain members; new clusters get
+    ids after the largest existing one.
+
+    Pass `index` (an `IVFIndex` over `existing` whose ids are positions)
+    to find neighbours approximately instead of scanning `existing`.
+    """
+
+    new = _as_matrix(new_embeddings)
+    clusters = [ClusterResult(c.cluster_id, list(c.face_indices)) for c in clusters]
+    if not len(new):
+        return clusters
+
+    offset = len(existing)
+    next_id = max((cluster.cluster_id for cluster in clusters), default=-1) + 1
+    labels = np.full(offset + len(new), -1, dtype=np.int64)
+    for cluster in clusters:
+        labels[cluster.face_indices] = cluster.cluster_id
+    labels[offset:] = next_id + np.arange(len(new))
+
+    queries = _normalized(new)
+    if index is not None:
+        found = [index.search(query, k=neighbours, nprobe=nprobe) for query in queries]
+        known_ids = np.full((len(new), neighbours), -1, dtype=np.int64)
+        known_scores = np.full((len(new), neighbours), -np.inf, dtype=np.float32)
+        for row, matches in enumerate(found):
+            for column, (face_index, score) in enumerate(matches):
+                known_ids[row, column], known_scores[row, column] = face_index, score
+    else:
+        known_ids, known_scores = _top_k(queries, existing, neighbours)
+
+    sources = np.repeat(np.arange(offset, offset + len(new)), neighbours)
+    targets, weights = known_ids.ravel(), known_scores.ravel()
+    keep = (targets >= 0) & (weights >= threshold)
+    keep[keep] = labels[targets[keep]] >= 0
+    new_sources, new_targets, new_weights = _graph_edges(queries, threshold, neighbours, nprobe)
+    sources = np.concatenate([sources[keep], offset + new_sources, offset + new_targets])
+    targets = np.concatenate([targets[keep], offset + new_targets, offset + new_sources])
+    weights = np.concatenate([weights[keep], new_weights, new_weights])
+    _chinese_whispers(labels, sources, targets, weights, iterations, seed)
+
+    new_labels = labels[offset:]
+    new_indices = np.arange(offset, offset + len(new))
+    by_id = {cluster.cluster_id: cluster for cluster in clusters}
+    joined = new_labels < next_id
+    for label, face_index in zip(new_labels[joined].tolist(), new_indices[joined].tolist()):
+        by_id[label].face_indices.append(face_index)
+    for members in _groups(new_labels[~joined], new_indices[~joined]):
+        clusters.append(ClusterResult(cluster_id=next_id, face_indices=members))
+        next_id += 1
+    return clusters
+
+
+def _as_matrix(embeddings: Iterable[np.ndarray]) -> np.ndarray:
+    if isinstance(embeddings, np.ndarray) and embeddings.ndim == 2:
+        return embeddings
+    vectors = [np.asarray(vector, dtype=np.float32).ravel() for vector in embeddings]
+    return np.stack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+
+
+def _graph_edges(
+    vectors: np.ndarray, threshold: float, neighbours: int, nprobe: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Directed kNN edges `(source, target, similarity)` at or above `threshold`."""
+
+    n_lists = 1 if len(vectors) <= EXACT_GRAPH_LIMIT else None
+    index = IVFIndex.build(np.arange(len(vectors)), vectors, n_lists)
+    ids, targets, weights = index.knn_graph(neighbours, nprobe)
+    del index
+    sources = np.repeat(ids, targets.shape[1])
+    targets, weights = targets.ravel(), weights.ravel()
+    keep = (targets >= 0) & (weights >= threshold)
+    # Node numbers fit in 32 bits; halving the edge arrays matters at 1M faces.
+    return sources[keep].astype(np.int32), targets[keep].astype(np.int32), weights[keep]
+
+
+def _top_k(
+    queries: np.ndarray, vectors: np.ndarray, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Exact top-`k` rows of `vectors` by cosine similarity, scanned in blocks."""
+
+    best_ids = np.full((len(queries), k), -1, dtype=np.int64)
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    block = max(1, _SCORE_BUDGET // len(queries))
+    for start in range(0, len(vectors), block):
+        scores = queries @ _normalized(vectors[start : start + block]).T
+        width = min(k, scores.shape[1])
+        top = np.argpartition(scores, -width, axis=1)[:, -width:]
+        merged_ids = np.concatenate([best_ids, top + start], axis=1)
+        merged_scores = np.concatenate(
+            [best_scores, np.take_along_axis(scores, top, axis=1)], axis=1
+        )
+        keep = np.argpartition(merged_scores, -k, axis=1)[:, -k:]
+        best_ids = np.take_along_axis(merged_ids, keep, axis=1)
+        best_scores = np.take_along_axis(merged_scores, keep, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(best_ids, order, axis=1),
+        np.take_along_axis(best_scores, order, axis=1),
+    )
+
+
+def _chinese_whispers(
+    labels: np.ndarray,
+    sources: np.ndarray,
+    targets: np.ndarray,
+    weights: np.ndarray,
+    iterations: int,
+    seed: int,
+) -> None:
+    """Relabel the sources of the edges in place until no label changes.
+
+    Nodes are split into random batches updated one after another, each
+    batch at once: a node takes the label with the largest summed edge
+    weight among its targets (ties go to the smallest label). Nodes that
+    are never a source keep their labels.
+    """
+
+    if not len(sources):
+        return
+    rng = np.random.default_rng(seed)
+    batch_of_node = rng.integers(0, _UPDATE_BATCHES, len(labels), dtype=np.int8)
+    order = np.argsort(batch_of_node[sources], kind="stable")
+    sources, targets, weights = sources[order], targets[order], weights[order]
+    bounds = np.searchsorted(batch_of_node[sources], np.arange(_UPDATE_BATCHES + 1))
+
+    for _ in range(iterations):
+        changed = 0
+        for batch in rng.permutation(_UPDATE_BATCHES):
+            edges = slice(bounds[batch], bounds[batch + 1])
+            if edges.start == edges.stop:
+                continue
+            span = int(labels.max()) + 1
+            keys, slots = np.unique(
+                sources[edges].astype(np.int64) * span + labels[targets[edges]],
+                return_inverse=True,
+            )
+            totals = np.bincount(slots, weights=weights[edges])
+            nodes, candidates = keys // span, keys % span
+            # Keys are sorted by node, then label: take each node's first best label.
+            starts = np.flatnonzero(np.r_[True, nodes[1:] != nodes[:-1]])
+            best = np.maximum.reduceat(totals, starts)
+            winners = np.flatnonzero(totals == np.repeat(best, np.diff(np.r_[starts, len(nodes)])))
+            runs = np.searchsorted(starts, winners, side="right")
+            winners = winners[np.r_[True, runs[1:] != runs[:-1]]]
+            nodes, candidates = nodes[winners], candidates[winners]
+            changed += int(np.count_nonzero(labels[nodes] != candidates))
+            labels[nodes] = candidates
+        if not changed:
+            break
+
+
+def _groups(labels: np.ndarray, members: np.ndarray) -> List[List[int]]:
+    """Members grouped by label, largest group first (ties by first member)."""
+
+    if not len(labels):
+        return []
+    order = np.argsort(labels, kind="stable")
+    labels, members = labels[order], members[order]
+    starts = np.flatnonzero(labels[1:] != labels[:-1]) + 1
+    groups = [chunk.tolist() for chunk in np.split(members, starts)]
+    groups.sort(key=lambda group: (-len(group), group[0]))
+    return groups
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, np.finfo(np.float32).tiny)
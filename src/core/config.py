@@ -7,7 +7,7 @@ from types import SimpleNamespace
 from typing import Any, Dict
 
 import yaml
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 
 
 class FaceRecognitionConfig(BaseModel):
@@ -15,12 +15,81 @@ class FaceRecognitionConfig(BaseModel):
 
     enabled: bool = Field(default=False)
     model_dir: Path = Field(..., description="Directory containing face recognition models")
+    # Inverted lists scanned per similarity query; higher is slower but finds more matches.
+    ann_nprobe: int = Field(default=32, ge=1)
+    # Inference threads, each holding its own detector and recognizer sessions.
+    workers: int = Field(default=2, ge=1)
+    decode_workers: int = Field(default=2, ge=1)
+    # Aligned face crops embedded per inference call.
+    batch_size: int = Field(default=32, ge=1)
+    # ONNX Runtime threads per session; 0 splits the CPU cores between workers.
+    intra_op_threads: int = Field(default=0, ge=0)
+    inter_op_threads: int = Field(default=1, ge=1)
+    min_detection_score: float = Field(default=0.5, ge=0.0, le=1.0)
 
 
 class JobsConfig(BaseModel):
     """Settings controlling background job execution."""
 
     max_workers: int = Field(default=4, ge=1)
+    failed_retention_days: int = Field(default=7, ge=0)
+    finished_jobs_kept: int = Field(default=100, ge=0)
+
+
+class DatabaseConfig(BaseModel):
+    """Settings controlling database access and the SQLite performance profile."""
+
+    bulk_chunk_size: int = Field(default=500, ge=1, description="Rows per bulk executemany chunk")
+    journal_mode: str = Field(default="WAL")
+    synchronous: str = Field(default="NORMAL")
+    mmap_size: int = Field(default=256 * 1024 * 1024, ge=0, description="Bytes of the file to mmap")
+    cache_size_kib: int = Field(default=64 * 1024, ge=0, description="Page cache per connection")
+    temp_store: str = Field(default="MEMORY")
+    busy_timeout_ms: int = Field(default=5000, ge=0)
+    pool_size: int = Field(default=5, ge=1, description="Pooled connections (readers plus writer)")
+    max_overflow: int = Field(default=5, ge=0)
+
+    @validator("journal_mode")
+    def _check_journal_mode(cls, value: str) -> str:
+        return _check_choice(value, {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"})
+
+    @validator("synchronous")
+    def _check_synchronous(cls, value: str) -> str:
+        return _check_choice(value, {"OFF", "NORMAL", "FULL", "EXTRA"})
+
+    @validator("temp_store")
+    def _check_temp_store(cls, value: str) -> str:
+        return _check_choice(value, {"DEFAULT", "FILE", "MEMORY"})
+
+
+def _check_choice(value: str, choices: set[str]) -> str:
+    normalized = str(value).upper()
+    if normalized not in choices:
+        raise ValueError(f"must be one of {sorted(choices)}")
+    return normalized
+
+
+class ThumbnailConfig(BaseModel):
+    """Settings controlling thumbnail generation."""
+
+    jpeg_draft_mode: bool = Field(
+        default=True,
+        description="Decode JPEGs at a reduced DCT scale that still covers the largest thumb size",
+    )
+    memory_cache_mb: int = Field(default=64, ge=0, description="Encoded thumbnails kept in memory")
+    disk_cache_mb: int = Field(default=2048, ge=0, description="Size limit of cache_dir/thumbs")
+    max_age_days: int = Field(
+        default=180, ge=0, description="Evict thumbnails unused this long; 0 keeps them"
+    )
+    store: str = Field(default="files", description="'files' (one JPEG per size) or 'packed'")
+    pack_size_mb: int = Field(default=256, ge=1, description="Size at which a new pack file starts")
+
+    @validator("store")
+    def _check_store(cls, value: str) -> str:
+        normalized = str(value).lower()
+        if normalized not in {"files", "packed"}:
+            raise ValueError("must be one of ['files', 'packed']")
+        return normalized
 
 
 class AppConfig(BaseModel):
@@ -33,6 +102,8 @@ class AppConfig(BaseModel):
     supported_extensions: list[str]
     face_recognition: FaceRecognitionConfig
     jobs: JobsConfig
+    database: DatabaseConfig = Field(default_factory=DatabaseConfig)
+    thumbnails: ThumbnailConfig = Field(default_factory=ThumbnailConfig)
 
     class Config:
         arbitrary_types_allowed = True
@@ -117,6 +188,8 @@ def load_config(repo_root: Path | None = None) -> AppConfig:
 
     face_raw = merged.get("face_recognition", {})
     jobs_raw = merged.get("jobs", {})
+    database_raw = merged.get("database", {})
+    thumbnails_raw = merged.get("thumbnails", {})
 
     return AppConfig(
         database_path=_resolve_path(merged.get("database_path", "data/photos.db"), repo_root),
@@ -125,10 +198,17 @@ def load_config(repo_root: Path | None = None) -> AppConfig:
         thumb_sizes=dict(merged.get("thumb_sizes", {})),
         supported_extensions=list(merged.get("supported_extensions", [])),
         face_recognition=FaceRecognitionConfig(
-            enabled=bool(face_raw.get("enabled", False)),
-            model_dir=_resolve_path(face_raw.get("model_dir", "data/models/insightface"), repo_root),
+            **{
+                **face_raw,
+                "enabled": bool(face_raw.get("enabled", False)),
+                "model_dir": _resolve_path(
+                    face_raw.get("model_dir", "data/models/insightface"), repo_root
+                ),
+            }
         ),
-        jobs=JobsConfig(max_workers=int(jobs_raw.get("max_workers", 4))),
+        jobs=JobsConfig(**jobs_raw),
+        database=DatabaseConfig(**database_raw),
+        thumbnails=ThumbnailConfig(**thumbnails_raw),
     )
 
 
@@ -5,11 +5,13 @@ from contextlib import contextmanager
 from pathlib import Path
 from typing import Iterator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from .config import Config as AppConfig
+from .config import DatabaseConfig
 
 
 class Base(DeclarativeBase):
@@ -20,15 +22,58 @@ engine: Engine | None = None
 SessionLocal: sessionmaker[Session] | None = None
 
 
+@event.listens_for(Base.metadata, "after_create")
+def _install_search_index(_metadata, connection, **_kwargs) -> None:
+    """Create the FTS5 search table and triggers alongside the ORM tables."""
+    from .fts import install_search_index
+
+    install_search_index(connection)
+
+
 def _ensure_database_path(app_config: AppConfig) -> Path:
     database_path = Path(app_config.database_path)
     database_path.parent.mkdir(parents=True, exist_ok=True)
     return database_path
 
 
-def _build_engine(database_path: Path) -> Engine:
+def _sqlite_pragmas(db_config: DatabaseConfig) -> list[str]:
+    return [
+        f"PRAGMA journal_mode={db_config.journal_mode}",
+        f"PRAGMA synchronous={db_config.synchronous}",
+        f"PRAGMA mmap_size={db_config.mmap_size}",
+        f"PRAGMA cache_size=-{db_config.cache_size_kib}",
+        f"PRAGMA temp_store={db_config.temp_store}",
+        f"PRAGMA busy_timeout={db_config.busy_timeout_ms}",
+    ]
+
+
+def _build_engine(database_path: Path, db_config: DatabaseConfig | None = None) -> Engine:
+    db_config = db_config or DatabaseConfig()
     database_url = f"sqlite+pysqlite:///{database_path}"
-    return create_engine(database_url, echo=False, future=True)
+    target_engine = create_engine(
+        database_url,
+        echo=False,
+        future=True,
+        poolclass=QueuePool,
+        pool_size=db_config.pool_size,
+        max_overflow=db_config.max_overflow,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": db_config.busy_timeout_ms / 1000,
+        },
+    )
+    pragmas = _sqlite_pragmas(db_config)
+
+    @event.listens_for(target_engine, "connect")
+    def _apply_pragmas(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return target_engine
 
 
 def configure_engine(app_config: AppConfig) -> Engine:
@@ -38,7 +83,7 @@ def configure_engine(app_config: AppConfig) -> Engine:
         return engine
 
     database_path = _ensure_database_path(app_config)
-    engine = _build_engine(database_path)
+    engine = _build_engine(database_path, app_config.database)
     return engine
 
 
@@ -69,9 +114,39 @@ def get_session() -> Iterator[Session]:
         session.close()
 
 
+def _create_missing_indexes(target_engine: Engine) -> None:
+    """Create indexes added to models after their tables were first created."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(target_engine, checkfirst=True)
+
+
+def _add_missing_columns(target_engine: Engine) -> None:
+    """Add nullable columns added to models after their tables were first created."""
+    inspector = inspect(target_engine)
+    with target_engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable:
+                    raise RuntimeError(
+                        f"Cannot add NOT NULL column {table.name}.{column.name} automatically"
+                    )
+                column_type = column.type.compile(dialect=target_engine.dialect)
+                connection.exec_driver_sql(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                )
+
+
 def init_database(app_config: AppConfig) -> Engine:
     """Initialize the database engine, session factory, and create tables."""
+    from . import models  # noqa: F401  # register ORM tables on Base.metadata
+
     target_engine = configure_engine(app_config)
     configure_session_factory(target_engine)
     Base.metadata.create_all(target_engine)
+    _add_missing_columns(target_engine)
+    _create_missing_indexes(target_engine)
     return target_engine
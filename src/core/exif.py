@@ -130,14 +130,19 @@ def _convert_gps_coord(coords: Any, ref: Any) -> float | None:
 def extract_exif(path: Path) -> dict[str, Any]:
     """Extract and normalize EXIF data from an image file."""
 
-    normalized: dict[str, Any] = {key: None for key in _NORMALIZED_KEYS}
     try:
         with Image.open(path) as img:
-            raw_exif = img.getexif()
-            exif_data = _decode_exif(raw_exif)
+            return extract_exif_from_image(img)
     except (FileNotFoundError, UnidentifiedImageError, OSError):
         logging.warning("Unable to open image for EXIF extraction: %s", path, exc_info=True)
-        return normalized
+        return {key: None for key in _NORMALIZED_KEYS}
+
+
+def extract_exif_from_image(img: Image.Image) -> dict[str, Any]:
+    """Normalize EXIF data from an already opened image without decoding pixels."""
+
+    normalized: dict[str, Any] = {key: None for key in _NORMALIZED_KEYS}
+    exif_data = _decode_exif(img.getexif())
 
     normalized["camera_make"] = _first_existing(exif_data, ["Make"])
     normalized["camera_model"] = _first_existing(exif_data, ["Model"])
@@ -158,12 +163,21 @@ def extract_exif(path: Path) -> dict[str, Any]:
     return normalized
 
 
-def guess_taken_at(path: Path, exif_data: dict[str, Any]) -> datetime | None:
-    """Guess when a photo was taken using EXIF data or file metadata."""
+def parse_taken_at(exif_data: dict[str, Any]) -> datetime | None:
+    """Return the capture time recorded in normalized EXIF data, if any."""
 
     original_dt = exif_data.get("original_datetime")
     if isinstance(original_dt, datetime):
         return original_dt
+    return None
+
+
+def guess_taken_at(path: Path, exif_data: dict[str, Any]) -> datetime | None:
+    """Guess when a photo was taken using EXIF data or file metadata."""
+
+    original_dt = parse_taken_at(exif_data)
+    if original_dt is not None:
+        return original_dt
 
     try:
         timestamp = path.stat().st_mtime
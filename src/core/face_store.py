@@ -0,0 +1,285 @@
+"""Persistent face store: face metadata in SQLite, embeddings in one memory-mapped matrix."""
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+from numpy.lib import format as npy_format
+from sqlalchemy import delete, false, func, select
+from sqlalchemy.orm import Session
+
+from .config import AppConfig
+from .faces import DetectedFace
+from .models import Face
+
+
+EMBEDDING_DIM = 512
+EMBEDDINGS_FILENAME = "face_embeddings.npy"
+
+_MIN_CAPACITY = 1024
+_LOOKUP_CHUNK = 500
+# Header size of a new matrix file; leaves room to rewrite any row count in place.
+_HEADER_LENGTH = 128
+
+
+def embeddings_path(config: AppConfig) -> Path:
+    """Location of the embedding matrix, next to the database."""
+
+    return Path(config.database_path).parent / EMBEDDINGS_FILENAME
+
+
+class EmbeddingMatrix:
+    """Growable float32 matrix stored as a memory-mapped `.npy` file.
+
+    The file holds `capacity` rows; the first `rows` are in use. Capacity
+    doubles when full by rewriting the shape in the header and extending
+    the file in place, so appends are amortized O(1) and other matrices
+    open on the same file keep mapping it rather than a replaced copy.
+    """
+
+    def __init__(self, path: Path, dim: int = EMBEDDING_DIM, rows: int = 0) -> None:
+        self.path = Path(path)
+        self.dim = dim
+        self.rows = rows
+        self._matrix: np.memmap | None = None
+        if self.path.exists():
+            self._matrix = np.load(self.path, mmap_mode="r+")
+            if self._matrix.ndim != 2 or self._matrix.shape[1] != dim:
+                raise ValueError(
+                    f"{self.path} holds {self._matrix.shape} embeddings, expected (*, {dim})"
+                )
+            if rows > self._matrix.shape[0]:
+                raise ValueError(f"{self.path} has fewer than {rows} rows")
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._matrix is None else self._matrix.shape[0]
+
+    @property
+    def view(self) -> np.ndarray:
+        """The rows in use; a view into the memory map, not a copy."""
+
+        if self._matrix is None:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return self._matrix[: self.rows]
+
+    def append(self, vectors: np.ndarray) -> range:
+        """Write `vectors` after the last used row and return their row numbers."""
+
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        start = self.rows
+        end = start + len(vectors)
+        if end > self.capacity:
+            self._grow(max(end, 2 * self.capacity, _MIN_CAPACITY))
+        self._mapped[start:end] = vectors
+        self.rows = end
+        return range(start, end)
+
+    def write(self, rows: Sequence[int], vectors: np.ndarray) -> None:
+        self._mapped[np.asarray(rows, dtype=np.int64)] = vectors
+
+    def flush(self) -> None:
+        if self._matrix is not None:
+            self._matrix.flush()
+
+    @property
+    def _mapped(self) -> np.memmap:
+        if self._matrix is None:
+            raise ValueError(f"{self.path} has no rows yet")
+        return self._matrix
+
+    def _grow(self, capacity: int) -> None:
+        """Extend the file to at least `capacity` rows and map it again.
+
+        Another matrix on the same file may have grown it further already,
+        so the file never shrinks.
+        """
+
+        self.flush()
+        self._matrix = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            _resize(self.path, capacity, self.dim)
+        else:
+            with open(self.path, "wb") as handle:
+                _write_header(handle, (1, 0), _HEADER_LENGTH, (capacity, self.dim))
+                handle.truncate(_HEADER_LENGTH + capacity * self.dim * 4)
+        self._matrix = np.load(self.path, mmap_mode="r+")
+
+
+def _resize(path: Path, rows: int, dim: int) -> None:
+    """Set the row count of a float32 `.npy` matrix in place; new rows read as zeros."""
+
+    with open(path, "r+b") as handle:
+        version = npy_format.read_magic(handle)
+        if version == (1, 0):
+            shape, _, _ = npy_format.read_array_header_1_0(handle)
+        else:
+            shape, _, _ = npy_format.read_array_header_2_0(handle)
+        offset = handle.tell()
+        rows = max(rows, shape[0])
+        _write_header(handle, version, offset, (rows, dim))
+        handle.truncate(offset + rows * dim * 4)
+
+
+def _write_header(handle, version: tuple[int, int], length: int, shape: tuple[int, int]) -> None:
+    """Write a `.npy` header of exactly `length` bytes at the start of the file."""
+
+    text = repr({"descr": "<f4", "fortran_order": False, "shape": shape}).encode("latin1")
+    size_bytes = 2 if version == (1, 0) else 4
+    padding = length - len(npy_format.MAGIC_PREFIX) - 2 - size_bytes - len(text) - 1
+    if padding < 0:
+        raise ValueError(f"{handle.name} has no room in its header for shape {shape}")
+    header = text + b" " * padding + b"\n"
+    handle.seek(0)
+    handle.write(npy_format.MAGIC_PREFIX + bytes(version))
+    handle.write(len(header).to_bytes(size_bytes, "little") + header)
+
+
+class FaceStore:
+    """Faces and their embeddings, searchable with one matrix-vector product.
+
+    Embeddings are L2-normalized on insert, so the dot product with a
+    normalized query is the cosine similarity, and a query over every face
+    is a single BLAS call on the memory map. Each `Face` row records its
+    `embedding_row`; rows of deleted faces are zeroed and skipped.
+
+    New rows are claimed inside the caller's write transaction: SQLite's
+    write lock is taken before the last used row is read again, so stores
+    in other threads or processes cannot hand out the same rows until the
+    transaction ends, and rows written by one that rolled back are reused.
+    """
+
+    def __init__(self, path: Path, session: Session, dim: int = EMBEDDING_DIM) -> None:
+        last_row = session.scalar(select(func.max(Face.embedding_row)))
+        rows = 0 if last_row is None else last_row + 1
+        self._lock = threading.RLock()
+        self.matrix = EmbeddingMatrix(path, dim, rows)
+        self._face_ids = np.full(max(rows, 1), -1, dtype=np.int64)
+        for face_id, row in session.execute(select(Face.id, Face.embedding_row)):
+            self._face_ids[row] = face_id
+
+    @classmethod
+    def open(cls, config: AppConfig, session: Session) -> "FaceStore":
+        return cls(embeddings_path(config), session)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._face_ids[: self.matrix.rows] >= 0))
+
+    def live(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return `(face_ids, rows)` of every stored face, in row order."""
+
+        with self._lock:
+            face_ids = self._face_ids[: self.matrix.rows]
+            rows = np.flatnonzero(face_ids >= 0)
+            return face_ids[rows].copy(), rows
+
+    def add_faces(
+        self, session: Session, photo_id: int, detections: Iterable[DetectedFace]
+    ) -> list[Face]:
+        """Store detected faces of one photo; the caller commits the session."""
+
+        return self.add_photo_faces(session, [(photo_id, detections)])
+
+    def add_photo_faces(
+        self, session: Session, items: Iterable[tuple[int, Iterable[DetectedFace]]]
+    ) -> list[Face]:
+        """Store the faces of many photos with one matrix append and one flush.
+
+        The caller commits the session.
+        """
+
+        pairs = [(photo_id, face) for photo_id, faces in items for face in faces]
+        if not pairs:
+            return []
+        vectors = _normalize(np.stack([face.embedding for _, face in pairs]))
+        with self._lock:
+            self.matrix.rows = self._next_row(session)
+            rows = self.matrix.append(vectors)
+            self.matrix.flush()
+            faces = [
+                Face(
+                    photo_id=photo_id,
+                    embedding_row=row,
+                    bbox_x=int(face.bbox[0]),
+                    bbox_y=int(face.bbox[1]),
+                    bbox_w=int(face.bbox[2]),
+                    bbox_h=int(face.bbox[3]),
+                    quality=float(face.quality),
+                )
+                for row, (photo_id, face) in zip(rows, pairs)
+            ]
+            session.add_all(faces)
+            session.flush()
+            self._track(rows, [face.id for face in faces])
+        return faces
+
+    def remove_faces(self, session: Session, face_ids: Iterable[int]) -> int:
+        """Delete faces and zero their embedding rows; the caller commits the session."""
+
+        face_ids = list(face_ids)
+        if not face_ids:
+            return 0
+        rows = list(
+            session.scalars(select(Face.embedding_row).where(Face.id.in_(face_ids)))
+        )
+        session.execute(delete(Face).where(Face.id.in_(face_ids)))
+        with self._lock:
+            self.matrix.write(rows, np.zeros((len(rows), self.matrix.dim), dtype=np.float32))
+            self.matrix.flush()
+            self._face_ids[rows] = -1
+        return len(rows)
+
+    def embeddings(self, session: Session, face_ids: Sequence[int]) -> np.ndarray:
+        """Return copies of the stored (normalized) embeddings of the given faces, in order."""
+
+        rows_by_id: dict[int, int] = {}
+        ids = list(face_ids)
+        for start in range(0, len(ids), _LOOKUP_CHUNK):
+            stmt = select(Face.id, Face.embedding_row).where(
+                Face.id.in_(ids[start : start + _LOOKUP_CHUNK])
+            )
+            rows_by_id.update((face_id, row) for face_id, row in session.execute(stmt))
+        rows = [rows_by_id[face_id] for face_id in ids]
+        with self._lock:
+            return np.array(self.matrix.view[rows], dtype=np.float32).reshape(-1, self.matrix.dim)
+
+    def similar(
+        self, embedding: np.ndarray, top_k: int = 10, min_similarity: float = -1.0
+    ) -> list[tuple[int, float]]:
+        """Return up to `top_k` `(face_id, cosine similarity)` pairs, most similar first."""
+
+        query = _normalize(np.asarray(embedding, dtype=np.float32).reshape(1, -1))[0]
+        with self._lock:
+            scores = self.matrix.view @ query
+            face_ids = self._face_ids[: self.matrix.rows].copy()
+        candidates = np.flatnonzero((face_ids >= 0) & (scores >= min_similarity))
+        if len(candidates) > top_k:
+            best = np.argpartition(scores[candidates], -top_k)[-top_k:]
+            candidates = candidates[best]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(face_ids[row]), float(scores[row])) for row in candidates]
+
+    def _next_row(self, session: Session) -> int:
+        """Take the database write lock, then return the row after the last one in use."""
+
+        # A write that matches nothing still makes SQLite take its write lock,
+        # which is held until the caller commits or rolls back.
+        session.execute(delete(Face).where(false()))
+        last_row = session.scalar(select(func.max(Face.embedding_row)))
+        return 0 if last_row is None else last_row + 1
+
+    def _track(self, rows: range, face_ids: list[int]) -> None:
+        if rows.stop > len(self._face_ids):
+            grown = np.full(max(rows.stop, 2 * len(self._face_ids)), -1, dtype=np.int64)
+            grown[: len(self._face_ids)] = self._face_ids
+            self._face_ids = grown
+        self._face_ids[rows.start : rows.stop] = face_ids
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, np.finfo(np.float32).tiny)
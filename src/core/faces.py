@@ -1,28 +1,247 @@
 """Face detection and embedding utilities."""
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Any, List, Sequence
 
 import numpy as np
+from PIL import Image, ImageOps
+
+
+DETECTOR_MODEL = "det_10g.onnx"
+RECOGNIZER_MODEL = "w600k_r50.onnx"
+# Images are decoded (with JPEG draft mode) to at most this size before detection.
+DECODE_MAX_SIDE = 1280
+DETECTION_SIZE = 640
+ALIGNED_SIZE = 112
+
+# Landmark positions (eyes, nose, mouth corners) of the 112x112 ArcFace crop.
+_ARCFACE_LANDMARKS = np.array(
+    [
+        [38.2946, 51.6963],
+        [73.5318, 51.5014],
+        [56.0252, 71.7366],
+        [41.5493, 92.3655],
+        [70.7299, 92.2041],
+    ],
+    dtype=np.float32,
+)
+_DETECTOR_STRIDES = (8, 16, 32)
+_ANCHORS_PER_CELL = 2
+_NMS_THRESHOLD = 0.4
 
 
 @dataclass
 class DetectedFace:
+    # (x, y, width, height) in pixels of the original image
     bbox: tuple[int, int, int, int]
     quality: float
     embedding: np.ndarray
 
 
+@dataclass
+class DecodedImage:
+    """RGB pixels of an upright image and the factor back to original pixels."""
+
+    pixels: np.ndarray
+    scale: float
+
+
+@dataclass
+class FaceDetection:
+    """A face found by the detector, in `DecodedImage` pixels."""
+
+    # (x1, y1, x2, y2)
+    box: np.ndarray
+    score: float
+    # (5, 2): left eye, right eye, nose, left and right mouth corners
+    landmarks: np.ndarray
+
+    def to_detected_face(self, scale: float, embedding: np.ndarray) -> DetectedFace:
+        x1, y1, x2, y2 = (float(value) * scale for value in self.box)
+        bbox = (round(x1), round(y1), round(x2 - x1), round(y2 - y1))
+        return DetectedFace(bbox=bbox, quality=self.score, embedding=embedding)
+
+
+def decode_image(image_path: Path, max_side: int = DECODE_MAX_SIDE) -> DecodedImage:
+    """Decode an image upright as RGB, letting JPEG draft mode skip detail above `max_side`."""
+
+    with Image.open(image_path) as image:
+        original = max(image.size)
+        if image.format == "JPEG":
+            image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((max_side, max_side), reducing_gap=None)
+        return DecodedImage(pixels=np.asarray(image), scale=original / max(image.size))
+
+
 class FaceEmbedder:
-    """Thin wrapper around an InsightFace model."""
+    """InsightFace SCRFD detector and ArcFace recognizer run with ONNX Runtime on CPU.
+
+    `model_path` is the model directory, or the recognizer model inside it;
+    the detector is `DETECTOR_MODEL` in the same directory. Sessions are
+    created on first use and reused for every call, so keep one embedder
+    per worker thread. Thread counts of 0 leave the choice to ONNX Runtime.
+    """
 
-    def __init__(self, model_path: Path):
+    def __init__(
+        self,
+        model_path: Path,
+        *,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 1,
+        min_score: float = 0.5,
+    ):
         self.model_path = model_path
-        # Lazy load real model later
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.min_score = min_score
+        self._lock = threading.Lock()
+        self._detector: Any = None
+        self._recognizer: Any = None
+
+    @property
+    def model_dir(self) -> Path:
+        path = Path(self.model_path)
+        return path.parent if path.suffix == ".onnx" else path
+
+    def detect(self, image: DecodedImage) -> List[FaceDetection]:
+        """Find faces scoring at least `min_score`, best first."""
+
+        detector = self._sessions()[0]
+        pixels = image.pixels
+        det_scale = DETECTION_SIZE / max(pixels.shape[:2])
+        height = round(pixels.shape[0] * det_scale)
+        width = round(pixels.shape[1] * det_scale)
+        resized = Image.fromarray(pixels).resize((width, height), Image.BILINEAR)
+        canvas = np.zeros((DETECTION_SIZE, DETECTION_SIZE, 3), dtype=np.float32)
+        canvas[:height, :width] = np.asarray(resized, dtype=np.float32)
+        blob = ((canvas - 127.5) / 128.0).transpose(2, 0, 1)[None]
+
+        outputs = detector.run(None, {detector.get_inputs()[0].name: blob})
+        levels = len(_DETECTOR_STRIDES)
+        boxes, scores, landmarks = [], [], []
+        for level, stride in enumerate(_DETECTOR_STRIDES):
+            level_scores = _squeeze_batch(outputs[level]).reshape(-1)
+            keep = np.flatnonzero(level_scores >= self.min_score)
+            if not len(keep):
+                continue
+            centres = _anchor_centres(stride)[keep]
+            distances = _squeeze_batch(outputs[level + levels])[keep] * stride
+            points = _squeeze_batch(outputs[level + 2 * levels])[keep] * stride
+            boxes.append(np.hstack([centres - distances[:, :2], centres + distances[:, 2:]]))
+            landmarks.append(points.reshape(-1, 5, 2) + centres[:, None, :])
+            scores.append(level_scores[keep])
+        if not boxes:
+            return []
+
+        boxes = np.vstack(boxes) / det_scale
+        landmarks = np.vstack(landmarks) / det_scale
+        scores = np.concatenate(scores)
+        return [
+            FaceDetection(box=boxes[i], score=float(scores[i]), landmarks=landmarks[i])
+            for i in _non_maximum_suppression(boxes, scores, _NMS_THRESHOLD)
+        ]
+
+    def align(self, image: DecodedImage, detection: FaceDetection) -> np.ndarray:
+        """Warp a face onto the ArcFace landmark template as a 112x112 RGB crop."""
+
+        inverse = _similarity_transform(_ARCFACE_LANDMARKS, detection.landmarks)
+        crop = Image.fromarray(image.pixels).transform(
+            (ALIGNED_SIZE, ALIGNED_SIZE),
+            Image.AFFINE,
+            tuple(inverse[:2].ravel()),
+            resample=Image.BILINEAR,
+        )
+        return np.asarray(crop)
+
+    def embed(self, crops: Sequence[np.ndarray] | np.ndarray) -> np.ndarray:
+        """Embed aligned crops with one inference call; returns an `(n, 512)` matrix."""
+
+        recognizer = self._sessions()[1]
+        batch = np.asarray(crops, dtype=np.float32).reshape(-1, ALIGNED_SIZE, ALIGNED_SIZE, 3)
+        blob = ((batch - 127.5) / 127.5).transpose(0, 3, 1, 2)
+        return recognizer.run(None, {recognizer.get_inputs()[0].name: blob})[0]
 
     def detect_and_embed(self, image_path: Path) -> List[DetectedFace]:
-        # Placeholder for real detection logic
-        _ = image_path
-        return []
+        image = decode_image(image_path)
+        detections = self.detect(image)
+        if not detections:
+            return []
+        embeddings = self.embed([self.align(image, detection) for detection in detections])
+        return [
+            detection.to_detected_face(image.scale, embedding)
+            for detection, embedding in zip(detections, embeddings)
+        ]
+
+    def _sessions(self) -> tuple[Any, Any]:
+        with self._lock:
+            if self._detector is None:
+                self._detector = self._load(self.model_dir / DETECTOR_MODEL)
+                self._recognizer = self._load(self.model_dir / RECOGNIZER_MODEL)
+            return self._detector, self._recognizer
+
+    def _load(self, path: Path) -> Any:
+        try:
+            import onnxruntime
+        except ImportError as exc:
+            raise RuntimeError("Face recognition requires the `onnxruntime` package") from exc
+        if not path.exists():
+            raise RuntimeError(f"Face model not found: {path}")
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return onnxruntime.InferenceSession(
+            str(path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+
+def _squeeze_batch(output: np.ndarray) -> np.ndarray:
+    return output[0] if output.ndim == 3 else output
+
+
+def _anchor_centres(stride: int) -> np.ndarray:
+    cells = DETECTION_SIZE // stride
+    rows, columns = np.mgrid[:cells, :cells]
+    centres = np.stack([columns, rows], axis=-1).reshape(-1, 2).astype(np.float32) * stride
+    return np.repeat(centres, _ANCHORS_PER_CELL, axis=0)
+
+
+def _non_maximum_suppression(
+    boxes: np.ndarray, scores: np.ndarray, threshold: float
+) -> list[int]:
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1 + 1) * (y2 - y1 + 1)
+    order = np.argsort(-scores)
+    kept: list[int] = []
+    while len(order):
+        best, rest = order[0], order[1:]
+        kept.append(int(best))
+        width = np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]) + 1
+        height = np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]) + 1
+        intersection = np.maximum(width, 0.0) * np.maximum(height, 0.0)
+        overlap = intersection / (areas[best] + areas[rest] - intersection)
+        order = rest[overlap <= threshold]
+    return kept
+
+
+def _similarity_transform(source: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """Least-squares similarity transform (Umeyama) mapping `source` points onto `target`."""
+
+    source_mean, target_mean = source.mean(axis=0), target.mean(axis=0)
+    source_centred, target_centred = source - source_mean, target - target_mean
+    covariance = target_centred.T @ source_centred / len(source)
+    u, singular, vt = np.linalg.svd(covariance)
+    sign = np.eye(2)
+    if np.linalg.det(u) * np.linalg.det(vt) < 0:
+        sign[1, 1] = -1
+    rotation = u @ sign @ vt
+    scale = np.trace(np.diag(singular) @ sign) / source_centred.var(axis=0).sum()
+    matrix = np.eye(3)
+    matrix[:2, :2] = scale * rotation
+    matrix[:2, 2] = target_mean - scale * rotation @ source_mean
+    return matrix
@@ -0,0 +1,118 @@
+"""SQLite FTS5 index over photo filenames, paths, tags and camera metadata.
+
+The `photo_search` table holds one document per photo (rowid = photos.id)
+and is kept current by triggers on the tables it draws from, so every write
+path - ORM, bulk Core statements or raw SQL - stays in sync.
+"""
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+
+FTS_TABLE = "photo_search"
+
+_CREATE_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    filename,
+    relative_path,
+    tags,
+    camera_make,
+    camera_model,
+    lens_model,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+_DOCUMENT_SELECT = f"""
+INSERT INTO {FTS_TABLE} (
+    rowid, filename, relative_path, tags, camera_make, camera_model, lens_model
+)
+SELECT
+    p.id,
+    p.filename,
+    p.relative_path,
+    (
+        SELECT group_concat(t.name, ' ')
+        FROM photo_tags AS pt JOIN tags AS t ON t.id = pt.tag_id
+        WHERE pt.photo_id = p.id
+    ),
+    e.camera_make,
+    e.camera_model,
+    e.lens_model
+FROM photos AS p LEFT JOIN exif_data AS e ON e.photo_id = p.id
+"""
+
+
+def _refresh(photo_id_sql: str) -> str:
+    return (
+        f"DELETE FROM {FTS_TABLE} WHERE rowid = {photo_id_sql};\n"
+        f"{_DOCUMENT_SELECT} WHERE p.id = {photo_id_sql};"
+    )
+
+
+def _refresh_tag(tag_id_sql: str) -> str:
+    photo_ids = f"(SELECT photo_id FROM photo_tags WHERE tag_id = {tag_id_sql})"
+    return (
+        f"DELETE FROM {FTS_TABLE} WHERE rowid IN {photo_ids};\n"
+        f"{_DOCUMENT_SELECT} WHERE p.id IN {photo_ids};"
+    )
+
+
+_TRIGGERS = {
+    "photo_search_photos_ai": ("AFTER INSERT ON photos", _refresh("NEW.id")),
+    "photo_search_photos_au": (
+        "AFTER UPDATE OF filename, relative_path ON photos",
+        _refresh("NEW.id"),
+    ),
+    "photo_search_photos_ad": (
+        "AFTER DELETE ON photos",
+        f"DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id;",
+    ),
+    "photo_search_exif_ai": ("AFTER INSERT ON exif_data", _refresh("NEW.photo_id")),
+    "photo_search_exif_au": ("AFTER UPDATE ON exif_data", _refresh("NEW.photo_id")),
+    "photo_search_exif_ad": ("AFTER DELETE ON exif_data", _refresh("OLD.photo_id")),
+    "photo_search_photo_tags_ai": ("AFTER INSERT ON photo_tags", _refresh("NEW.photo_id")),
+    "photo_search_photo_tags_ad": ("AFTER DELETE ON photo_tags", _refresh("OLD.photo_id")),
+    "photo_search_tags_au": ("AFTER UPDATE OF name ON tags", _refresh_tag("NEW.id")),
+}
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def install_search_index(connection: Connection) -> None:
+    """Create the FTS table and its sync triggers, populating it when new."""
+
+    existed = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first()
+    connection.exec_driver_sql(_CREATE_TABLE)
+    for name, (event_sql, body) in _TRIGGERS.items():
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {name} {event_sql} BEGIN\n{body}\nEND"
+        )
+    if existed is None:
+        rebuild_search_index(connection)
+
+
+def rebuild_search_index(connection: Connection) -> None:
+    """Regenerate every search document from the source tables."""
+
+    connection.exec_driver_sql(f"DELETE FROM {FTS_TABLE}")
+    connection.exec_driver_sql(_DOCUMENT_SELECT)
+
+
+def build_match_query(search_text: str) -> str | None:
+    """Translate user input into an FTS5 query matching every token as a prefix.
+
+    Returns None when the input has no searchable tokens.
+    """
+
+    tokens = _TOKEN_PATTERN.findall(search_text.lower())
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
@@ -5,6 +5,9 @@ import hashlib
 from pathlib import Path
 
 
+FINGERPRINT_BLOCK_SIZE = 64 * 1024
+
+
 def compute_file_hash(path: Path, chunk_size: int = 1 << 20) -> str:
     """Compute a SHA-256 hash for the given file.
 
@@ -24,6 +27,39 @@ def compute_file_hash(path: Path, chunk_size: int = 1 << 20) -> str:
     return digest.hexdigest()
 
 
+def compute_fingerprint(
+    path: Path, size: int | None = None, block_size: int = FINGERPRINT_BLOCK_SIZE
+) -> str:
+    """Compute a cheap partial fingerprint from the file size and its head and tail blocks.
+
+    Files with different fingerprints certainly differ; files with equal
+    fingerprints only probably match and need `compute_file_hash` to confirm.
+    Files no larger than two blocks are fingerprinted in full.
+
+    Args:
+        path: Path to the file to fingerprint.
+        size: File size in bytes when already known from a stat call.
+        block_size: Number of bytes read from each end of the file.
+
+    Returns:
+        Hexadecimal BLAKE2b digest of the size, head and tail.
+    """
+    if size is None:
+        size = path.stat().st_size
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(size.to_bytes(8, "little"))
+    with path.open("rb") as handle:
+        digest.update(handle.read(block_size))
+        if size > 2 * block_size:
+            handle.seek(size - block_size)
+            digest.update(handle.read(block_size))
+        elif size > block_size:
+            digest.update(handle.read())
+
+    return digest.hexdigest()
+
+
 def files_are_equal(path1: Path, path2: Path) -> bool:
     """Determine whether two files are identical.
 
@@ -3,7 +3,17 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    JSON,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .db import Base
@@ -22,17 +32,88 @@ class Root(Base):
     photos: Mapped[list["Photo"]] = relationship(
         "Photo", back_populates="root", cascade="all, delete-orphan"
     )
+    directories: Mapped[list["ScannedDirectory"]] = relationship(
+        "ScannedDirectory", back_populates="root", cascade="all, delete-orphan"
+    )
+
+
+class ScannedDirectory(Base):
+    """Records the modification time of a directory as of the last scan."""
+
+    __tablename__ = "scanned_directories"
+    __table_args__ = (
+        UniqueConstraint("root_id", "relative_path", name="uq_scanned_directory"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    root_id: Mapped[int] = mapped_column(ForeignKey("roots.id"), nullable=False)
+    relative_path: Mapped[str] = mapped_column(String, nullable=False)
+    mtime_ns: Mapped[int] = mapped_column(Integer, nullable=False)
+    scanned_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+
+    root: Mapped[Root] = relationship("Root", back_populates="directories")
+
+
+class FileHash(Base):
+    """Cached content hashes of a file, valid while its size and mtime are unchanged."""
+
+    __tablename__ = "file_hash_cache"
+
+    path: Mapped[str] = mapped_column(String, primary_key=True)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    mtime_ns: Mapped[int] = mapped_column(Integer, nullable=False)
+    fingerprint: Mapped[str] = mapped_column(String, nullable=False)
+    sha256: Mapped[str | None] = mapped_column(String)
+    hashed_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+
+
+class JobRecord(Base):
+    """Persisted background job, with the checkpoint it resumes from after a restart."""
+
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_priority", "status", "priority", "id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    job_type: Mapped[str] = mapped_column(String, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=50)
+    status: Mapped[str] = mapped_column(String, nullable=False, default="queued")
+    progress: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    message: Mapped[str | None] = mapped_column(String)
+    error: Mapped[str | None] = mapped_column(String)
+    checkpoint: Mapped[dict | None] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime)
 
 
 class Photo(Base):
     """Represents a photo file tracked by the application."""
 
     __tablename__ = "photos"
+    __table_args__ = (
+        Index("ix_photos_root_relative_path", "root_id", "relative_path"),
+        # Each index pairs an equality filter used by query_photos with the
+        # taken_at sort key; SQLite appends the rowid (id), so the full
+        # `taken_at DESC, id DESC` order is read straight from the index.
+        Index("ix_photos_root_taken_at", "root_id", "taken_at"),
+        Index("ix_photos_favorite_taken_at", "favorite", "taken_at"),
+        Index("ix_photos_status_taken_at", "status", "taken_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     root_id: Mapped[int] = mapped_column(ForeignKey("roots.id"), nullable=False, index=True)
     relative_path: Mapped[str] = mapped_column(String, nullable=False)
     filename: Mapped[str] = mapped_column(String, nullable=False)
+    # SHA-256 of the file; set by the duplicate finder, not by scanning or indexing.
     file_hash: Mapped[str | None] = mapped_column(String, index=True)
     filesize: Mapped[int | None] = mapped_column(Integer)
     mtime: Mapped[int | None] = mapped_column(Integer)
@@ -45,9 +126,13 @@ class Photo(Base):
     favorite: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     orientation: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
     thumb_status: Mapped[str] = mapped_column(String, default="none", nullable=False)
+    # 64-bit difference hash of the small thumbnail, stored signed (see core.phash).
+    phash: Mapped[int | None] = mapped_column(Integer)
+    # Set once face detection has run, whether or not it found any faces.
+    faces_indexed_at: Mapped[datetime | None] = mapped_column(DateTime)
 
     root: Mapped[Root] = relationship("Root", back_populates="photos")
-    exif: Mapped["ExifData" | None] = relationship(
+    exif: Mapped["ExifData | None"] = relationship(
         "ExifData", back_populates="photo", cascade="all, delete-orphan", uselist=False
     )
     photo_tags: Mapped[list["PhotoTag"]] = relationship(
@@ -56,6 +141,9 @@ class Photo(Base):
     tags: Mapped[list["Tag"]] = relationship(
         "Tag", secondary="photo_tags", back_populates="photos"
     )
+    faces: Mapped[list["Face"]] = relationship(
+        "Face", back_populates="photo", cascade="all, delete-orphan"
+    )
 
 
 class ExifData(Base):
@@ -100,7 +188,10 @@ class PhotoTag(Base):
     """Association table linking photos to tags."""
 
     __tablename__ = "photo_tags"
-    __table_args__ = (UniqueConstraint("photo_id", "tag_id", name="uq_photo_tag"),)
+    __table_args__ = (
+        UniqueConstraint("photo_id", "tag_id", name="uq_photo_tag"),
+        Index("ix_photo_tags_tag_photo", "tag_id", "photo_id"),
+    )
 
     photo_id: Mapped[int] = mapped_column(
         ForeignKey("photos.id"), primary_key=True, autoincrement=False
@@ -111,3 +202,48 @@ class PhotoTag(Base):
 
     photo: Mapped[Photo] = relationship("Photo", back_populates="photo_tags")
     tag: Mapped[Tag] = relationship("Tag", back_populates="photo_tags")
+
+
+class Person(Base):
+    """A person that detected faces are assigned to."""
+
+    __tablename__ = "persons"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    display_name: Mapped[str | None] = mapped_column(String)
+    merged_into_id: Mapped[int | None] = mapped_column(ForeignKey("persons.id"))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+
+    faces: Mapped[list["Face"]] = relationship("Face", back_populates="person")
+
+
+class Face(Base):
+    """A face detected in a photo.
+
+    The embedding itself lives in row `embedding_row` of the memory-mapped
+    matrix managed by `core.face_store.FaceStore`.
+    """
+
+    __tablename__ = "faces"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    photo_id: Mapped[int] = mapped_column(ForeignKey("photos.id"), nullable=False, index=True)
+    person_id: Mapped[int | None] = mapped_column(ForeignKey("persons.id"), index=True)
+    embedding_row: Mapped[int] = mapped_column(Integer, nullable=False, unique=True)
+    bbox_x: Mapped[int] = mapped_column(Integer, nullable=False)
+    bbox_y: Mapped[int] = mapped_column(Integer, nullable=False)
+    bbox_w: Mapped[int] = mapped_column(Integer, nullable=False)
+    bbox_h: Mapped[int] = mapped_column(Integer, nullable=False)
+    quality: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+
+    photo: Mapped[Photo] = relationship("Photo", back_populates="faces")
+    person: Mapped[Person | None] = relationship("Person", back_populates="faces")
+
+    @property
+    def bbox(self) -> tuple[int, int, int, int]:
+        return (self.bbox_x, self.bbox_y, self.bbox_w, self.bbox_h)
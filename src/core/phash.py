@@ -0,0 +1,159 @@
+"""Perceptual (difference) hashes and near-duplicate search over them.
+
+A dHash is 64 bits describing brightness gradients of an 9x8 greyscale
+thumbnail; visually similar images (re-encodes, resized copies, burst
+shots) differ in only a few bits. Hashes are stored as signed 64-bit
+integers so they fit SQLite's INTEGER type.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+import numpy as np
+from PIL import Image
+
+
+HASH_BITS = 64
+DEFAULT_RADIUS = 4
+
+_MASK = (1 << HASH_BITS) - 1
+_BYTE_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def dhash(image: Image.Image) -> int:
+    """Compute the 64-bit difference hash of an image as a signed integer."""
+
+    pixels = np.asarray(
+        image.convert("L").resize((9, 8), Image.Resampling.BOX), dtype=np.int16
+    )
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return to_signed64(value)
+
+
+def to_signed64(value: int) -> int:
+    value &= _MASK
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def hamming_distance(first: int, second: int) -> int:
+    return ((first ^ second) & _MASK).bit_count()
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _BYTE_POPCOUNT[values.view(np.uint8).reshape(-1, 8)].sum(axis=1, dtype=np.uint8)
+
+
+class PerceptualHashIndex:
+    """In-memory index of photo dHashes supporting Hamming-radius search.
+
+    `similar_to` scans the packed hash array with vectorized XOR/popcount,
+    which takes milliseconds even for 500k photos. `near_duplicate_groups`
+    finds every pair within the radius using multi-index hashing: hashes are
+    split into `radius + 1` disjoint chunks, and by the pigeonhole principle
+    two hashes within the radius agree exactly on at least one chunk. Only
+    pairs sharing a chunk value are compared, instead of all n² pairs.
+    """
+
+    def __init__(self, photo_ids: Sequence[int], hashes: Sequence[int]) -> None:
+        if len(photo_ids) != len(hashes):
+            raise ValueError("photo_ids and hashes must have the same length")
+        self.photo_ids = np.asarray(photo_ids, dtype=np.int64)
+        self.hashes = np.asarray(hashes, dtype=np.int64).view(np.uint64)
+
+    def __len__(self) -> int:
+        return len(self.photo_ids)
+
+    def similar_to(self, phash: int, radius: int = DEFAULT_RADIUS) -> list[tuple[int, int]]:
+        """Return `(photo_id, distance)` within `radius` of `phash`, nearest first."""
+
+        target = np.array([to_signed64(phash)], dtype=np.int64).view(np.uint64)
+        distances = _popcount(self.hashes ^ target)
+        matches = np.flatnonzero(distances <= radius)
+        matches = matches[np.argsort(distances[matches], kind="stable")]
+        return [(int(self.photo_ids[i]), int(distances[i])) for i in matches]
+
+    def near_duplicate_groups(self, radius: int = DEFAULT_RADIUS) -> list[list[int]]:
+        """Group photos connected by chains of hashes within `radius`, largest group first."""
+
+        if not 0 <= radius < HASH_BITS:
+            raise ValueError(f"radius must be between 0 and {HASH_BITS - 1}")
+
+        # Identical hashes are grouped up front, so each chunk bucket holds
+        # distinct hashes and degenerate images (e.g. all black) stay cheap.
+        unique_hashes, inverse = np.unique(self.hashes, return_inverse=True)
+        parents = np.arange(len(unique_hashes))
+
+        for first, second in self._candidate_pairs(unique_hashes, radius):
+            _union_many(parents, first, second)
+
+        roots = _find_all(parents)[inverse.reshape(-1)]
+        order = np.argsort(roots, kind="stable")
+        boundaries = np.flatnonzero(np.diff(roots[order])) + 1
+        groups = [
+            sorted(int(photo_id) for photo_id in self.photo_ids[members])
+            for members in np.split(order, boundaries)
+            if len(members) > 1
+        ]
+        groups.sort(key=lambda group: (-len(group), group[0]))
+        return groups
+
+    @staticmethod
+    def _candidate_pairs(
+        hashes: np.ndarray, radius: int
+    ) -> Iterable[tuple[np.ndarray, np.ndarray]]:
+        """Yield verified `(first, second)` positions within `radius`, one batch at a time."""
+
+        bounds = np.linspace(0, HASH_BITS, radius + 2).astype(int)
+        for low, high in zip(bounds[:-1], bounds[1:]):
+            keys = (hashes >> np.uint64(low)) & np.uint64((1 << int(high - low)) - 1)
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            sorted_hashes = hashes[order]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            sizes = np.diff(np.r_[starts, len(order)])
+            # Number of bucket members after each position in sorted order.
+            following = np.repeat(starts + sizes, sizes) - np.arange(len(order)) - 1
+
+            # Pass `offset` pairs every hash with the one `offset` places later
+            # in its bucket; positions drop out once their bucket is exhausted,
+            # so all passes together touch each in-bucket pair exactly once.
+            active = np.flatnonzero(following > 0)
+            offset = 1
+            while len(active):
+                close = _popcount(sorted_hashes[active] ^ sorted_hashes[active + offset]) <= radius
+                matched = active[close]
+                if len(matched):
+                    yield order[matched], order[matched + offset]
+                offset += 1
+                active = active[following[active] >= offset]
+
+
+def _find_all(parents: np.ndarray) -> np.ndarray:
+    roots = parents.copy()
+    while True:
+        next_roots = roots[roots]
+        if np.array_equal(next_roots, roots):
+            return roots
+        roots = next_roots
+
+
+def _union_many(parents: np.ndarray, first: np.ndarray, second: np.ndarray) -> None:
+    for a, b in zip(first.tolist(), second.tolist()):
+        root_a = _find(parents, a)
+        root_b = _find(parents, b)
+        if root_a != root_b:
+            parents[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def _find(parents: np.ndarray, node: int) -> int:
+    root = node
+    while parents[root] != root:
+        root = parents[root]
+    while parents[node] != root:
+        parents[node], node = root, parents[node]
+    return int(root)
@@ -1,15 +1,78 @@
 """Search query helpers for retrieving photos."""
 from __future__ import annotations
 
+import base64
+import json
+from dataclasses import dataclass
 from datetime import datetime
 
-from sqlalchemy import Select, select
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    column,
+    exists,
+    func,
+    literal_column,
+    select,
+    table,
+    tuple_,
+)
 from sqlalchemy.orm import Session
 
-from .models import Photo, PhotoTag, Tag
+from .fts import FTS_TABLE, build_match_query
+from .models import Photo, PhotoTag
+
+_search_table = table(FTS_TABLE, column("rowid"))
+
+# Full-text matches up to this many photos are fetched by id and sorted
+# directly; broader matches are tested while walking the taken_at index.
+TEXT_MATCH_LIMIT = 2000
+
+
+@dataclass
+class PhotoPage:
+    """One page of keyset-paginated results and the cursor for the next page."""
+
+    photos: list[Photo]
+    next_cursor: str | None
+
+
+def encode_cursor(photo: Photo) -> str:
+    """Encode the sort key of the last photo on a page as an opaque cursor."""
+
+    taken_at = photo.taken_at.isoformat() if photo.taken_at is not None else None
+    payload = json.dumps([taken_at, photo.id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime | None, int]:
+    """Decode a cursor produced by `encode_cursor` into `(taken_at, id)`."""
+
+    try:
+        taken_at, photo_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (datetime.fromisoformat(taken_at) if taken_at is not None else None, int(photo_id))
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Invalid photo cursor: {cursor!r}") from exc
+
+
+def _text_filter(session: Session, text: str) -> ColumnElement[bool]:
+    match_query = build_match_query(text)
+    if match_query is None:
+        return Photo.filename.ilike(f"%{text}%")
+
+    matches = select(_search_table.c.rowid).where(
+        literal_column(FTS_TABLE).op("MATCH")(match_query)
+    )
+    photo_ids = session.scalars(matches.limit(TEXT_MATCH_LIMIT + 1)).all()
+    if len(photo_ids) <= TEXT_MATCH_LIMIT:
+        return Photo.id.in_(photo_ids)
+    # `id + 0` stops the planner from driving the query off the (large) match
+    # list; it walks photos in sort order and probes the materialized matches.
+    return (Photo.id + 0).in_(matches)
 
 
 def _apply_common_filters(
+    session: Session,
     stmt: Select[tuple[Photo]],
     *,
     text: str | None,
@@ -17,9 +80,10 @@ def _apply_common_filters(
     date_to: datetime | None,
     favorites_only: bool,
     root_ids: list[int] | None,
+    status: str | None,
 ) -> Select[tuple[Photo]]:
     if text:
-        stmt = stmt.where(Photo.filename.ilike(f"%{text}%"))
+        stmt = stmt.where(_text_filter(session, text))
 
     if date_from:
         stmt = stmt.where(Photo.taken_at >= date_from)
@@ -31,12 +95,21 @@ def _apply_common_filters(
         stmt = stmt.where(Photo.favorite.is_(True))
 
     if root_ids:
-        stmt = stmt.where(Photo.root_id.in_(root_ids))
+        if len(root_ids) == 1:
+            stmt = stmt.where(Photo.root_id == root_ids[0])
+        else:
+            # An IN list over (root_id, taken_at) would need a temp B-tree to
+            # merge the per-root ranges; `root_id + 0` keeps the planner on the
+            # taken_at order and filters roots as rows stream past.
+            stmt = stmt.where((Photo.root_id + 0).in_(root_ids))
+
+    if status:
+        stmt = stmt.where(Photo.status == status)
 
     return stmt
 
 
-def query_photos(
+def build_photo_query(
     session: Session,
     text: str | None = None,
     tags: list[int] | None = None,
@@ -44,31 +117,142 @@ def query_photos(
     date_to: datetime | None = None,
     favorites_only: bool = False,
     root_ids: list[int] | None = None,
-    limit: int = 200,
-    offset: int = 0,
-) -> list[Photo]:
-    """Return photos matching the provided search parameters."""
+    status: str | None = None,
+) -> Select[tuple[Photo]]:
+    """Build the filtered photo query ordered newest first, without paging.
+
+    A text filter runs its full-text lookup on `session` while building.
+    """
 
     stmt: Select[tuple[Photo]] = select(Photo)
 
     if tags:
-        stmt = (
-            stmt.join(PhotoTag, PhotoTag.photo_id == Photo.id)
-            .join(Tag, Tag.id == PhotoTag.tag_id)
-            .where(Tag.id.in_(tags))
-            .distinct()
+        # A correlated EXISTS probes the photo_tags primary key per photo while
+        # photos are read in taken_at order, so no DISTINCT or sort is needed.
+        stmt = stmt.where(
+            exists().where(PhotoTag.photo_id == Photo.id, PhotoTag.tag_id.in_(tags))
         )
 
     stmt = _apply_common_filters(
+        session,
         stmt,
         text=text,
         date_from=date_from,
         date_to=date_to,
         favorites_only=favorites_only,
         root_ids=root_ids,
+        status=status,
     )
 
-    stmt = stmt.order_by(Photo.taken_at.desc(), Photo.id.desc())
+    return stmt.order_by(Photo.taken_at.desc(), Photo.id.desc())
+
+
+def query_photos(
+    session: Session,
+    text: str | None = None,
+    tags: list[int] | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    favorites_only: bool = False,
+    root_ids: list[int] | None = None,
+    limit: int = 200,
+    offset: int = 0,
+    status: str | None = None,
+) -> list[Photo]:
+    """Return photos matching the provided search parameters."""
+
+    stmt = build_photo_query(
+        session,
+        text=text,
+        tags=tags,
+        date_from=date_from,
+        date_to=date_to,
+        favorites_only=favorites_only,
+        root_ids=root_ids,
+        status=status,
+    )
     stmt = stmt.limit(limit).offset(offset)
 
     return list(session.scalars(stmt).all())
+
+
+def count_photos(
+    session: Session,
+    text: str | None = None,
+    tags: list[int] | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    favorites_only: bool = False,
+    root_ids: list[int] | None = None,
+    status: str | None = None,
+) -> int:
+    """Return the number of photos matching the same filters as `query_photos`."""
+
+    stmt = build_photo_query(
+        session,
+        text=text,
+        tags=tags,
+        date_from=date_from,
+        date_to=date_to,
+        favorites_only=favorites_only,
+        root_ids=root_ids,
+        status=status,
+    )
+    count_stmt = stmt.order_by(None).with_only_columns(func.count(), maintain_column_froms=True)
+    return session.scalar(count_stmt) or 0
+
+
+def query_photos_page(
+    session: Session,
+    cursor: str | None = None,
+    limit: int = 200,
+    text: str | None = None,
+    tags: list[int] | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    favorites_only: bool = False,
+    root_ids: list[int] | None = None,
+    status: str | None = None,
+) -> PhotoPage:
+    """Return the page of photos after `cursor` using keyset (seek) pagination.
+
+    Pages follow the same `taken_at DESC, id DESC` order as `query_photos`, but
+    each page starts with an index seek past the previous page's last row, so
+    fetching page 2000 costs the same as fetching page 1. Photos without a
+    `taken_at` sort last and are paged by id once the dated photos run out.
+    """
+
+    stmt = build_photo_query(
+        session,
+        text=text,
+        tags=tags,
+        date_from=date_from,
+        date_to=date_to,
+        favorites_only=favorites_only,
+        root_ids=root_ids,
+        status=status,
+    )
+
+    def _fetch(page_stmt: Select[tuple[Photo]], count: int) -> list[Photo]:
+        return list(session.scalars(page_stmt.limit(count)).all())
+
+    if cursor is None:
+        photos = _fetch(stmt, limit + 1)
+    else:
+        after_taken_at, after_id = decode_cursor(cursor)
+        if after_taken_at is None:
+            photos = _fetch(stmt.where(Photo.taken_at.is_(None), Photo.id < after_id), limit + 1)
+        else:
+            # Row values compare as NULL against undated photos, so they are
+            # fetched separately once the dated range is exhausted (a date
+            # filter excludes them anyway).
+            photos = _fetch(
+                stmt.where(tuple_(Photo.taken_at, Photo.id) < (after_taken_at, after_id)),
+                limit + 1,
+            )
+            if len(photos) <= limit and date_from is None and date_to is None:
+                photos += _fetch(stmt.where(Photo.taken_at.is_(None)), limit + 1 - len(photos))
+
+    if len(photos) > limit:
+        return PhotoPage(photos=photos[:limit], next_cursor=encode_cursor(photos[limit - 1]))
+    return PhotoPage(photos=photos, next_cursor=None)
@@ -0,0 +1,303 @@
+"""Packed thumbnail storage: append-only pack files with an offset index.
+
+Thumbnails are appended to `cache_dir/thumbpacks/pack-NNNNNN.bin` and located
+through `index.log`, a log of fixed-size records
+`(photo_id, size code, pack number, offset, length)` where the last record
+for a key wins and a zero length marks a deletion. Reads return memoryviews
+into read-only memory maps of the packs, so serving a thumbnail copies no
+bytes. Space held by replaced or deleted thumbnails is reclaimed by
+`PackedThumbnailStore.compact`.
+
+A store directory must have a single writer; use `get_packed_store` so every
+component of a process shares one instance.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import struct
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+from .config import AppConfig
+
+
+STORE_DIRNAME = "thumbpacks"
+INDEX_FILENAME = "index.log"
+
+_RECORD = struct.Struct("<qBIQI")
+_PACK_PATTERN = re.compile(r"^pack-(\d{6})\.bin$")
+_LABEL_CODES = {"small": 1, "medium": 2, "large": 3}
+_CODE_LABELS = {code: label for label, code in _LABEL_CODES.items()}
+_MIB = 1024 * 1024
+
+_stores: dict[Path, "PackedThumbnailStore"] = {}
+_stores_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class _Location:
+    pack: int
+    offset: int
+    length: int
+
+
+@dataclass
+class CompactionResult:
+    """Outcome of `PackedThumbnailStore.compact`."""
+
+    kept: int
+    dropped: int
+    bytes_before: int
+    bytes_after: int
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+def get_packed_store(config: AppConfig) -> "PackedThumbnailStore":
+    """Return the process-wide store for `config.cache_dir`, opening it on first use."""
+
+    directory = (Path(config.cache_dir) / STORE_DIRNAME).resolve()
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = PackedThumbnailStore(
+                directory, pack_size_bytes=config.thumbnails.pack_size_mb * _MIB
+            )
+            _stores[directory] = store
+        return store
+
+
+class PackedThumbnailStore:
+    """Thumbnail bytes keyed by `(photo_id, size_label)` in append-only pack files."""
+
+    def __init__(self, directory: Path, pack_size_bytes: int = 256 * _MIB) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._pack_size = pack_size_bytes
+        self._lock = threading.RLock()
+        self._locations: dict[tuple[int, str], _Location] = {}
+        self._maps: dict[int, mmap.mmap] = {}
+        self._index_offset = 0
+        self._index_file: BinaryIO | None = None
+        self._pack_file: BinaryIO | None = None
+        self._pack_number = max(self._pack_numbers(), default=0)
+        self._read_index()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._locations)
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            return key in self._locations
+
+    def get(self, photo_id: int, size_label: str) -> memoryview | None:
+        """Return a zero-copy view of a stored thumbnail, or None when absent."""
+
+        key = (photo_id, size_label)
+        with self._lock:
+            location = self._locations.get(key)
+            if location is None:
+                # Pick up records appended by another store instance or process.
+                self._read_index()
+                location = self._locations.get(key)
+                if location is None:
+                    return None
+            view = memoryview(self._map(location.pack, location.offset + location.length))
+            return view[location.offset : location.offset + location.length]
+
+    def put(self, photo_id: int, size_label: str, data: bytes) -> None:
+        """Append a thumbnail, replacing any earlier version for the same key."""
+
+        code = _label_code(size_label)
+        with self._lock:
+            pack_file = self._writable_pack(len(data))
+            offset = pack_file.tell()
+            pack_file.write(data)
+            pack_file.flush()
+            self._append_records([(photo_id, code, self._pack_number, offset, len(data))])
+            location = _Location(self._pack_number, offset, len(data))
+            self._locations[(photo_id, size_label)] = location
+
+    def delete(self, photo_id: int, size_labels: Iterable[str] | None = None) -> int:
+        """Mark thumbnails of a photo deleted, returning how many were removed."""
+
+        labels = list(size_labels) if size_labels is not None else list(_LABEL_CODES)
+        with self._lock:
+            removed = [label for label in labels if (photo_id, label) in self._locations]
+            if removed:
+                self._append_records(
+                    [(photo_id, _label_code(label), 0, 0, 0) for label in removed]
+                )
+                for label in removed:
+                    del self._locations[(photo_id, label)]
+            return len(removed)
+
+    def compact(self, live_photo_ids: Iterable[int] | None = None) -> CompactionResult:
+        """Rewrite live thumbnails into fresh packs and delete the old ones.
+
+        When `live_photo_ids` is given, thumbnails of any other photo are
+        dropped as well. The new index replaces the old one atomically, so an
+        interrupted compaction leaves the previous packs in use.
+        """
+
+        live = set(live_photo_ids) if live_photo_ids is not None else None
+        with self._lock:
+            bytes_before = self._disk_bytes()
+            keep = sorted(
+                (
+                    (key, location)
+                    for key, location in self._locations.items()
+                    if live is None or key[0] in live
+                ),
+                key=lambda item: (item[1].pack, item[1].offset),
+            )
+
+            new_locations: dict[tuple[int, str], _Location] = {}
+            records: list[tuple[int, int, int, int, int]] = []
+            pack_number = self._pack_number
+            pack_file: BinaryIO | None = None
+            try:
+                for key, location in keep:
+                    if pack_file is None or pack_file.tell() + location.length > self._pack_size:
+                        if pack_file is not None:
+                            _close_durably(pack_file)
+                        pack_number += 1
+                        pack_file = self._pack_path(pack_number).open("wb")
+                    offset = pack_file.tell()
+                    pack_file.write(self.get(*key))
+                    new_locations[key] = _Location(pack_number, offset, location.length)
+                    records.append(
+                        (key[0], _label_code(key[1]), pack_number, offset, location.length)
+                    )
+            finally:
+                if pack_file is not None:
+                    _close_durably(pack_file)
+
+            temp_index = self.directory / f"{INDEX_FILENAME}.tmp"
+            with temp_index.open("wb") as handle:
+                handle.write(b"".join(_RECORD.pack(*record) for record in records))
+                handle.flush()
+                os.fsync(handle.fileno())
+
+            self._close_files()
+            os.replace(temp_index, self.directory / INDEX_FILENAME)
+
+            live_packs = {location.pack for location in new_locations.values()}
+            for number in self._pack_numbers():
+                if number not in live_packs:
+                    try:
+                        self._pack_path(number).unlink()
+                    except OSError:
+                        pass  # still mapped elsewhere; the next compaction retries
+
+            dropped = len(self._locations) - len(new_locations)
+            self._locations = new_locations
+            self._index_offset = len(records) * _RECORD.size
+            self._pack_number = pack_number
+            return CompactionResult(
+                kept=len(new_locations),
+                dropped=dropped,
+                bytes_before=bytes_before,
+                bytes_after=self._disk_bytes(),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_files()
+
+    def _read_index(self) -> None:
+        path = self.directory / INDEX_FILENAME
+        try:
+            with path.open("rb") as handle:
+                handle.seek(self._index_offset)
+                data = handle.read()
+        except FileNotFoundError:
+            return
+
+        # Ignore a record torn by a crash mid-append.
+        usable = len(data) - len(data) % _RECORD.size
+        for photo_id, code, pack, offset, length in _RECORD.iter_unpack(data[:usable]):
+            label = _CODE_LABELS.get(code)
+            if label is None:
+                continue
+            if length:
+                self._locations[(photo_id, label)] = _Location(pack, offset, length)
+            else:
+                self._locations.pop((photo_id, label), None)
+        self._index_offset += usable
+
+    def _append_records(self, records: list[tuple[int, int, int, int, int]]) -> None:
+        if self._index_file is None:
+            self._read_index()
+            self._index_file = (self.directory / INDEX_FILENAME).open("ab")
+        self._index_file.write(b"".join(_RECORD.pack(*record) for record in records))
+        self._index_file.flush()
+        self._index_offset += len(records) * _RECORD.size
+
+    def _writable_pack(self, incoming: int) -> BinaryIO:
+        if self._pack_file is None and self._pack_number:
+            self._pack_file = self._pack_path(self._pack_number).open("ab")
+        if self._pack_file is None or (
+            self._pack_file.tell() and self._pack_file.tell() + incoming > self._pack_size
+        ):
+            if self._pack_file is not None:
+                self._pack_file.close()
+            self._pack_number += 1
+            self._pack_file = self._pack_path(self._pack_number).open("ab")
+        return self._pack_file
+
+    def _map(self, pack: int, needed: int) -> mmap.mmap:
+        mapped = self._maps.get(pack)
+        if mapped is None or len(mapped) < needed:
+            # Views handed out earlier keep the previous mapping alive.
+            with self._pack_path(pack).open("rb") as handle:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[pack] = mapped
+        return mapped
+
+    def _close_files(self) -> None:
+        for handle in (self._pack_file, self._index_file):
+            if handle is not None:
+                handle.close()
+        self._pack_file = None
+        self._index_file = None
+        for mapped in self._maps.values():
+            try:
+                mapped.close()
+            except BufferError:
+                pass  # still exported to a caller; released with its last view
+        self._maps.clear()
+
+    def _pack_numbers(self) -> list[int]:
+        numbers = []
+        for entry in os.scandir(self.directory):
+            match = _PACK_PATTERN.match(entry.name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return numbers
+
+    def _pack_path(self, number: int) -> Path:
+        return self.directory / f"pack-{number:06d}.bin"
+
+    def _disk_bytes(self) -> int:
+        return sum(self._pack_path(number).stat().st_size for number in self._pack_numbers())
+
+
+def _label_code(size_label: str) -> int:
+    try:
+        return _LABEL_CODES[size_label]
+    except KeyError as exc:
+        raise ValueError(f"Invalid size label '{size_label}'") from exc
+
+
+def _close_durably(handle: BinaryIO) -> None:
+    handle.flush()
+    os.fsync(handle.fileno())
+    handle.close()
@@ -1,16 +1,48 @@
 """Thumbnail generation utilities."""
 from __future__ import annotations
 
+from dataclasses import dataclass, field
+from io import BytesIO
 from pathlib import Path
-from typing import Dict, Iterable
+from typing import Any, BinaryIO, Dict, Iterable, Iterator
 
-from PIL import Image, ImageOps
+from PIL import Image
 
 from .config import AppConfig
+from .exif import extract_exif_from_image
 from .models import Photo
+from .phash import dhash
 
 
 VALID_SIZE_LABELS = {"small", "medium", "large"}
+# Size whose rendering is perceptually hashed into `Photo.phash`.
+PHASH_SIZE_LABEL = "small"
+
+_ORIENTATION_TAG = 0x0112
+_ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+@dataclass
+class IngestResult:
+    """EXIF data and thumbnails produced from a single open of an image.
+
+    With `thumbnails.store: packed` the thumbnails are returned encoded in
+    `encoded` for the caller to add to the pack store, and `thumbnails` is empty.
+    `phash` is the perceptual hash of the small thumbnail, when one was requested.
+    """
+
+    exif: dict[str, Any]
+    thumbnails: Dict[str, Path]
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+    phash: int | None = None
 
 
 def _resolve_original_path(photo: Photo) -> Path:
@@ -40,35 +72,175 @@ def get_thumbnail_path(photo_id: int, size_label: str, config: AppConfig) -> Pat
 def generate_thumbnail(photo: Photo, size_label: str, config: AppConfig) -> Path:
     """Generate a thumbnail for the given photo and size label, returning its path."""
 
-    max_dimension = _get_max_dimension(size_label, config.thumb_sizes)
+    _get_max_dimension(size_label, config.thumb_sizes)
     source_path = _resolve_original_path(photo)
     if not source_path.exists():
         raise FileNotFoundError(f"Original image not found: {source_path}")
 
-    destination = get_thumbnail_path(photo.id, size_label, config)
-    destination.parent.mkdir(parents=True, exist_ok=True)
-
     with Image.open(source_path) as image:
-        oriented = ImageOps.exif_transpose(image)
-        oriented.thumbnail((max_dimension, max_dimension))
-        oriented.save(destination, format="JPEG")
+        return _render_thumbnails(image, photo.id, [size_label], config)[size_label]
+
+
+def render_thumbnail_bytes(photo: Photo, size_label: str, config: AppConfig) -> bytes:
+    """Render one thumbnail of the given photo and return it JPEG-encoded, without saving it."""
+
+    _get_max_dimension(size_label, config.thumb_sizes)
+    source_path = _resolve_original_path(photo)
+    if not source_path.exists():
+        raise FileNotFoundError(f"Original image not found: {source_path}")
 
-    return destination
+    with Image.open(source_path) as image:
+        return _encode_thumbnails(image, [size_label], config)[size_label]
 
 
 def ensure_thumbnails(photo: Photo, config: AppConfig, sizes: list[str] | None = None) -> Dict[str, Path]:
     """Ensure thumbnails for the specified sizes exist, generating any missing ones."""
 
     size_labels = _normalize_sizes(sizes, config.thumb_sizes)
-    thumbnails: Dict[str, Path] = {}
+    thumbnails, missing = _split_existing(photo.id, size_labels, config)
+
+    if missing:
+        source_path = _resolve_original_path(photo)
+        if not source_path.exists():
+            raise FileNotFoundError(f"Original image not found: {source_path}")
+        with Image.open(source_path) as image:
+            thumbnails.update(_render_thumbnails(image, photo.id, missing, config))
+
+    return {label: thumbnails[label] for label in size_labels}
+
+
+def ingest_image(photo: Photo, config: AppConfig, sizes: list[str] | None = None) -> IngestResult:
+    """Read EXIF and build any missing thumbnails from a single open of the original.
+
+    The file is decoded at most once: every missing size is produced by
+    downscaling the previous, larger result instead of the original.
+    """
+
+    size_labels = _normalize_sizes(sizes, config.thumb_sizes)
+    source_path = _resolve_original_path(photo)
+    if not source_path.exists():
+        raise FileNotFoundError(f"Original image not found: {source_path}")
+
+    hashes: Dict[str, int] = {}
+    if config.thumbnails.store == "packed":
+        with Image.open(source_path) as image:
+            exif = extract_exif_from_image(image)
+            encoded = _encode_thumbnails(image, size_labels, config, hashes)
+        return IngestResult(
+            exif=exif, thumbnails={}, encoded=encoded, phash=hashes.get(PHASH_SIZE_LABEL)
+        )
+
+    thumbnails, missing = _split_existing(photo.id, size_labels, config)
+    with Image.open(source_path) as image:
+        exif = extract_exif_from_image(image)
+        if missing:
+            thumbnails.update(_render_thumbnails(image, photo.id, missing, config, hashes))
+
+    phash = hashes.get(PHASH_SIZE_LABEL)
+    if phash is None and PHASH_SIZE_LABEL in thumbnails:
+        phash = thumbnail_phash(thumbnails[PHASH_SIZE_LABEL])
+    return IngestResult(
+        exif=exif,
+        thumbnails={label: thumbnails[label] for label in size_labels},
+        phash=phash,
+    )
+
 
+def thumbnail_phash(source: Path | BinaryIO) -> int:
+    """Perceptual hash of an already stored thumbnail.
+
+    JPEG artefacts can move the hash a few bits away from the one taken of
+    the freshly rendered image during indexing.
+    """
+
+    with Image.open(source) as image:
+        return dhash(image)
+
+
+def _split_existing(
+    photo_id: int, size_labels: list[str], config: AppConfig
+) -> tuple[Dict[str, Path], list[str]]:
+    existing: Dict[str, Path] = {}
+    missing: list[str] = []
     for label in size_labels:
-        thumb_path = get_thumbnail_path(photo.id, label, config)
-        if not thumb_path.exists():
-            thumb_path = generate_thumbnail(photo, label, config)
-        thumbnails[label] = thumb_path
+        thumb_path = get_thumbnail_path(photo_id, label, config)
+        if thumb_path.exists():
+            existing[label] = thumb_path
+        else:
+            missing.append(label)
+    return existing, missing
+
+
+def _render_thumbnails(
+    image: Image.Image,
+    photo_id: int,
+    size_labels: list[str],
+    config: AppConfig,
+    hashes: Dict[str, int] | None = None,
+) -> Dict[str, Path]:
+    rendered: Dict[str, Path] = {}
+    for label, thumbnail in _resize_cascade(image, size_labels, config, hashes):
+        destination = get_thumbnail_path(photo_id, label, config)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        thumbnail.save(destination, format="JPEG")
+        rendered[label] = destination
+    return rendered
+
+
+def _encode_thumbnails(
+    image: Image.Image,
+    size_labels: list[str],
+    config: AppConfig,
+    hashes: Dict[str, int] | None = None,
+) -> Dict[str, bytes]:
+    encoded: Dict[str, bytes] = {}
+    for label, thumbnail in _resize_cascade(image, size_labels, config, hashes):
+        buffer = BytesIO()
+        thumbnail.save(buffer, format="JPEG")
+        encoded[label] = buffer.getvalue()
+    return encoded
+
+
+def _resize_cascade(
+    image: Image.Image,
+    size_labels: list[str],
+    config: AppConfig,
+    hashes: Dict[str, int] | None = None,
+) -> Iterator[tuple[str, Image.Image]]:
+    """Decode `image` once and yield each size, cascading from largest to smallest.
+
+    Downscaling happens on the stored pixel grid and the EXIF orientation is
+    applied to each (small) result, so rotating never touches the full-size
+    image. With `thumbnails.jpeg_draft_mode` JPEGs are decoded at the smallest
+    DCT scale that still covers the largest requested size. When `hashes` is
+    given, the perceptual hash of the `PHASH_SIZE_LABEL` rendering is stored in it.
+    """
+
+    ordered = sorted(
+        size_labels, key=lambda label: _get_max_dimension(label, config.thumb_sizes), reverse=True
+    )
+    largest = _get_max_dimension(ordered[0], config.thumb_sizes)
+    orientation = image.getexif().get(_ORIENTATION_TAG, 1)
+
+    if config.thumbnails.jpeg_draft_mode and image.format == "JPEG":
+        image.draft(None, (largest, largest))
+
+    current = image if image.mode in ("RGB", "L") else image.convert("RGB")
+
+    for label in ordered:
+        max_dimension = _get_max_dimension(label, config.thumb_sizes)
+        current.thumbnail((max_dimension, max_dimension), reducing_gap=None)
+        oriented = _apply_orientation(current, orientation)
+        if hashes is not None and label == PHASH_SIZE_LABEL:
+            hashes[label] = dhash(oriented)
+        yield label, oriented
+
 
-    return thumbnails
+def _apply_orientation(image: Image.Image, orientation: int) -> Image.Image:
+    method = _ORIENTATION_TRANSPOSE.get(orientation)
+    if method is None:
+        return image
+    return image.transpose(method)
 
 
 def _normalize_sizes(sizes: Iterable[str] | None, available_sizes: Dict[str, int]) -> list[str]:
@@ -0,0 +1,183 @@
+"""Library-wide detection of byte-identical photos."""
+from __future__ import annotations
+
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from itertools import groupby
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.core.bulk import bulk_update_photos
+from src.core.config import AppConfig
+from src.core.db import get_session
+from src.core.models import Photo, Root
+from src.services.hashing_service import HashingService
+from src.services.jobs import JobManager, ProgressCallback
+
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPE = "find_duplicates"
+
+# Files handed to the hashing service per call; whole size groups stay together.
+HASH_BATCH_FILES = 256
+
+
+@dataclass(frozen=True)
+class DuplicateFile:
+    photo_id: int
+    root_id: int
+    path: Path
+
+
+@dataclass
+class DuplicateSet:
+    """Photos whose files have identical content."""
+
+    sha256: str
+    filesize: int
+    files: list[DuplicateFile]
+
+    @property
+    def root_ids(self) -> set[int]:
+        return {item.root_id for item in self.files}
+
+    @property
+    def wasted_bytes(self) -> int:
+        return self.filesize * (len(self.files) - 1)
+
+
+@dataclass
+class DuplicateReport:
+    """Duplicate sets found in one pass, with the work each stage did."""
+
+    sets: list[DuplicateSet] = field(default_factory=list)
+    photos_total: int = 0
+    # Photos sharing a size with another photo, whose files were fingerprinted.
+    size_candidates: int = 0
+    # Photos whose fingerprint also matched, whose files were fully hashed.
+    fingerprint_candidates: int = 0
+
+    @property
+    def wasted_bytes(self) -> int:
+        return sum(duplicate.wasted_bytes for duplicate in self.sets)
+
+
+def _size_candidates(
+    session: Session, active: list
+) -> Iterator[tuple[int, int, int, str, str]]:
+    """Yield `(filesize, id, root_id, relative_path, root_path)` for photos sharing a size."""
+
+    shared_sizes = (
+        select(Photo.filesize).where(*active).group_by(Photo.filesize).having(func.count() > 1)
+    )
+    stmt = (
+        select(Photo.filesize, Photo.id, Photo.root_id, Photo.relative_path, Root.path)
+        .join(Root, Root.id == Photo.root_id)
+        .where(*active, Photo.filesize.in_(shared_sizes))
+        .order_by(Photo.filesize, Photo.id)
+    )
+    yield from session.execute(stmt).tuples()
+
+
+def _batched_size_groups(
+    rows: Iterable[tuple[int, int, int, str, str]], batch_files: int
+) -> Iterator[list[tuple[int, int, int, str, str]]]:
+    batch: list[tuple[int, int, int, str, str]] = []
+    for _, group in groupby(rows, key=lambda row: row[0]):
+        batch.extend(group)
+        if len(batch) >= batch_files:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def find_duplicates(
+    hashing: HashingService,
+    *,
+    root_ids: list[int] | None = None,
+    progress: ProgressCallback | None = None,
+) -> DuplicateReport:
+    """Group active photos into sets of identical files across all (or the given) roots.
+
+    Candidates narrow in three stages: photos sharing a file size (from the
+    database, without touching files), then sharing a head/tail fingerprint,
+    then sharing a full SHA-256. Files with a unique size are never read,
+    and only fingerprint collisions are fully hashed. Computed digests are
+    stored in `Photo.file_hash`.
+
+    Each batch of size groups is hashed and written in its own short
+    transaction, so the database is never locked for the whole library and
+    a cancelled or failed run keeps the batches already done.
+    """
+
+    active = [Photo.status == "active", Photo.filesize.is_not(None)]
+    if root_ids:
+        active.append(Photo.root_id.in_(root_ids))
+
+    with get_session() as session:
+        report = DuplicateReport(
+            photos_total=session.scalar(select(func.count()).where(*active)) or 0
+        )
+        rows = list(_size_candidates(session, active))
+    report.size_candidates = len(rows)
+
+    by_digest: dict[tuple[int, str], list[DuplicateFile]] = defaultdict(list)
+    processed = 0
+    for batch in _batched_size_groups(rows, HASH_BATCH_FILES):
+        files = {}
+        for _, photo_id, root_id, relative_path, root_path in batch:
+            path = Path(root_path) / relative_path
+            files[path] = DuplicateFile(photo_id, root_id, path)
+        with get_session() as session:
+            hashes = hashing.hash_files(session, files)
+            # Size groups never span batches, so neither do fingerprint groups.
+            fingerprints = Counter((result.size, result.fingerprint) for result in hashes.values())
+            hashed_rows = []
+            for path, item in files.items():
+                result = hashes.get(path)
+                if result is None or result.sha256 is None:
+                    continue
+                # A digest cached by an earlier run may belong to a file that no longer collides.
+                if fingerprints[(result.size, result.fingerprint)] > 1:
+                    report.fingerprint_candidates += 1
+                by_digest[(result.size, result.sha256)].append(item)
+                hashed_rows.append({"id": item.photo_id, "file_hash": result.sha256})
+            bulk_update_photos(session, hashed_rows)
+
+        processed += len(batch)
+        if progress is not None:
+            progress(processed / len(rows), f"Checked {processed} of {len(rows)} candidates")
+
+    report.sets = sorted(
+        (
+            DuplicateSet(sha256=sha256, filesize=size, files=items)
+            for (size, sha256), items in by_digest.items()
+            if len(items) > 1
+        ),
+        key=lambda duplicate: duplicate.wasted_bytes,
+        reverse=True,
+    )
+    logger.info(
+        "Found %s duplicate sets among %s photos (%s shared a size, %s needed a full hash)",
+        len(report.sets),
+        report.photos_total,
+        report.size_candidates,
+        report.fingerprint_candidates,
+    )
+    return report
+
+
+def register_duplicate_job(job_manager: JobManager, config: AppConfig) -> None:
+    """Register the `find_duplicates` job; its payload may carry `root_ids`."""
+
+    def run(payload: dict, report: ProgressCallback) -> DuplicateReport:
+        with HashingService(config) as hashing:
+            return find_duplicates(hashing, root_ids=payload.get("root_ids"), progress=report)
+
+    job_manager.register(JOB_TYPE, run)
@@ -1,22 +1,344 @@
 """Service that runs face detection over photos."""
 from __future__ import annotations
 
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
-from typing import Iterable
+from time import perf_counter
+from typing import Callable, Dict, Iterable, Iterator
 
+import numpy as np
+from sqlalchemy import func, select
+
+from src.core.ann import open_ann_index
+from src.core.bulk import bulk_update_photos
 from src.core.config import Config
-from src.core.faces import FaceEmbedder
+from src.core.db import get_session
+from src.core.face_store import FaceStore
+from src.core.faces import DecodedImage, DetectedFace, FaceDetection, FaceEmbedder, decode_image
+from src.core.models import Photo, Root
+from src.services.jobs import JobContext, JobManager, ProgressCallback
+
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPE = "index_faces"
+FACE_STAGES = ("decode", "detect", "align", "embed", "persist")
+# Finished photos written per transaction.
+PERSIST_BATCH_SIZE = 64
+FACE_PAGE_SIZE = 1000
+# Photos decoded ahead of the inference threads, per thread.
+_PREFETCH_PER_WORKER = 4
+
+_NEEDS_FACES = Photo.faces_indexed_at.is_(None)
+
+
+@dataclass
+class FaceIndexStats:
+    """Counters and per-stage timings of one `FaceIndexer` run."""
+
+    photos: int = 0
+    faces: int = 0
+    failed: int = 0
+    # Seconds spent in each of `FACE_STAGES`, summed over the threads running it.
+    stage_seconds: Dict[str, float] = field(
+        default_factory=lambda: dict.fromkeys(FACE_STAGES, 0.0)
+    )
+    wall_seconds: float = 0.0
+
+    def photos_per_second(self) -> float:
+        return self.photos / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def add_timings(self, timings: Dict[str, float]) -> None:
+        for stage, seconds in timings.items():
+            self.stage_seconds[stage] += seconds
+
+
+@dataclass
+class _PendingPhoto:
+    """A photo whose faces are detected and waiting for their embeddings."""
+
+    photo_id: int
+    scale: float
+    detections: list[FaceDetection]
+    embeddings: list[np.ndarray | None]
+    remaining: int
+
+    def faces(self) -> list[DetectedFace]:
+        """The detected faces with their embeddings, once every embedding has arrived."""
+
+        faces = []
+        for detection, embedding in zip(self.detections, self.embeddings):
+            assert embedding is not None, f"photo id={self.photo_id} is missing an embedding"
+            faces.append(detection.to_detected_face(self.scale, embedding))
+        return faces
 
 
 class FaceIndexer:
-    def __init__(self, config: Config):
-        model_dir = getattr(config.face_recognition, "model_dir", None)
+    """Detect, embed and store faces with a staged, multi-threaded pipeline.
+
+    Images are decoded on `decode_workers` threads, prefetched ahead of
+    `workers` inference threads. Each inference thread creates its own
+    `FaceEmbedder` on first use, so the ONNX Runtime sessions are loaded
+    once per thread and reused for every photo. Detection and alignment
+    run per photo; aligned crops of consecutive photos are grouped into
+    `batch_size` batches so each embedding call is one inference over a
+    full batch. Finished photos are written `PERSIST_BATCH_SIZE` at a time,
+    all their faces with one `FaceStore` append in one transaction.
+
+    Inference runs on the CPU execution provider only. The returned
+    `FaceIndexStats` record the time spent in each stage.
+    """
+
+    def __init__(
+        self, config: Config, embedder_factory: Callable[[], FaceEmbedder] | None = None
+    ):
+        face_config = config.face_recognition
+        model_dir = getattr(face_config, "model_dir", None)
         if model_dir is None:
             raise RuntimeError("Face recognition `model_dir` is not configured")
-        self.embedder = FaceEmbedder(Path(model_dir))
+        self.config = config
+        self.workers = face_config.workers
+        self.decode_workers = face_config.decode_workers
+        self.batch_size = face_config.batch_size
+        intra_op_threads = face_config.intra_op_threads or max(
+            1, (os.cpu_count() or 1) // self.workers
+        )
+        self._embedder_factory = embedder_factory or (
+            lambda: FaceEmbedder(
+                Path(model_dir),
+                intra_op_threads=intra_op_threads,
+                inter_op_threads=face_config.inter_op_threads,
+                min_score=face_config.min_detection_score,
+            )
+        )
+        self._local = threading.local()
+
+    def index_faces(
+        self,
+        photos: Iterable[tuple[int, Path]],
+        progress: ProgressCallback | None = None,
+        *,
+        total: int | None = None,
+        checkpoint: Callable[[int], None] | None = None,
+    ) -> FaceIndexStats:
+        """Index `(photo_id, path)` pairs, marking each photo's `faces_indexed_at`.
+
+        Photos are written in the order given. After each write `progress`
+        is called (as a fraction of `total`, when known) and `checkpoint`
+        receives the last written photo id. Photos that cannot be read or
+        whose detection fails count as failed and are marked indexed with
+        no faces.
+        """
+
+        stats = FaceIndexStats()
+        started = perf_counter()
+        with get_session() as session:
+            store = FaceStore.open(self.config, session)
+
+        # Photos in submission order; each is written once every photo before it is done.
+        in_order: deque[_PendingPhoto] = deque()
+        ready: list[_PendingPhoto] = []
+        crops: list[np.ndarray] = []
+        owners: list[tuple[_PendingPhoto, int]] = []
+        embedding: deque[tuple[Future, list[tuple[_PendingPhoto, int]]]] = deque()
+
+        def write_ready(final: bool = False) -> None:
+            while in_order and in_order[0].remaining == 0:
+                ready.append(in_order.popleft())
+            while len(ready) >= PERSIST_BATCH_SIZE or (final and ready):
+                chunk = ready[:PERSIST_BATCH_SIZE]
+                del ready[:PERSIST_BATCH_SIZE]
+                self._persist(store, chunk, stats)
+                if progress is not None:
+                    fraction = min(stats.photos / total, 1.0) if total else 0.0
+                    progress(fraction, f"Found {stats.faces} faces in {stats.photos} photos")
+                if checkpoint is not None:
+                    checkpoint(chunk[-1].photo_id)
+
+        def take_embeddings(future: Future, batch_owners: list[tuple[_PendingPhoto, int]]) -> None:
+            vectors, seconds = future.result()
+            stats.stage_seconds["embed"] += seconds
+            for (pending, face_index), vector in zip(batch_owners, vectors):
+                pending.embeddings[face_index] = vector
+                pending.remaining -= 1
+
+        def submit_batch(size: int) -> None:
+            batch = np.stack(crops[:size])
+            embedding.append((inference.submit(self._embed, batch), owners[:size]))
+            del crops[:size], owners[:size]
+            # Keep at most one batch per inference thread queued.
+            while len(embedding) > self.workers:
+                take_embeddings(*embedding.popleft())
+
+        def collect(future: Future) -> None:
+            pending, photo_crops, timings, failed = future.result()
+            stats.add_timings(timings)
+            stats.failed += failed
+            in_order.append(pending)
+            crops.extend(photo_crops)
+            owners.extend((pending, face_index) for face_index in range(len(photo_crops)))
+            while len(crops) >= self.batch_size:
+                submit_batch(self.batch_size)
+            while embedding and embedding[0][0].done():
+                take_embeddings(*embedding.popleft())
+            write_ready()
+
+        window = (self.workers + self.decode_workers) * _PREFETCH_PER_WORKER
+        with ThreadPoolExecutor(self.decode_workers, thread_name_prefix="face-decode") as decoder:
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="face-infer") as inference:
+                detecting: deque[Future] = deque()
+                for photo_id, path in photos:
+                    decoded = decoder.submit(_decode, path)
+                    detecting.append(inference.submit(self._detect, photo_id, decoded))
+                    if len(detecting) >= window:
+                        collect(detecting.popleft())
+                while detecting:
+                    collect(detecting.popleft())
+                if crops:
+                    submit_batch(len(crops))
+                while embedding:
+                    take_embeddings(*embedding.popleft())
+        write_ready(final=True)
+
+        stats.wall_seconds = perf_counter() - started
+        logger.info(
+            "Indexed faces of %s photos (%s faces, %s unreadable) in %.1fs: %s",
+            stats.photos,
+            stats.faces,
+            stats.failed,
+            stats.wall_seconds,
+            ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in stats.stage_seconds.items()),
+        )
+        return stats
+
+    def index_pending(
+        self,
+        progress: ProgressCallback | None = None,
+        *,
+        after_id: int = 0,
+        checkpoint: Callable[[int], None] | None = None,
+    ) -> FaceIndexStats:
+        """Index every photo whose faces have not been detected yet, in id order."""
+
+        with get_session() as session:
+            total = session.scalar(
+                select(func.count()).select_from(Photo).where(Photo.id > after_id, _NEEDS_FACES)
+            )
+        return self.index_faces(
+            _iter_pending_photos(after_id, FACE_PAGE_SIZE),
+            progress,
+            total=total,
+            checkpoint=checkpoint,
+        )
+
+    def _embedder(self) -> FaceEmbedder:
+        embedder = getattr(self._local, "embedder", None)
+        if embedder is None:
+            embedder = self._local.embedder = self._embedder_factory()
+        return embedder
+
+    def _detect(
+        self, photo_id: int, decoded: Future
+    ) -> tuple[_PendingPhoto, list[np.ndarray], Dict[str, float], int]:
+        """Detect and align the faces of one photo, returning their crops for embedding."""
+
+        embedder = self._embedder()
+        try:
+            image, decode_seconds = decoded.result()
+            started = perf_counter()
+            detections = embedder.detect(image)
+            detected = perf_counter()
+            crops = [embedder.align(image, detection) for detection in detections]
+        except Exception:  # noqa: BLE001
+            logger.warning("Unable to detect faces in photo id=%s", photo_id, exc_info=True)
+            return _PendingPhoto(photo_id, 1.0, [], [], 0), [], {}, 1
+        timings = {
+            "decode": decode_seconds,
+            "detect": detected - started,
+            "align": perf_counter() - detected,
+        }
+        pending = _PendingPhoto(
+            photo_id, image.scale, detections, [None] * len(crops), len(crops)
+        )
+        return pending, crops, timings, 0
+
+    def _embed(self, batch: np.ndarray) -> tuple[np.ndarray, float]:
+        started = perf_counter()
+        vectors = self._embedder().embed(batch)
+        return vectors, perf_counter() - started
+
+    def _persist(
+        self, store: FaceStore, photos: list[_PendingPhoto], stats: FaceIndexStats
+    ) -> None:
+        started = perf_counter()
+        now = datetime.utcnow()
+        items = [(photo.photo_id, photo.faces()) for photo in photos]
+        with get_session() as session:
+            faces = store.add_photo_faces(session, items)
+            bulk_update_photos(
+                session,
+                [{"id": photo.photo_id, "faces_indexed_at": now} for photo in photos],
+                self.config.database.bulk_chunk_size,
+            )
+        stats.photos += len(photos)
+        stats.faces += len(faces)
+        stats.stage_seconds["persist"] += perf_counter() - started
+
+
+def _decode(path: Path) -> tuple[DecodedImage, float]:
+    started = perf_counter()
+    image = decode_image(path)
+    return image, perf_counter() - started
+
+
+def _iter_pending_photos(after_id: int, page_size: int) -> Iterator[tuple[int, Path]]:
+    """Stream `(photo_id, path)` of photos needing face detection, one keyset page per session."""
+
+    last_id = after_id
+    while True:
+        with get_session() as session:
+            page = session.execute(
+                select(Photo.id, Photo.relative_path, Root.path)
+                .join(Root, Root.id == Photo.root_id)
+                .where(Photo.id > last_id, _NEEDS_FACES)
+                .order_by(Photo.id)
+                .limit(page_size)
+            ).all()
+        if not page:
+            return
+        last_id = page[-1][0]
+        for photo_id, relative_path, root_path in page:
+            yield photo_id, Path(root_path) / relative_path
+
+
+def register_face_index_job(job_manager: JobManager, config: Config) -> None:
+    """Register the `index_faces` job; enqueue it with `JobPriority.BULK`.
+
+    The job is exclusive: a resumed run and a newly queued one would
+    otherwise index the same pending photos twice. After new faces are
+    stored the saved ANN index is brought up to date, so later
+    `open_ann_index` calls only apply faces changed since. While
+    `face_recognition.enabled` is off, queued and resumed jobs finish
+    without touching any photo.
+    """
+
+    def run(payload: dict, context: JobContext) -> None:
+        if not config.face_recognition.enabled:
+            context.report(1.0, "Face recognition is disabled")
+            return
+        stats = FaceIndexer(config).index_pending(
+            progress=context,
+            after_id=(context.checkpoint or {}).get("after_id", 0),
+            checkpoint=lambda after_id: context.save_checkpoint({"after_id": after_id}),
+        )
+        if stats.faces:
+            with get_session() as session:
+                open_ann_index(config, FaceStore.open(config, session))
 
-    def index_faces(self, photos: Iterable[Path]) -> None:
-        for photo_path in photos:
-            detections = self.embedder.detect_and_embed(photo_path)
-            _ = detections
-            # Persist detections later
+    job_manager.register(JOB_TYPE, run, exclusive=True)
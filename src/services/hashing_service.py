@@ -0,0 +1,194 @@
+"""Parallel file hashing backed by a persistent hash cache."""
+from __future__ import annotations
+
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.core.bulk import bulk_update_photos, bulk_upsert_file_hashes
+from src.core.config import AppConfig
+from src.core.hashing import compute_file_hash, compute_fingerprint
+from src.core.models import FileHash, Photo, Root
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FileHashes:
+    """Hashes known for one file as of its current size and mtime."""
+
+    path: Path
+    size: int
+    mtime_ns: int
+    fingerprint: str
+    sha256: str | None = None
+
+
+class HashingService:
+    """Hash files on a thread pool, reusing results cached in `file_hash_cache`.
+
+    Every file gets a partial fingerprint (size, head and tail blocks). The
+    full SHA-256 is computed only for files whose size and fingerprint
+    collide with another file in the same call, or for every file when
+    `full=True`. Cache rows are keyed by path and reused while the file's
+    size and `mtime_ns` are unchanged, so rescans do not reread files.
+    hashlib releases the GIL while digesting, so threads hash in parallel.
+    """
+
+    def __init__(self, config: AppConfig, max_workers: int | None = None) -> None:
+        self._chunk_size = config.database.bulk_chunk_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or config.jobs.max_workers, thread_name_prefix="hash"
+        )
+
+    def __enter__(self) -> "HashingService":
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def hash_files(
+        self, session: Session, paths: Iterable[Path], *, full: bool = False
+    ) -> dict[Path, FileHashes]:
+        """Return hashes for every readable file in `paths`, updating the cache."""
+
+        stats: dict[Path, os.stat_result] = {}
+        for path in paths:
+            try:
+                stats[Path(path)] = os.stat(path)
+            except OSError:
+                logger.debug("Skipping unreadable file %s", path, exc_info=True)
+
+        cached = self._load_cached(session, list(stats))
+        results: dict[Path, FileHashes] = {}
+        stale: list[Path] = []
+        for path, stat in stats.items():
+            entry = cached.get(path)
+            unchanged = entry is not None and (entry.size, entry.mtime_ns) == (
+                stat.st_size,
+                stat.st_mtime_ns,
+            )
+            if unchanged:
+                results[path] = entry
+            else:
+                stale.append(path)
+
+        changed: set[Path] = set()
+        fingerprints = self._executor.map(
+            lambda path: _hash_or_none(compute_fingerprint, path, stats[path].st_size), stale
+        )
+        for path, fingerprint in zip(stale, fingerprints):
+            if fingerprint is not None:
+                stat = stats[path]
+                results[path] = FileHashes(path, stat.st_size, stat.st_mtime_ns, fingerprint)
+                changed.add(path)
+
+        needs_full = [
+            path
+            for path in self._full_hash_candidates(results, full)
+            if results[path].sha256 is None
+        ]
+        digests = self._executor.map(
+            lambda path: _hash_or_none(compute_file_hash, path), needs_full
+        )
+        for path, sha256 in zip(needs_full, digests):
+            if sha256 is not None:
+                results[path] = replace(results[path], sha256=sha256)
+                changed.add(path)
+
+        hashed_at = datetime.utcnow()
+        bulk_upsert_file_hashes(
+            session,
+            (
+                {
+                    "path": str(path),
+                    "size": results[path].size,
+                    "mtime_ns": results[path].mtime_ns,
+                    "fingerprint": results[path].fingerprint,
+                    "sha256": results[path].sha256,
+                    "hashed_at": hashed_at,
+                }
+                for path in changed
+            ),
+            self._chunk_size,
+        )
+        return results
+
+    def hash_photos(
+        self, session: Session, photo_ids: Iterable[int] | None = None, *, full: bool = False
+    ) -> int:
+        """Hash active photos and store each computed SHA-256 in `Photo.file_hash`.
+
+        Scanning and indexing never hash files, so `file_hash` is only filled
+        by the `find_duplicates` job (for photos sharing a size) and by
+        callers of this method. Returns the number of photos whose
+        `file_hash` was set.
+        """
+
+        stmt = (
+            select(Photo.id, Photo.relative_path, Root.path)
+            .join(Root, Root.id == Photo.root_id)
+            .where(Photo.status == "active")
+        )
+        if photo_ids is None:
+            statements = [stmt]
+        else:
+            ids = list(photo_ids)
+            statements = [
+                stmt.where(Photo.id.in_(ids[start : start + self._chunk_size]))
+                for start in range(0, len(ids), self._chunk_size)
+            ]
+        paths_by_id = {
+            photo_id: Path(root_path) / relative_path
+            for statement in statements
+            for photo_id, relative_path, root_path in session.execute(statement)
+        }
+
+        hashes = self.hash_files(session, paths_by_id.values(), full=full)
+        rows = [
+            {"id": photo_id, "file_hash": hashes[path].sha256}
+            for photo_id, path in paths_by_id.items()
+            if path in hashes and hashes[path].sha256 is not None
+        ]
+        bulk_update_photos(session, rows, self._chunk_size)
+        return len(rows)
+
+    def _load_cached(self, session: Session, paths: list[Path]) -> dict[Path, FileHashes]:
+        cached: dict[Path, FileHashes] = {}
+        columns = (FileHash.size, FileHash.mtime_ns, FileHash.fingerprint, FileHash.sha256)
+        for start in range(0, len(paths), self._chunk_size):
+            by_name = {str(path): path for path in paths[start : start + self._chunk_size]}
+            stmt = select(FileHash.path, *columns).where(FileHash.path.in_(list(by_name)))
+            for name, size, mtime_ns, fingerprint, sha256 in session.execute(stmt):
+                path = by_name[name]
+                cached[path] = FileHashes(path, size, mtime_ns, fingerprint, sha256)
+        return cached
+
+    @staticmethod
+    def _full_hash_candidates(results: dict[Path, FileHashes], full: bool) -> list[Path]:
+        if full:
+            return list(results)
+        groups: dict[tuple[int, str], list[Path]] = defaultdict(list)
+        for path, hashes in results.items():
+            groups[(hashes.size, hashes.fingerprint)].append(path)
+        return [path for group in groups.values() if len(group) > 1 for path in group]
+
+
+def _hash_or_none(function, *args) -> str | None:
+    try:
+        return function(*args)
+    except OSError:
+        logger.warning("Unable to hash %s", args[0], exc_info=True)
+        return None
@@ -2,29 +2,97 @@
 from __future__ import annotations
 
 import logging
+import queue
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
+from time import perf_counter
 from types import SimpleNamespace
-from typing import Callable, Iterable
+from typing import Callable, Iterable, Iterator
 
-from sqlalchemy import or_
+from sqlalchemy import func, or_, select
 from sqlalchemy.orm import Session
 
+from src.core.bulk import bulk_update_photos, bulk_upsert_exif, exif_row
 from src.core.config import AppConfig
 from src.core.db import get_session
 from src.core.exif import extract_exif, guess_taken_at
-from src.core.models import ExifData, Photo
-from src.core.thumbnails import ensure_thumbnails
+from src.core.models import Photo, Root
+from src.core.thumb_store import PackedThumbnailStore, get_packed_store
+from src.core.thumbnails import ingest_image
+from src.services.jobs import JobContext, JobManager, ProgressCallback
 
 
 logger = logging.getLogger(__name__)
 
+JOB_TYPE = "index_photos"
+
+WRITE_BATCH_SIZE = 50
+
+# Candidates read per keyset page while streaming photos to the workers.
+INDEX_PAGE_SIZE = 1000
+
+# Number of extraction tasks kept in flight per worker process.
+_TASKS_PER_WORKER = 4
+
+_SENTINEL = object()
+
+# Configuration installed in each worker process by `_init_worker`.
+_worker_config: AppConfig | None = None
+
+
+@dataclass(frozen=True)
+class IndexTask:
+    """Picklable description of a photo handed to an extraction worker."""
+
+    id: int
+    relative_path: str
+    root_path: str
+
+
+@dataclass
+class IndexResult:
+    """Metadata produced by a worker for a single photo."""
+
+    photo_id: int
+    exif: dict[str, object] | None = None
+    taken_at: datetime | None = None
+    thumb_status: str = "ready"
+    error: str | None = None
+    # Encoded thumbnails by size label, for the packed thumbnail store.
+    thumbnails: dict[str, bytes] = field(default_factory=dict)
+    phash: int | None = None
+
+
+@dataclass
+class _PipelineStats:
+    """Throughput counters for the extract and write stages."""
+
+    workers: int
+    started: float = field(default_factory=perf_counter)
+    extracted: int = 0
+    written: int = 0
+    write_seconds: float = 0.0
+
+    def extract_rate(self) -> float:
+        elapsed = perf_counter() - self.started
+        return self.extracted / elapsed if elapsed > 0 else 0.0
+
+    def write_rate(self) -> float:
+        return self.written / self.write_seconds if self.write_seconds > 0 else 0.0
+
 
 def _resolve_photo_path(photo: Photo) -> tuple[SimpleNamespace, Path]:
     """Resolve the absolute file path for a photo and return a proxy for thumbnailing."""
 
+    root = getattr(photo, "root", None)
     root_path_value = getattr(photo, "root_path", None)
-    if root_path_value is None and photo.root is not None:
-        root_path_value = photo.root.path
+    if root_path_value is None and root is not None:
+        root_path_value = root.path
 
     if root_path_value is None:
         raise ValueError("Photo is missing root path information")
@@ -38,90 +106,293 @@ def _resolve_photo_path(photo: Photo) -> tuple[SimpleNamespace, Path]:
         id=photo.id,
         relative_path=relative_path,
         root_path=root_path,
-        root=photo.root,
+        root=root,
     )
     return proxy, absolute_path
 
 
-def _upsert_exif(session: Session, photo: Photo, exif_data: dict[str, object]) -> None:
-    """Create or update the ExifData record for a photo."""
+def _upsert_exif(
+    session: Session, exif_by_photo: dict[int, dict[str, object]], chunk_size: int
+) -> None:
+    """Create or update the ExifData records for a batch of photos."""
 
-    record = photo.exif or ExifData(photo_id=photo.id)
-    record.camera_make = exif_data.get("camera_make")
-    record.camera_model = exif_data.get("camera_model")
-    record.lens_model = exif_data.get("lens_model")
-    record.iso = exif_data.get("iso")
-    record.f_number = exif_data.get("f_number")
-    record.exposure_time = exif_data.get("exposure_time")
-    record.focal_length = exif_data.get("focal_length")
-    record.gps_lat = exif_data.get("gps_lat")
-    record.gps_lon = exif_data.get("gps_lon")
-    record.original_datetime = exif_data.get("original_datetime")
+    rows = [exif_row(photo_id, exif_data) for photo_id, exif_data in exif_by_photo.items()]
+    bulk_upsert_exif(session, rows, chunk_size)
 
-    if photo.exif is None:
-        session.add(record)
-        photo.exif = record
 
+def _init_worker(config: AppConfig) -> None:
+    """Install the application configuration in a worker process."""
 
-def _process_photo(session: Session, photo: Photo, config: AppConfig) -> None:
-    """Extract EXIF, update taken_at, and generate thumbnails for a single photo."""
+    global _worker_config
+    _worker_config = config
 
-    proxy, absolute_path = _resolve_photo_path(photo)
-    exif_data = extract_exif(absolute_path)
-    _upsert_exif(session, photo, exif_data)
 
-    photo.taken_at = guess_taken_at(absolute_path, exif_data)
+def _process_photo(task: IndexTask) -> IndexResult:
+    """Extract EXIF, guess taken_at, and generate thumbnails for a single photo.
 
-    ensure_thumbnails(proxy, config, sizes=["small"])
-    photo.thumb_status = "ready"
+    Runs inside a worker process and never touches the database; failures are
+    reported through the returned result so the writer can flag the photo.
+    """
 
+    if _worker_config is None:
+        raise RuntimeError("Indexing worker not initialized")
 
-def process_photos_in_batches(
-    photos: Iterable[Photo],
-    batch_size: int,
-    processor: Callable[[Photo], None],
-) -> None:
-    """Process photos in batches, logging progress after each batch."""
+    result = IndexResult(photo_id=task.id)
+    try:
+        proxy, absolute_path = _resolve_photo_path(task)
+        try:
+            ingested = ingest_image(proxy, _worker_config, sizes=["small"])
+            exif_data = ingested.exif
+            result.thumbnails = ingested.encoded
+            result.phash = ingested.phash
+        except Exception:  # noqa: BLE001
+            result.thumb_status = "error"
+            result.error = traceback.format_exc()
+            exif_data = extract_exif(absolute_path)
+        result.exif = exif_data
+        result.taken_at = guess_taken_at(absolute_path, exif_data)
+    except Exception:  # noqa: BLE001
+        result.thumb_status = "error"
+        result.error = traceback.format_exc()
+    return result
 
-    batch: list[Photo] = []
-    processed = 0
 
-    for photo in photos:
-        batch.append(photo)
-        if len(batch) >= batch_size:
-            for item in batch:
-                processor(item)
-                processed += 1
-            logger.info("Processed %s photos", processed)
-            batch.clear()
+def _apply_results(session: Session, results: list[IndexResult], chunk_size: int) -> None:
+    """Write a batch of worker results to the database."""
 
-    if batch:
-        for item in batch:
-            processor(item)
-            processed += 1
-        logger.info("Processed %s photos", processed)
+    existing_ids = set(
+        session.scalars(
+            select(Photo.id).where(Photo.id.in_([result.photo_id for result in results]))
+        )
+    )
 
+    exif_by_photo: dict[int, dict[str, object]] = {}
+    photo_rows: list[dict[str, object]] = []
+    for result in results:
+        if result.photo_id not in existing_ids:
+            logger.warning("Photo id=%s disappeared during indexing", result.photo_id)
+            continue
+        if result.error is not None:
+            logger.error("Failed to index photo id=%s\n%s", result.photo_id, result.error)
+        row: dict[str, object] = {"id": result.photo_id, "thumb_status": result.thumb_status}
+        if result.exif is not None:
+            exif_by_photo[result.photo_id] = result.exif
+            row["taken_at"] = result.taken_at
+        if result.phash is not None:
+            row["phash"] = result.phash
+        photo_rows.append(row)
+
+    _upsert_exif(session, exif_by_photo, chunk_size)
+    bulk_update_photos(session, photo_rows, chunk_size)
+
+
+class _ResultWriter(threading.Thread):
+    """Single writer thread that applies worker results in batched transactions."""
+
+    def __init__(
+        self,
+        results: queue.Queue,
+        batch_size: int,
+        chunk_size: int,
+        stats: _PipelineStats,
+        thumb_store: PackedThumbnailStore | None = None,
+        checkpoint: Callable[[int], None] | None = None,
+    ):
+        super().__init__(name="index-writer", daemon=True)
+        self._results = results
+        self._batch_size = batch_size
+        self._chunk_size = chunk_size
+        self._stats = stats
+        self._thumb_store = thumb_store
+        self._checkpoint = checkpoint
+        # Ids of tasks handed to the workers and not yet covered by a
+        # checkpoint, in submission (id) order; appended by the producer.
+        self.submitted: deque[int] = deque()
+        self._committed: set[int] = set()
+        self.error: BaseException | None = None
+
+    def run(self) -> None:
+        batch: list[IndexResult] = []
+        try:
+            while (item := self._results.get()) is not _SENTINEL:
+                batch.append(item)
+                if len(batch) >= self._batch_size:
+                    self._write(batch)
+                    batch = []
+            if batch:
+                self._write(batch)
+        except BaseException as exc:  # noqa: BLE001
+            self.error = exc
+
+    def _write(self, batch: list[IndexResult]) -> None:
+        start = perf_counter()
+        if self._thumb_store is not None:
+            for result in batch:
+                for label, data in result.thumbnails.items():
+                    self._thumb_store.put(result.photo_id, label, data)
+        with get_session() as session:
+            _apply_results(session, batch, self._chunk_size)
+        self._stats.write_seconds += perf_counter() - start
+        self._stats.written += len(batch)
+        if self._checkpoint is not None:
+            self._advance_checkpoint(batch)
+        logger.info(
+            "Processed %s photos (extract: %.1f photos/s on %s workers, write: %.1f photos/s)",
+            self._stats.written,
+            self._stats.extract_rate(),
+            self._stats.workers,
+            self._stats.write_rate(),
+        )
 
-def index_new_photos(config: AppConfig) -> None:
-    """Index photos missing EXIF or thumbnails and update their metadata."""
+    def _advance_checkpoint(self, batch: list[IndexResult]) -> None:
+        """Report the highest task id up to which every task has been committed.
+
+        Workers finish out of order, so the checkpoint trails the newest
+        write until all earlier tasks are in.
+        """
+
+        self._committed.update(result.photo_id for result in batch)
+        low_water = None
+        while self.submitted and self.submitted[0] in self._committed:
+            low_water = self.submitted.popleft()
+            self._committed.discard(low_water)
+        if low_water is not None:
+            self._checkpoint(low_water)
+
+
+def _iter_extracted(
+    executor: Executor, tasks: Iterable[IndexTask], window: int
+) -> Iterator[IndexResult]:
+    """Submit tasks to the pool keeping at most `window` in flight, yielding results."""
+
+    pending: set = set()
+    for task in tasks:
+        pending.add(executor.submit(_process_photo, task))
+        if len(pending) >= window:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+
+_NEEDS_INDEXING = or_(Photo.thumb_status == "none", Photo.taken_at.is_(None))
+
+
+def _load_index_tasks(
+    session: Session, after_id: int = 0, limit: int | None = None
+) -> list[IndexTask]:
+    rows = session.execute(
+        select(Photo.id, Photo.relative_path, Root.path)
+        .join(Root, Root.id == Photo.root_id)
+        .where(Photo.id > after_id, _NEEDS_INDEXING)
+        .order_by(Photo.id)
+        .limit(limit)
+    )
+    return [IndexTask(id=row[0], relative_path=row[1], root_path=row[2]) for row in rows]
 
-    with get_session() as session:
-        photos = (
-            session.query(Photo)
-            .filter(or_(Photo.thumb_status == "none", Photo.taken_at.is_(None)))
-            .order_by(Photo.id)
-            .all()
-        )
 
-        if not photos:
-            logger.info("No photos require indexing")
+def _iter_index_tasks(after_id: int, page_size: int) -> Iterator[IndexTask]:
+    """Stream photos needing indexing in id order, reading one keyset page per session.
+
+    Short read sessions keep no snapshot open while the writer commits, and
+    only one page of tasks is held at a time.
+    """
+
+    last_id = after_id
+    while True:
+        with get_session() as session:
+            page = _load_index_tasks(session, last_id, page_size)
+        if not page:
             return
+        last_id = page[-1].id
+        yield from page
+
 
-        def _handler(target: Photo) -> None:
-            try:
-                _process_photo(session, target, config)
-            except Exception:  # noqa: BLE001
-                logger.exception("Failed to index photo id=%s", target.id)
-                target.thumb_status = "error"
+def index_new_photos(
+    config: AppConfig,
+    progress: ProgressCallback | None = None,
+    *,
+    after_id: int = 0,
+    checkpoint: Callable[[int], None] | None = None,
+) -> None:
+    """Index photos missing EXIF or thumbnails and update their metadata.
+
+    EXIF extraction and thumbnail generation run in a process pool sized by
+    `config.jobs.max_workers`; a single writer thread applies the results to
+    the database in batched transactions. `progress` is called after every
+    write batch worth of extracted photos; if it raises (e.g. `JobCancelled`),
+    results already extracted are still written before the error propagates.
+
+    Candidates are streamed in id order one keyset page (`INDEX_PAGE_SIZE`)
+    at a time, so memory stays flat however large the library. After each
+    committed batch `checkpoint` receives the id up to which every photo has
+    been written; passing it back as `after_id` resumes an interrupted run
+    without revisiting them.
+    """
+
+    with get_session() as session:
+        total = session.scalar(
+            select(func.count()).select_from(Photo).where(Photo.id > after_id, _NEEDS_INDEXING)
+        )
+
+    if not total:
+        logger.info("No photos require indexing")
+        return
+
+    workers = config.jobs.max_workers
+    stats = _PipelineStats(workers=workers)
+    results: queue.Queue = queue.Queue()
+    writer = _ResultWriter(
+        results,
+        batch_size=WRITE_BATCH_SIZE,
+        chunk_size=config.database.bulk_chunk_size,
+        stats=stats,
+        thumb_store=get_packed_store(config) if config.thumbnails.store == "packed" else None,
+        checkpoint=checkpoint,
+    )
+    writer.start()
+
+    def submitted_tasks() -> Iterator[IndexTask]:
+        for task in _iter_index_tasks(after_id, INDEX_PAGE_SIZE):
+            writer.submitted.append(task.id)
+            yield task
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(config,)
+        ) as executor:
+            window = workers * _TASKS_PER_WORKER
+            for result in _iter_extracted(executor, submitted_tasks(), window=window):
+                if writer.error is not None:
+                    break
+                stats.extracted += 1
+                results.put(result)
+                if progress is not None and stats.extracted % WRITE_BATCH_SIZE == 0:
+                    progress(
+                        min(stats.extracted / total, 1.0),
+                        f"Indexed {stats.extracted} of {total} photos",
+                    )
+    finally:
+        results.put(_SENTINEL)
+        writer.join()
+
+    if writer.error is not None:
+        raise RuntimeError("Index writer failed") from writer.error
+
+
+def register_index_job(job_manager: JobManager, config: AppConfig) -> None:
+    """Register the `index_photos` job; enqueue it with `JobPriority.BULK`."""
+
+    def run(payload: dict, context: JobContext) -> None:
+        index_new_photos(
+            config,
+            progress=context,
+            after_id=(context.checkpoint or {}).get("after_id", 0),
+            checkpoint=lambda after_id: context.save_checkpoint({"after_id": after_id}),
+        )
 
-        process_photos_in_batches(photos, batch_size=50, processor=_handler)
+    job_manager.register(JOB_TYPE, run)
@@ -0,0 +1,118 @@
+"""SQLite persistence for the job queue, so interrupted jobs resume after a restart."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, or_, select, update
+
+from src.core.db import get_session
+from src.core.models import JobRecord
+from src.services.jobs import Job
+
+
+logger = logging.getLogger(__name__)
+
+_UNFINISHED = ("queued", "running")
+
+
+class JobStore:
+    """Mirror job state into the `jobs` table.
+
+    Only status transitions and checkpoints are written; progress reported
+    between checkpoints stays in memory. Each call uses its own short
+    transaction, so it is safe from job worker threads.
+    """
+
+    def add(self, job: Job) -> int:
+        with get_session() as session:
+            record = JobRecord(
+                job_type=job.job_type,
+                payload=job.payload,
+                priority=int(job.priority),
+                status=job.status,
+                created_at=job.created_at,
+                updated_at=job.created_at,
+            )
+            session.add(record)
+            session.flush()
+            return record.id
+
+    def save(self, job: Job) -> None:
+        """Persist the job's status, progress and message."""
+
+        now = datetime.utcnow()
+        with get_session() as session:
+            session.execute(
+                update(JobRecord)
+                .where(JobRecord.id == job.id)
+                .values(
+                    status=job.status,
+                    progress=job.progress,
+                    message=job.message,
+                    error=job.error,
+                    updated_at=now,
+                    finished_at=now if job.finished else None,
+                )
+            )
+
+    def save_checkpoint(self, job: Job) -> None:
+        """Persist the job's checkpoint together with its current progress."""
+
+        with get_session() as session:
+            session.execute(
+                update(JobRecord)
+                .where(JobRecord.id == job.id)
+                .values(
+                    checkpoint=job.checkpoint,
+                    progress=job.progress,
+                    message=job.message,
+                    updated_at=datetime.utcnow(),
+                )
+            )
+
+    def load_unfinished(self) -> list[Job]:
+        """Return queued and interrupted jobs in scheduling order, ready to be re-queued."""
+
+        with get_session() as session:
+            records = session.scalars(
+                select(JobRecord)
+                .where(JobRecord.status.in_(_UNFINISHED))
+                .order_by(JobRecord.priority, JobRecord.id)
+            ).all()
+            jobs = []
+            for record in records:
+                jobs.append(
+                    Job(
+                        job_type=record.job_type,
+                        payload=dict(record.payload or {}),
+                        priority=record.priority,
+                        id=record.id,
+                        progress=record.progress,
+                        message=record.message,
+                        created_at=record.created_at,
+                        checkpoint=record.checkpoint,
+                    )
+                )
+                if record.status == "running":
+                    # The process stopped without recording an interruption.
+                    record.status = "queued"
+            return jobs
+
+    def compact(self, failed_retention: timedelta) -> int:
+        """Delete finished and cancelled jobs, and failed jobs older than `failed_retention`."""
+
+        cutoff = datetime.utcnow() - failed_retention
+        with get_session() as session:
+            result = session.execute(
+                delete(JobRecord).where(
+                    or_(
+                        JobRecord.status.in_(("done", "cancelled")),
+                        (JobRecord.status == "error") & (JobRecord.finished_at < cutoff),
+                    )
+                )
+            )
+            removed = result.rowcount or 0
+        if removed:
+            logger.info("Compacted %s finished jobs", removed)
+        return removed
@@ -1,40 +1,394 @@
-"""In-memory job manager for background tasks."""
+"""Prioritized background job scheduler with progress reporting, cancellation and checkpoints."""
 from __future__ import annotations
 
+import heapq
+import itertools
+import logging
+import threading
+import traceback
 from dataclasses import dataclass, field
-from typing import Callable, Dict, List
+from datetime import datetime, timedelta
+from enum import IntEnum
+from typing import TYPE_CHECKING, Any, Callable, Dict, List
+
+from src.core.config import JobsConfig
+
+if TYPE_CHECKING:
+    from src.services.job_store import JobStore
+
+
+logger = logging.getLogger(__name__)
+
+# Handlers receive the job payload and a `JobContext`, which can be called as
+# `report(progress, message=None)` with progress as a fraction between 0 and 1.
+ProgressCallback = Callable[..., None]
+JobHandler = Callable[[dict, "JobContext"], Any]
+JobListener = Callable[["Job"], None]
+
+JOB_STATUSES = ("queued", "running", "done", "error", "cancelled")
+
+
+class JobPriority(IntEnum):
+    """Scheduling order of queued jobs; lower values run first."""
+
+    INTERACTIVE = 0
+    NORMAL = 50
+    BULK = 100
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler to stop a job whose cancellation was requested."""
+
+
+class CancellationToken:
+    """Flag a running handler polls to stop cooperatively."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise JobCancelled()
 
 
 @dataclass
 class Job:
     job_type: str
     payload: dict
+    priority: int = JobPriority.NORMAL
+    id: int = 0
     status: str = "queued"
     progress: float = 0.0
     message: str | None = None
+    result: Any = None
+    error: str | None = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    # Handler-defined state saved with `JobContext.save_checkpoint`; set when
+    # the job resumes after an interruption.
+    checkpoint: dict | None = None
+    cancel_token: CancellationToken = field(
+        default_factory=CancellationToken, repr=False, compare=False
+    )
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error", "cancelled")
+
+
+class JobContext:
+    """Progress reporting and cancellation handle passed to a running handler.
+
+    Calling the context reports progress, so handlers written against the
+    plain `report(progress, message=None)` callback keep working. Reporting
+    is also a cancellation point: it raises `JobCancelled` once the job has
+    been cancelled.
+
+    Long handlers call `save_checkpoint` after each committed unit of work
+    and read `checkpoint` on start, so a job interrupted by shutdown (or a
+    crash) resumes where it left off when the queue is persisted.
+    """
+
+    def __init__(
+        self, job: Job, notify: JobListener, store: "JobStore | None" = None
+    ) -> None:
+        self.job = job
+        self._notify = notify
+        self._store = store
+
+    @property
+    def checkpoint(self) -> dict | None:
+        return self.job.checkpoint
+
+    def __call__(self, progress: float, message: str | None = None) -> None:
+        self.report(progress, message)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.job.cancel_token.cancelled
+
+    def raise_if_cancelled(self) -> None:
+        self.job.cancel_token.raise_if_cancelled()
+
+    def report(self, progress: float, message: str | None = None) -> None:
+        self.raise_if_cancelled()
+        self.job.progress = min(max(progress, 0.0), 1.0)
+        if message is not None:
+            self.job.message = message
+        self._notify(self.job)
+
+    def save_checkpoint(self, state: dict, progress: float | None = None) -> None:
+        """Record resumable state (JSON-serializable) once the work it covers is committed.
+
+        Not a cancellation point, so it may be called from helper threads.
+        """
+
+        self.job.checkpoint = state
+        if progress is not None:
+            self.job.progress = min(max(progress, 0.0), 1.0)
+        if self._store is not None:
+            self._store.save_checkpoint(self.job)
 
 
 class JobManager:
-    def __init__(self):
+    """Run registered job handlers on a pool of worker threads.
+
+    Queued jobs run in `JobPriority` order (then submission order), on up to
+    `JobsConfig.max_workers` threads, so interactive work queued behind a
+    long reindex starts as soon as a worker frees up. Handlers run on threads
+    rather than processes because they close over application state; the
+    heavy lifting inside them (indexing, hashing) uses its own pools.
+
+    Job types registered as `exclusive` run one job at a time; further jobs
+    of that type wait in the queue while later jobs of other types start.
+
+    Listeners added with `add_listener` are called from worker threads with
+    the job after every status or progress change. `jobs` holds every
+    unfinished job and the last `JobsConfig.finished_jobs_kept` finished ones.
+
+    With a `JobStore` every job is mirrored into the `jobs` table: ids come
+    from the table, status transitions and checkpoints are written through,
+    and `resume_pending` re-queues whatever a previous run left unfinished.
+    """
+
+    def __init__(
+        self, config: JobsConfig | None = None, store: "JobStore | None" = None
+    ) -> None:
+        config = config or JobsConfig()
         self.jobs: List[Job] = []
-        self.handlers: Dict[str, Callable[[dict], None]] = {}
+        self.handlers: Dict[str, JobHandler] = {}
+        self._exclusive: set[str] = set()
+        self.max_workers = config.max_workers
+        self.store = store
+        self._failed_retention = timedelta(days=config.failed_retention_days)
+        self._finished_kept = config.finished_jobs_kept
+        self._listeners: List[JobListener] = []
+        self._queue: list[tuple[int, int, Job]] = []
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._workers: list[threading.Thread] = []
+        self._running = 0
+        self._stopping = False
+        self._interrupting = False
 
-    def register(self, job_type: str, handler: Callable[[dict], None]) -> None:
+    def register(self, job_type: str, handler: JobHandler, *, exclusive: bool = False) -> None:
         self.handlers[job_type] = handler
+        if exclusive:
+            self._exclusive.add(job_type)
+        else:
+            self._exclusive.discard(job_type)
 
-    def enqueue(self, job_type: str, payload: dict) -> Job:
-        job = Job(job_type=job_type, payload=payload)
-        self.jobs.append(job)
+    def add_listener(self, listener: JobListener) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: JobListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def enqueue(
+        self, job_type: str, payload: dict, priority: int = JobPriority.NORMAL
+    ) -> Job:
+        job = Job(job_type=job_type, payload=payload, priority=priority)
+        job.id = self.store.add(job) if self.store is not None else next(self._ids)
+        self._push(job)
         return job
 
+    def resume_pending(self) -> list[Job]:
+        """Compact the persisted queue and re-queue the jobs a previous run left unfinished."""
+
+        if self.store is None:
+            return []
+        self.store.compact(self._failed_retention)
+        jobs = self.store.load_unfinished()
+        for job in jobs:
+            if job.checkpoint is not None:
+                job.message = "Resuming"
+            self._push(job)
+        return jobs
+
+    def get(self, job_id: int) -> Job | None:
+        with self._condition:
+            return next((job for job in self.jobs if job.id == job_id), None)
+
+    def cancel(self, job: Job) -> None:
+        """Cancel a queued job, or ask a running one to stop at its next check."""
+
+        with self._condition:
+            if job.finished:
+                return
+            job.cancel_token.cancel()
+            if job.status != "queued":
+                return
+            job.status = "cancelled"
+            self._prune_finished()
+            self._condition.notify_all()
+        self._persist(job)
+        self._notify(job)
+
+    def start(self) -> None:
+        """Start the worker threads; jobs enqueued before or after then run in the background."""
+
+        with self._condition:
+            self._stopping = False
+            self._interrupting = False
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(
+                    target=self._work, name=f"job-worker-{len(self._workers)}", daemon=True
+                )
+                self._workers.append(worker)
+                worker.start()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until no job is queued or running; returns False on timeout."""
+
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._has_queued() and self._running == 0, timeout
+            )
+
     def run_all(self) -> None:
-        for job in self.jobs:
-            handler = self.handlers.get(job.job_type)
-            if not handler:
-                job.status = "error"
-                job.message = "No handler registered"
-                continue
-            job.status = "running"
-            handler(job.payload)
+        """Run every queued job on the worker pool and wait for them to finish.
+
+        Workers started here are stopped again afterwards, so scripts can use
+        the manager without calling `start` and `shutdown` themselves.
+        """
+
+        already_started = any(worker.is_alive() for worker in self._workers)
+        self.start()
+        self.wait()
+        if not already_started:
+            self.shutdown()
+
+    def shutdown(self, wait: bool = True, interrupt: bool = False) -> None:
+        """Stop the workers once their current jobs finish.
+
+        With `interrupt`, running jobs are asked to stop at their next
+        cancellation point and are put back in the queue, keeping their last
+        checkpoint; with a store they resume on the next `resume_pending`.
+        """
+
+        with self._condition:
+            if interrupt:
+                self._interrupting = True
+                for job in self.jobs:
+                    if job.status == "running":
+                        job.cancel_token.cancel()
+            self._stopping = True
+            self._condition.notify_all()
+            workers = list(self._workers)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def _prune_finished(self) -> None:
+        """Drop all but the newest `_finished_kept` finished jobs; call with the lock held."""
+
+        finished = [job for job in self.jobs if job.finished]
+        excess = len(finished) - self._finished_kept
+        if excess > 0:
+            dropped = {id(job) for job in finished[:excess]}
+            self.jobs = [job for job in self.jobs if id(job) not in dropped]
+
+    def _has_queued(self) -> bool:
+        return any(job.status == "queued" for _, _, job in self._queue)
+
+    def _next_job(self) -> Job | None:
+        with self._condition:
+            while True:
+                while self._queue and self._queue[0][2].status != "queued":
+                    heapq.heappop(self._queue)
+                if self._stopping:
+                    return None
+                job = self._pop_runnable()
+                if job is not None:
+                    job.status = "running"
+                    self._running += 1
+                    return job
+                self._condition.wait()
+
+    def _pop_runnable(self) -> Job | None:
+        """Pop the first queued job not held back by a running exclusive job; call locked."""
+
+        busy = {
+            job.job_type
+            for job in self.jobs
+            if job.status == "running" and job.job_type in self._exclusive
+        }
+        if not busy:
+            return heapq.heappop(self._queue)[2] if self._queue else None
+        for entry in sorted(self._queue):
+            if entry[2].status == "queued" and entry[2].job_type not in busy:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                return entry[2]
+        return None
+
+    def _push(self, job: Job) -> None:
+        with self._condition:
+            self.jobs.append(job)
+            heapq.heappush(self._queue, (job.priority, job.id, job))
+            self._condition.notify()
+        self._notify(job)
+
+    def _work(self) -> None:
+        while (job := self._next_job()) is not None:
+            self._persist(job)
+            self._notify(job)
+            try:
+                self._run(job)
+            finally:
+                with self._condition:
+                    self._running -= 1
+                    self._prune_finished()
+                    self._condition.notify_all()
+            self._persist(job)
+            self._notify(job)
+
+    def _run(self, job: Job) -> None:
+        handler = self.handlers.get(job.job_type)
+        if not handler:
+            job.status = "error"
+            job.message = "No handler registered"
+            return
+        try:
+            job.result = handler(job.payload, JobContext(job, self._notify, self.store))
+        except JobCancelled:
+            if self._interrupting:
+                job.status = "queued"
+                job.message = "Interrupted"
+                job.cancel_token = CancellationToken()
+                with self._condition:
+                    heapq.heappush(self._queue, (job.priority, job.id, job))
+            else:
+                job.status = "cancelled"
+                job.message = "Cancelled"
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Job %s (%s) failed", job.id, job.job_type)
+            job.status = "error"
+            job.message = str(exc) or type(exc).__name__
+            job.error = traceback.format_exc()
+        else:
             job.status = "done"
             job.progress = 1.0
+
+    def _persist(self, job: Job) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.save(job)
+        except Exception:  # noqa: BLE001
+            logger.exception("Unable to persist job %s", job.id)
+
+    def _notify(self, job: Job) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(job)
+            except Exception:  # noqa: BLE001
+                logger.exception("Job listener failed")
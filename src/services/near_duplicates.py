@@ -0,0 +1,137 @@
+"""Detection of visually similar photos through perceptual hashes."""
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.core.bulk import bulk_update_photos
+from src.core.config import AppConfig
+from src.core.db import get_session
+from src.core.models import Photo
+from src.core.phash import DEFAULT_RADIUS, PerceptualHashIndex
+from src.core.thumb_store import get_packed_store
+from src.core.thumbnails import get_thumbnail_path, thumbnail_phash
+from src.services.jobs import JobManager, ProgressCallback
+
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPE = "find_near_duplicates"
+
+# Photos whose small thumbnail is hashed per backfill transaction.
+BACKFILL_BATCH_SIZE = 2000
+
+
+def load_phash_index(session: Session, root_ids: list[int] | None = None) -> PerceptualHashIndex:
+    """Load the perceptual hashes of active photos into a searchable index."""
+
+    stmt = select(Photo.id, Photo.phash).where(
+        Photo.status == "active", Photo.phash.is_not(None)
+    )
+    if root_ids:
+        stmt = stmt.where(Photo.root_id.in_(root_ids))
+    rows = session.execute(stmt).all()
+    return PerceptualHashIndex([row[0] for row in rows], [row[1] for row in rows])
+
+
+def find_near_duplicates(
+    session: Session, *, radius: int = DEFAULT_RADIUS, root_ids: list[int] | None = None
+) -> list[list[int]]:
+    """Group active photos whose perceptual hashes lie within `radius` bits of each other.
+
+    Groups are transitive (burst shots drifting a bit per frame end up in one
+    group) and sorted largest first; each group lists photo ids in ascending order.
+    """
+
+    index = load_phash_index(session, root_ids)
+    groups = index.near_duplicate_groups(radius)
+    logger.info(
+        "Found %s near-duplicate groups among %s hashed photos", len(groups), len(index)
+    )
+    return groups
+
+
+def find_similar(
+    session: Session, photo_id: int, *, radius: int = DEFAULT_RADIUS
+) -> list[tuple[int, int]]:
+    """Return `(photo_id, distance)` for photos similar to the given one, nearest first."""
+
+    phash = session.scalar(select(Photo.phash).where(Photo.id == photo_id))
+    if phash is None:
+        return []
+    matches = load_phash_index(session).similar_to(phash, radius)
+    return [(match_id, distance) for match_id, distance in matches if match_id != photo_id]
+
+
+def backfill_phashes(config: AppConfig, max_workers: int | None = None) -> int:
+    """Hash the existing small thumbnails of photos indexed before phashes were stored.
+
+    Returns the number of photos that received a hash.
+    """
+
+    store = get_packed_store(config) if config.thumbnails.store == "packed" else None
+
+    def compute(photo_id: int) -> int | None:
+        try:
+            if store is not None:
+                data = store.get(photo_id, "small")
+                return None if data is None else thumbnail_phash(BytesIO(data))
+            path = get_thumbnail_path(photo_id, "small", config)
+            return thumbnail_phash(path) if path.exists() else None
+        except OSError:
+            logger.warning("Unable to hash thumbnail of photo id=%s", photo_id, exc_info=True)
+            return None
+
+    chunk_size = config.database.bulk_chunk_size
+    updated = 0
+    last_id = 0
+    with ThreadPoolExecutor(
+        max_workers=max_workers or config.jobs.max_workers, thread_name_prefix="phash"
+    ) as executor:
+        while True:
+            with get_session() as session:
+                photo_ids = list(
+                    session.scalars(
+                        select(Photo.id)
+                        .where(
+                            Photo.id > last_id,
+                            Photo.phash.is_(None),
+                            Photo.thumb_status == "ready",
+                        )
+                        .order_by(Photo.id)
+                        .limit(BACKFILL_BATCH_SIZE)
+                    )
+                )
+                if not photo_ids:
+                    break
+                last_id = photo_ids[-1]
+                rows = [
+                    {"id": photo_id, "phash": phash}
+                    for photo_id, phash in zip(photo_ids, executor.map(compute, photo_ids))
+                    if phash is not None
+                ]
+                bulk_update_photos(session, rows, chunk_size)
+                updated += len(rows)
+    logger.info("Backfilled perceptual hashes for %s photos", updated)
+    return updated
+
+
+def register_near_duplicate_job(job_manager: JobManager, config: AppConfig) -> None:
+    """Register the `find_near_duplicates` job; its payload may carry `radius` and `root_ids`."""
+
+    def run(payload: dict, report: ProgressCallback) -> list[list[int]]:
+        report(0.0, "Hashing thumbnails")
+        backfill_phashes(config)
+        report(0.5, "Comparing perceptual hashes")
+        with get_session() as session:
+            return find_near_duplicates(
+                session,
+                radius=payload.get("radius", DEFAULT_RADIUS),
+                root_ids=payload.get("root_ids"),
+            )
+
+    job_manager.register(JOB_TYPE, run)
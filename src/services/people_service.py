@@ -8,8 +8,10 @@ from src.core.models import Face, Person
 
 
 def merge_people(source: Person, target: Person) -> Person:
-    """Mark source as merged into target."""
+    """Mark source as merged into target and move its faces over."""
     source.merged_into_id = target.id
+    for face in list(source.faces):
+        face.person = target
     return target
 
 
@@ -25,4 +27,4 @@ class PersonSummary:
 
 
 def get_person_summaries(persons: Iterable[Person]) -> list[PersonSummary]:
-    return [PersonSummary(person=p, faces=[]) for p in persons]
+    return [PersonSummary(person=p, faces=list(p.faces)) for p in persons]
@@ -1,74 +1,223 @@
 """Filesystem scanning utilities for photo roots."""
 from __future__ import annotations
 
+import logging
+import os
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Iterable
 
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
+from src.core.bulk import bulk_insert_photos, bulk_update_photos
 from src.core.config import AppConfig
-from src.core.models import Photo, Root
+from src.core.models import Photo, Root, ScannedDirectory
 
 
-def _normalize_extensions(extensions: Iterable[str]) -> set[str]:
-    return {ext.lower() for ext in extensions}
+logger = logging.getLogger(__name__)
 
 
-def _iter_photo_files(root_path: Path, extensions: set[str]) -> Iterable[Path]:
-    for path in root_path.rglob("*"):
-        if not path.is_file():
-            continue
-        if path.suffix.lower() not in extensions:
-            continue
-        yield path
+@dataclass
+class ScanStats:
+    """Counters describing the work done by a single `scan_root` call."""
+
+    files_seen: int = 0
+    directories_scanned: int = 0
+    directories_skipped: int = 0
+    added: int = 0
+    updated: int = 0
+    missing: int = 0
 
 
-def _relative_posix_path(path: Path, base: Path) -> str:
-    return path.relative_to(base).as_posix()
+class _PhotoWriteBuffer:
+    """Collects photo inserts and updates across directories and writes them in bulk."""
 
+    def __init__(self, session: Session, chunk_size: int):
+        self._session = session
+        self._chunk_size = chunk_size
+        self._inserts: list[dict[str, object]] = []
+        self._updates: list[dict[str, object]] = []
 
-def scan_root(root: Root, config: AppConfig, session: Session) -> None:
-    """Scan a root directory and sync photo records in the database."""
+    def insert(self, row: dict[str, object]) -> None:
+        self._inserts.append(row)
+        if len(self._inserts) >= self._chunk_size:
+            bulk_insert_photos(self._session, self._inserts, self._chunk_size)
+            self._inserts = []
 
+    def update(self, row: dict[str, object]) -> None:
+        self._updates.append(row)
+        if len(self._updates) >= self._chunk_size:
+            bulk_update_photos(self._session, self._updates, self._chunk_size)
+            self._updates = []
+
+    def flush(self) -> None:
+        if self._inserts:
+            bulk_insert_photos(self._session, self._inserts, self._chunk_size)
+            self._inserts = []
+        if self._updates:
+            bulk_update_photos(self._session, self._updates, self._chunk_size)
+            self._updates = []
+
+
+def _normalize_extensions(extensions: Iterable[str]) -> set[str]:
+    return {ext.lower() if ext.startswith(".") else f".{ext.lower()}" for ext in extensions}
+
+
+def _join_relative(parent: str, name: str) -> str:
+    return f"{parent}/{name}" if parent else name
+
+
+def _list_directory(
+    directory: str, extensions: set[str]
+) -> tuple[dict[str, tuple[int, int]], list[str]]:
+    """List a directory once, returning `{filename: (size, mtime)}` and subdirectory names.
+
+    Stat results come from the `DirEntry` objects, which on Windows are filled
+    by the directory listing itself and need no extra system call.
+    """
+
+    files: dict[str, tuple[int, int]] = {}
+    subdirectories: list[str] = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.name)
+                    continue
+                if not entry.is_file():
+                    continue
+                if os.path.splitext(entry.name)[1].lower() not in extensions:
+                    continue
+                stat = entry.stat()
+            except OSError:
+                logger.debug("Skipping unreadable entry %s", entry.path, exc_info=True)
+                continue
+            files[entry.name] = (stat.st_size, int(stat.st_mtime))
+    return files, subdirectories
+
+
+def _sync_directory(
+    session: Session,
+    root: Root,
+    relative_dir: str,
+    files: dict[str, tuple[int, int]],
+    writes: _PhotoWriteBuffer,
+    stats: ScanStats,
+) -> None:
+    """Reconcile the photos stored for one directory with its current listing."""
+
+    prefix = f"{relative_dir}/" if relative_dir else ""
+    stmt = select(Photo.id, Photo.relative_path, Photo.filesize, Photo.mtime, Photo.status).where(
+        Photo.root_id == root.id,
+        func.instr(func.substr(Photo.relative_path, len(prefix) + 1), "/") == 0,
+    )
+    if prefix:
+        # Range scan over the (root_id, relative_path) index instead of LIKE.
+        stmt = stmt.where(
+            Photo.relative_path >= prefix, Photo.relative_path < f"{relative_dir}0"
+        )
+
+    remaining = dict(files)
+    for photo_id, relative_path, filesize, mtime, status in session.execute(stmt):
+        current = remaining.pop(relative_path[len(prefix):], None)
+        if current is None:
+            if status != "missing":
+                writes.update({"id": photo_id, "status": "missing"})
+                stats.missing += 1
+            continue
+        if (filesize, mtime) != current or status == "missing":
+            writes.update(
+                {"id": photo_id, "filesize": current[0], "mtime": current[1], "status": "active"}
+            )
+            stats.updated += 1
+
+    imported_at = datetime.utcnow()
+    for filename, (filesize, mtime) in remaining.items():
+        writes.insert(
+            {
+                "root_id": root.id,
+                "relative_path": prefix + filename,
+                "filename": filename,
+                "filesize": filesize,
+                "mtime": mtime,
+                "status": "active",
+                "imported_at": imported_at,
+                "thumb_status": "none",
+            }
+        )
+        stats.added += 1
+
+
+def scan_root(root: Root, config: AppConfig, session: Session, *, full: bool = False) -> ScanStats:
+    """Scan a root directory and sync photo records in the database.
+
+    Directories whose modification time matches the previous scan are not
+    listed again; only their known subdirectories are visited. A directory's
+    mtime changes when entries are added, removed or renamed but not when a
+    file is rewritten in place, so pass `full=True` to re-stat every file.
+    """
+
+    stats = ScanStats()
     base_path = Path(root.path)
     if not base_path.is_dir():
-        return
+        return stats
 
     extensions = _normalize_extensions(config.supported_extensions)
+    writes = _PhotoWriteBuffer(session, config.database.bulk_chunk_size)
+
+    known_dirs = {
+        state.relative_path: state
+        for state in session.scalars(
+            select(ScannedDirectory).where(ScannedDirectory.root_id == root.id)
+        )
+    }
+    known_children: dict[str, list[str]] = defaultdict(list)
+    for relative_dir in known_dirs:
+        if relative_dir:
+            known_children[relative_dir.rpartition("/")[0]].append(relative_dir)
+
+    visited: set[str] = set()
+    pending = [""]
+    while pending:
+        relative_dir = pending.pop()
+        absolute_dir = os.path.join(base_path, relative_dir)
+        try:
+            mtime_ns = os.stat(absolute_dir).st_mtime_ns
+        except OSError:
+            continue
+        visited.add(relative_dir)
 
-    existing_photos = session.query(Photo).filter_by(root_id=root.id).all()
-    photos_by_relpath = {photo.relative_path: photo for photo in existing_photos}
-    seen_paths: set[str] = set()
-
-    for file_path in _iter_photo_files(base_path, extensions):
-        relative_path = _relative_posix_path(file_path, base_path)
-        seen_paths.add(relative_path)
+        state = known_dirs.get(relative_dir)
+        if not full and state is not None and state.mtime_ns == mtime_ns:
+            stats.directories_skipped += 1
+            pending.extend(known_children.get(relative_dir, ()))
+            continue
 
-        stat = file_path.stat()
-        filesize = stat.st_size
-        mtime = int(stat.st_mtime)
+        try:
+            files, subdirectories = _list_directory(absolute_dir, extensions)
+        except OSError:
+            logger.warning("Unable to list directory %s", absolute_dir, exc_info=True)
+            continue
 
-        photo = photos_by_relpath.get(relative_path)
-        if photo is None:
+        stats.directories_scanned += 1
+        stats.files_seen += len(files)
+        _sync_directory(session, root, relative_dir, files, writes, stats)
+        if state is None:
             session.add(
-                Photo(
-                    root_id=root.id,
-                    relative_path=relative_path,
-                    filename=file_path.name,
-                    filesize=filesize,
-                    mtime=mtime,
-                    status="active",
-                    imported_at=datetime.utcnow(),
-                    thumb_status="none",
-                )
+                ScannedDirectory(root_id=root.id, relative_path=relative_dir, mtime_ns=mtime_ns)
             )
         else:
-            photo.filesize = filesize
-            photo.mtime = mtime
-            if photo.status == "missing":
-                photo.status = "active"
-
-    for photo in existing_photos:
-        if photo.relative_path not in seen_paths:
-            photo.status = "missing"
+            state.mtime_ns = mtime_ns
+            state.scanned_at = datetime.utcnow()
+        pending.extend(_join_relative(relative_dir, name) for name in subdirectories)
+
+    for relative_dir, state in known_dirs.items():
+        if relative_dir not in visited:
+            _sync_directory(session, root, relative_dir, {}, writes, stats)
+            session.delete(state)
+
+    writes.flush()
+    return stats
@@ -0,0 +1,280 @@
+"""Two-tier thumbnail cache: an in-memory LRU of encoded bytes over the on-disk thumbnails."""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.core.config import AppConfig
+from src.core.models import Photo
+from src.core.thumb_store import PackedThumbnailStore, get_packed_store
+from src.core.thumbnails import (
+    VALID_SIZE_LABELS,
+    generate_thumbnail,
+    get_thumbnail_path,
+    render_thumbnail_bytes,
+)
+
+
+logger = logging.getLogger(__name__)
+
+_MIB = 1024 * 1024
+_DAY_SECONDS = 86400
+
+CacheKey = tuple[int, str]
+
+
+@dataclass
+class CacheStats:
+    """Hit, miss and eviction counters for a `ThumbnailCache`."""
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    memory_evictions: int = 0
+    disk_evictions: int = 0
+    memory_bytes: int = 0
+    disk_bytes: int = 0
+
+
+@dataclass
+class _DiskEntry:
+    size: int
+    last_used: float
+
+
+class ThumbnailCache:
+    """Serve thumbnail JPEG bytes from memory, then disk, generating them on a miss.
+
+    The disk tier keeps an index of `cache_dir/thumbs` built with a single
+    directory listing, so lookups do not stat the file system; thumbnails
+    written since (by the indexer) join it when first read. Files are read
+    and touched outside the lock, so disk hits on worker threads do not
+    wait for each other. Both tiers are
+    bounded: memory by `thumbnails.memory_cache_mb`, disk by
+    `thumbnails.disk_cache_mb` and `thumbnails.max_age_days` (last use, which
+    survives restarts through the file modification time). All methods are
+    safe to call from worker threads.
+
+    With `thumbnails.store: packed` the disk tier is the pack store instead:
+    hits are zero-copy memoryviews into its memory maps (already backed by the
+    OS page cache, so they skip the memory tier), and space is reclaimed by
+    compaction rather than eviction.
+    """
+
+    def __init__(
+        self,
+        config: AppConfig,
+        *,
+        memory_limit_bytes: int | None = None,
+        disk_limit_bytes: int | None = None,
+    ) -> None:
+        self._config = config
+        self._thumbs_dir = Path(config.cache_dir) / "thumbs"
+        settings = config.thumbnails
+        if memory_limit_bytes is None:
+            memory_limit_bytes = settings.memory_cache_mb * _MIB
+        self._memory_limit = memory_limit_bytes
+        self._disk_limit = (
+            disk_limit_bytes if disk_limit_bytes is not None else settings.disk_cache_mb * _MIB
+        )
+        self._max_age = settings.max_age_days * _DAY_SECONDS
+
+        self._lock = threading.RLock()
+        self._memory: OrderedDict[CacheKey, bytes] = OrderedDict()
+        self._disk: OrderedDict[CacheKey, _DiskEntry] | None = None
+        self._store: PackedThumbnailStore | None = (
+            get_packed_store(config) if settings.store == "packed" else None
+        )
+        self.stats = CacheStats()
+
+    def get(self, photo_id: int, size_label: str) -> bytes | memoryview | None:
+        """Return cached thumbnail bytes, or None when neither tier has them."""
+
+        key = (photo_id, size_label)
+        if self._store is not None:
+            view = self._store.get(photo_id, size_label)
+            with self._lock:
+                if view is None:
+                    self.stats.misses += 1
+                else:
+                    self.stats.disk_hits += 1
+            return view
+
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return data
+
+        data = self._read_file(key)
+        with self._lock:
+            disk = self._disk_index()
+            if data is None:
+                entry = disk.pop(key, None)
+                if entry is not None:
+                    self.stats.disk_bytes -= entry.size
+                self.stats.misses += 1
+                return None
+            now = time.time()
+            entry = disk.get(key)
+            if entry is None:
+                entry = self._register_disk(key, len(data), now)
+            entry.last_used = now
+            disk.move_to_end(key)
+            self.stats.disk_hits += 1
+            self._remember(key, data)
+            return data
+
+    def get_or_create(self, photo: Photo, size_label: str) -> bytes | memoryview:
+        """Return thumbnail bytes for `photo`, rendering the thumbnail on a miss."""
+
+        data = self.get(photo.id, size_label)
+        if data is not None:
+            return data
+
+        if self._store is not None:
+            data = render_thumbnail_bytes(photo, size_label, self._config)
+            self._store.put(photo.id, size_label, data)
+            return data
+
+        path = generate_thumbnail(photo, size_label, self._config)
+        data = path.read_bytes()
+        with self._lock:
+            self._register_disk((photo.id, size_label), len(data), time.time())
+            self._remember((photo.id, size_label), data)
+            self._evict_disk()
+        return data
+
+    def discard(self, photo_id: int) -> None:
+        """Drop every size of a photo from both tiers, deleting its files."""
+
+        if self._store is not None:
+            self._store.delete(photo_id)
+            return
+        with self._lock:
+            disk = self._disk_index()
+            for label in VALID_SIZE_LABELS:
+                key = (photo_id, label)
+                data = self._memory.pop(key, None)
+                if data is not None:
+                    self.stats.memory_bytes -= len(data)
+                entry = disk.pop(key, None)
+                if entry is not None:
+                    self._delete_file(key, entry)
+
+    def evict(self) -> int:
+        """Apply the disk size and age limits now, returning the number of files removed."""
+
+        if self._store is not None:
+            return 0
+        with self._lock:
+            before = self.stats.disk_evictions
+            self._evict_disk()
+            return self.stats.disk_evictions - before
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self.stats.memory_bytes = 0
+
+    def _remember(self, key: CacheKey, data: bytes) -> None:
+        if len(data) > self._memory_limit:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self.stats.memory_bytes -= len(previous)
+        self._memory[key] = data
+        self.stats.memory_bytes += len(data)
+        while self.stats.memory_bytes > self._memory_limit:
+            _, evicted = self._memory.popitem(last=False)
+            self.stats.memory_bytes -= len(evicted)
+            self.stats.memory_evictions += 1
+
+    def _read_file(self, key: CacheKey) -> bytes | None:
+        """Read a thumbnail file and mark it used; called without the lock."""
+
+        path = get_thumbnail_path(key[0], key[1], self._config)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            logger.debug("Unable to touch thumbnail %s", path, exc_info=True)
+        return data
+
+    def _register_disk(self, key: CacheKey, size: int, last_used: float) -> _DiskEntry:
+        disk = self._disk_index()
+        previous = disk.pop(key, None)
+        if previous is not None:
+            self.stats.disk_bytes -= previous.size
+        entry = _DiskEntry(size=size, last_used=last_used)
+        disk[key] = entry
+        self.stats.disk_bytes += size
+        return entry
+
+    def _disk_index(self) -> OrderedDict[CacheKey, _DiskEntry]:
+        if self._disk is not None:
+            return self._disk
+
+        entries: list[tuple[CacheKey, _DiskEntry]] = []
+        try:
+            with os.scandir(self._thumbs_dir) as listing:
+                for item in listing:
+                    key = _parse_thumbnail_name(item.name)
+                    if key is None:
+                        continue
+                    try:
+                        stat = item.stat()
+                    except OSError:
+                        continue
+                    entries.append((key, _DiskEntry(size=stat.st_size, last_used=stat.st_mtime)))
+        except FileNotFoundError:
+            pass
+
+        entries.sort(key=lambda item: item[1].last_used)
+        self._disk = OrderedDict(entries)
+        self.stats.disk_bytes = sum(entry.size for _, entry in entries)
+        return self._disk
+
+    def _evict_disk(self) -> None:
+        disk = self._disk_index()
+        cutoff = time.time() - self._max_age if self._max_age else None
+        while disk:
+            key, entry = next(iter(disk.items()))
+            expired = cutoff is not None and entry.last_used < cutoff
+            if not expired and self.stats.disk_bytes <= self._disk_limit:
+                break
+            del disk[key]
+            self._delete_file(key, entry)
+            self.stats.disk_evictions += 1
+
+    def _delete_file(self, key: CacheKey, entry: _DiskEntry) -> None:
+        self.stats.disk_bytes -= entry.size
+        data = self._memory.pop(key, None)
+        if data is not None:
+            self.stats.memory_bytes -= len(data)
+        try:
+            get_thumbnail_path(key[0], key[1], self._config).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError:
+            logger.warning("Unable to delete thumbnail for photo %s (%s)", *key, exc_info=True)
+
+
+def _parse_thumbnail_name(name: str) -> CacheKey | None:
+    stem, dot, extension = name.rpartition(".")
+    if not dot or extension != "jpg":
+        return None
+    photo_id, _, label = stem.partition("_")
+    if not photo_id.isdigit() or label not in VALID_SIZE_LABELS:
+        return None
+    return int(photo_id), label
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+import pytest
+
+from src.core import db
+from src.core.config import AppConfig, FaceRecognitionConfig, JobsConfig
+
+
+@pytest.fixture
+def app_config(tmp_path: Path) -> AppConfig:
+    return AppConfig(
+        database_path=tmp_path / "photos.db",
+        cache_dir=tmp_path / "cache",
+        logs_dir=tmp_path / "logs",
+        thumb_sizes={"small": 64, "medium": 128, "large": 256},
+        supported_extensions=[".jpg", ".jpeg", ".png"],
+        face_recognition=FaceRecognitionConfig(model_dir=tmp_path / "models"),
+        jobs=JobsConfig(max_workers=2),
+    )
+
+
+@pytest.fixture
+def database(app_config: AppConfig, monkeypatch: pytest.MonkeyPatch):
+    from src.core import models  # noqa: F401
+
+    monkeypatch.setattr(db, "engine", None)
+    monkeypatch.setattr(db, "SessionLocal", None)
+    engine = db.init_database(app_config)
+    yield engine
+    engine.dispose()
@@ -0,0 +1,107 @@
+import numpy as np
+
+from src.core.ann import IVFIndex, ann_index_path, default_list_count, open_ann_index
+from src.core.db import get_session
+from src.core.face_store import FaceStore
+from src.core.faces import DetectedFace
+from src.core.models import Photo, Root
+
+
+def _clustered(rng: np.random.Generator, people: int, per_person: int) -> np.ndarray:
+    centres = rng.normal(size=(people, 64))
+    noise = rng.normal(scale=0.3, size=(people, per_person, 64))
+    return (centres[:, None, :] + noise).reshape(-1, 64).astype(np.float32)
+
+
+def test_search_matches_brute_force_and_supports_incremental_changes(tmp_path):
+    rng = np.random.default_rng(5)
+    vectors = _clustered(rng, people=50, per_person=20)
+    ids = np.arange(100, 100 + len(vectors))
+    index = IVFIndex.build(ids, vectors, n_lists=16, nprobe=4)
+    assert len(index) == 1000
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    exact = set(ids[np.argsort(-(normalized @ normalized[7]))[:10]].tolist())
+    found = {face_id for face_id, _ in index.search(vectors[7], k=10)}
+    assert len(found & exact) >= 9
+    assert {face_id for face_id, _ in index.search(vectors[7], k=10, nprobe=16)} == exact
+
+    newcomer = vectors[7] * 2
+    index.add([5000], newcomer[None, :])
+    index.remove([107])
+    matches = index.search(vectors[7], k=3, nprobe=16)
+    assert matches[0] == (5000, matches[0][1]) and matches[0][1] > 0.999
+    assert 107 not in {face_id for face_id, _ in matches}
+
+    path = tmp_path / "ann"
+    index.save(path)
+    reopened = IVFIndex.load(path)
+    assert len(reopened) == 1000 and reopened.nprobe == 4
+    assert reopened.search(vectors[7], k=3, nprobe=16) == matches
+    assert set(reopened.ids().tolist()) == (set(ids.tolist()) - {107}) | {5000}
+
+
+def _photo_id(tmp_path) -> int:
+    with get_session() as session:
+        root = Root(path=str(tmp_path), name="root")
+        session.add(root)
+        session.flush()
+        photo = Photo(root_id=root.id, relative_path="a.jpg", filename="a.jpg")
+        session.add(photo)
+        session.flush()
+        return photo.id
+
+
+def _detections(vectors: np.ndarray) -> list[DetectedFace]:
+    return [DetectedFace(bbox=(0, 0, 1, 1), quality=1.0, embedding=v) for v in vectors]
+
+
+def test_open_ann_index_builds_then_follows_the_face_store(tmp_path, app_config, database):
+    rng = np.random.default_rng(6)
+    vectors = rng.normal(size=(40, 512)).astype(np.float32)
+    photo_id = _photo_id(tmp_path)
+    with get_session() as session:
+        store = FaceStore.open(app_config, session)
+        faces = store.add_faces(session, photo_id, _detections(vectors[:30]))
+        assert open_ann_index(app_config, store) is not None
+        assert IVFIndex.load(ann_index_path(app_config)) is not None
+
+        added = store.add_faces(session, photo_id, _detections(vectors[30:]))
+        store.remove_faces(session, [faces[0].id])
+        index = open_ann_index(app_config, store, nprobe=1000)
+
+    assert len(index) == 39
+    assert index.search(vectors[35], k=1)[0][0] == added[5].id
+    assert faces[0].id not in {face_id for face_id, _ in index.search(vectors[0], k=5)}
+    saved = IVFIndex.load(ann_index_path(app_config))
+    assert saved.n_lists == index.n_lists
+    assert set(saved.ids().tolist()) == set(index.ids().tolist())
+
+
+def test_open_ann_index_rebuilds_once_the_store_outgrows_it(tmp_path, app_config, database):
+    vectors = np.random.default_rng(7).normal(size=(100, 512)).astype(np.float32)
+    photo_id = _photo_id(tmp_path)
+    with get_session() as session:
+        store = FaceStore.open(app_config, session)
+        store.add_faces(session, photo_id, _detections(vectors[:9]))
+        assert open_ann_index(app_config, store).n_lists == 3
+        store.add_faces(session, photo_id, _detections(vectors[9:30]))
+        assert open_ann_index(app_config, store).n_lists == 3
+        store.add_faces(session, photo_id, _detections(vectors[30:]))
+        index = open_ann_index(app_config, store)
+
+    assert index.n_lists == default_list_count(100) == 10
+    assert IVFIndex.load(ann_index_path(app_config)).n_lists == 10
+
+
+def test_knn_graph_probing_every_list_is_exact():
+    vectors = _clustered(np.random.default_rng(8), people=20, per_person=10)
+    index = IVFIndex.build(np.arange(200), vectors, n_lists=8)
+    ids, neighbours, scores = index.knn_graph(5, nprobe=8)
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    similarities = normalized @ normalized.T
+    np.fill_diagonal(similarities, -np.inf)
+    for row, face_id in enumerate(ids):
+        assert set(neighbours[row]) == set(np.argsort(-similarities[face_id])[:5])
+        assert np.all(np.diff(scores[row]) <= 0)
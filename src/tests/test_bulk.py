@@ -0,0 +1,40 @@
+from src.core.bulk import bulk_insert_photos, bulk_update_photos, bulk_upsert_exif, exif_row
+from src.core.db import get_session
+from src.core.models import ExifData, Photo, Root
+
+
+def test_bulk_writes_round_trip(database):
+    with get_session() as session:
+        root = Root(path="/library", name="library")
+        session.add(root)
+        session.flush()
+        rows = [
+            {"root_id": root.id, "relative_path": f"{i}.jpg", "filename": f"{i}.jpg"}
+            for i in range(5)
+        ]
+        assert bulk_insert_photos(session, rows, chunk_size=2) == 5
+
+    with get_session() as session:
+        photos = session.query(Photo).order_by(Photo.id).all()
+        assert [photo.status for photo in photos] == ["active"] * 5
+        assert all(photo.thumb_status == "none" for photo in photos)
+        ids = [photo.id for photo in photos]
+
+        bulk_update_photos(
+            session,
+            [
+                {"id": ids[0], "status": "missing"},
+                {"id": ids[1], "thumb_status": "ready", "filesize": 10},
+                {"id": ids[2], "status": "missing"},
+            ],
+            chunk_size=1,
+        )
+        bulk_upsert_exif(session, [exif_row(ids[0], {"camera_make": "A", "iso": 100})])
+        bulk_upsert_exif(session, [exif_row(ids[0], {"camera_make": "B"})])
+
+    with get_session() as session:
+        statuses = [photo.status for photo in session.query(Photo).order_by(Photo.id)]
+        assert statuses == ["missing", "active", "missing", "active", "active"]
+        assert session.get(Photo, ids[1]).filesize == 10
+        exif = session.get(ExifData, ids[0])
+        assert (exif.camera_make, exif.iso) == ("B", None)
@@ -1,7 +1,40 @@
 import numpy as np
 
-from src.core.clustering import cluster_embeddings
+from src.core.clustering import ClusterResult, assign_to_clusters, cluster_embeddings
+
+
+def _people(rng: np.random.Generator, people: int, per_person: int) -> np.ndarray:
+    centres = rng.normal(size=(people, 128))
+    noise = rng.normal(scale=0.5, size=(people, per_person, 128))
+    return (centres[:, None, :] + noise).reshape(-1, 128).astype(np.float32)
 
 
 def test_cluster_embeddings_empty():
     assert cluster_embeddings([]) == []
+
+
+def test_cluster_embeddings_recovers_people():
+    faces = _people(np.random.default_rng(1), people=12, per_person=6)
+    clusters = cluster_embeddings(list(faces[:-1]) + [np.ones(128, dtype=np.float32)])
+
+    assert len(clusters) == 13
+    assert clusters[-1] == ClusterResult(cluster_id=12, face_indices=[71])
+    for cluster in clusters[:-1]:
+        assert len({index // 6 for index in cluster.face_indices}) == 1
+
+
+def test_assign_to_clusters_extends_existing_and_opens_new_clusters():
+    rng = np.random.default_rng(2)
+    faces = _people(rng, people=6, per_person=5)
+    existing, new = faces[:25], faces[25:]
+    clusters = cluster_embeddings(existing)
+    assert len(clusters) == 5
+
+    updated = assign_to_clusters(clusters, existing, new)
+
+    assert [cluster.cluster_id for cluster in updated] == [0, 1, 2, 3, 4, 5]
+    assert updated[:5] == clusters
+    assert updated[5].face_indices == [25, 26, 27, 28, 29]
+    joined = assign_to_clusters(clusters, existing, faces[3:4] + 0.01)
+    owner = next(c for c in clusters if 3 in c.face_indices)
+    assert 25 in next(c for c in joined if c.cluster_id == owner.cluster_id).face_indices
@@ -0,0 +1,39 @@
+import threading
+
+from sqlalchemy import text
+
+from src.core.config import DatabaseConfig
+from src.core.db import _build_engine
+
+
+def test_engine_applies_sqlite_profile(tmp_path):
+    engine = _build_engine(tmp_path / "photos.db", DatabaseConfig(busy_timeout_ms=1234))
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert connection.execute(text("PRAGMA temp_store")).scalar() == 2
+        assert connection.execute(text("PRAGMA cache_size")).scalar() == -65536
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+    engine.dispose()
+
+
+def test_readers_do_not_block_behind_open_write(tmp_path):
+    engine = _build_engine(tmp_path / "photos.db", DatabaseConfig(busy_timeout_ms=100))
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        connection.execute(text("INSERT INTO items DEFAULT VALUES"))
+
+    counts: list[int] = []
+    with engine.begin() as writer:
+        writer.execute(text("INSERT INTO items DEFAULT VALUES"))
+
+        def read() -> None:
+            with engine.connect() as reader:
+                counts.append(reader.execute(text("SELECT COUNT(*) FROM items")).scalar())
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join(timeout=5)
+
+    assert counts == [1]
+    engine.dispose()
@@ -1,6 +1,16 @@
-from src.core.models import Photo
+from src.core.db import get_session
+from src.core.models import Photo, Root
 
 
-def test_photo_defaults():
-    photo = Photo(id=1, root_id=1, relative_path="/a", filename="a.jpg")
-    assert photo.status == "active"
+def test_photo_defaults(database):
+    with get_session() as session:
+        root = Root(path="/library", name="library")
+        session.add(root)
+        session.flush()
+        photo = Photo(root_id=root.id, relative_path="a.jpg", filename="a.jpg")
+        session.add(photo)
+        session.flush()
+        assert photo.status == "active"
+        assert photo.thumb_status == "none"
+        assert (photo.rating, photo.favorite, photo.orientation) == (0, False, 1)
+        assert photo.imported_at is not None
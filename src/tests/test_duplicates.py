@@ -0,0 +1,106 @@
+from pathlib import Path
+
+import pytest
+
+from src.core.db import get_session
+from src.core.models import Photo, Root
+from src.services import duplicates, hashing_service
+from src.services.duplicates import JOB_TYPE, find_duplicates, register_duplicate_job
+from src.services.hashing_service import HashingService
+from src.services.jobs import JobManager
+
+
+def _add_photos(tmp_path: Path, files: dict[str, dict[str, bytes]]) -> dict[str, int]:
+    ids = {}
+    with get_session() as session:
+        for root_name, contents in files.items():
+            root_dir = tmp_path / root_name
+            root_dir.mkdir()
+            root = Root(path=str(root_dir), name=root_name)
+            session.add(root)
+            session.flush()
+            for filename, data in contents.items():
+                (root_dir / filename).write_bytes(data)
+                photo = Photo(
+                    root_id=root.id, relative_path=filename, filename=filename, filesize=len(data)
+                )
+                session.add(photo)
+                session.flush()
+                ids[f"{root_name}/{filename}"] = photo.id
+    return ids
+
+
+def test_duplicate_job_groups_across_roots_without_reading_unique_sizes(
+    tmp_path: Path, app_config, database, monkeypatch
+):
+    ids = _add_photos(
+        tmp_path,
+        {
+            "a": {"1.jpg": b"beach" * 100, "2.jpg": b"beach" * 100, "3.jpg": b"house" * 100},
+            "b": {"copy.jpg": b"beach" * 100, "unique.jpg": b"only one of this size"},
+        },
+    )
+    fingerprinted: list[str] = []
+    original = hashing_service.compute_fingerprint
+
+    def counting(path, *args):
+        fingerprinted.append(Path(path).name)
+        return original(path, *args)
+
+    monkeypatch.setattr(hashing_service, "compute_fingerprint", counting)
+    manager = JobManager()
+    register_duplicate_job(manager, app_config)
+    job = manager.enqueue(JOB_TYPE, {})
+    manager.run_all()
+
+    assert job.status == "done" and job.progress == 1.0
+    assert "unique.jpg" not in fingerprinted
+    report = job.result
+    assert report.photos_total == 5
+    assert report.size_candidates == 4
+    assert report.fingerprint_candidates == 3
+    assert len(report.sets) == 1
+    duplicate = report.sets[0]
+    assert sorted(item.photo_id for item in duplicate.files) == sorted(
+        [ids["a/1.jpg"], ids["a/2.jpg"], ids["b/copy.jpg"]]
+    )
+    assert len(duplicate.root_ids) == 2
+    assert duplicate.wasted_bytes == 1000
+
+    with get_session() as session:
+        assert session.get(Photo, ids["a/1.jpg"]).file_hash == duplicate.sha256
+        assert session.get(Photo, ids["b/unique.jpg"]).file_hash is None
+
+
+def test_cached_digests_of_files_that_no_longer_collide_are_not_counted(
+    tmp_path: Path, app_config, database
+):
+    _add_photos(tmp_path, {"a": {"1.jpg": b"a" * 10, "2.jpg": b"a" * 10}})
+    with HashingService(app_config) as hashing:
+        assert find_duplicates(hashing).fingerprint_candidates == 2
+        (tmp_path / "a" / "2.jpg").write_bytes(b"b" * 10)
+        report = find_duplicates(hashing)
+
+    assert report.size_candidates == 2
+    assert report.fingerprint_candidates == 0 and report.sets == []
+
+
+def test_cancelled_scan_keeps_hashes_of_finished_batches(
+    tmp_path: Path, app_config, database, monkeypatch
+):
+    ids = _add_photos(
+        tmp_path,
+        {"a": {"1.jpg": b"a" * 10, "2.jpg": b"a" * 10, "3.jpg": b"b" * 20, "4.jpg": b"b" * 20}},
+    )
+    monkeypatch.setattr(duplicates, "HASH_BATCH_FILES", 2)
+
+    def cancel(fraction: float, message: str) -> None:
+        raise RuntimeError("cancelled")
+
+    with HashingService(app_config) as hashing, pytest.raises(RuntimeError):
+        find_duplicates(hashing, progress=cancel)
+
+    with get_session() as session:
+        hashes = {name: session.get(Photo, photo_id).file_hash for name, photo_id in ids.items()}
+    assert hashes["a/1.jpg"] is not None and hashes["a/1.jpg"] == hashes["a/2.jpg"]
+    assert hashes["a/3.jpg"] is None and hashes["a/4.jpg"] is None
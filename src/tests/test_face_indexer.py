@@ -0,0 +1,135 @@
+import threading
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from src.core.db import get_session
+from src.core.face_store import FaceStore
+from src.core.faces import _ARCFACE_LANDMARKS, DecodedImage, FaceDetection, FaceEmbedder
+from src.core.models import Face, Photo, Root
+from src.services.face_indexer import JOB_TYPE, FaceIndexer, register_face_index_job
+from src.services.jobs import JobManager
+
+
+class _CountingEmbedder(FaceEmbedder):
+    """Finds as many faces as the image's red level says, and records its calls."""
+
+    batches: list[int] = []
+    instances: list["_CountingEmbedder"] = []
+
+    def __init__(self) -> None:
+        super().__init__(Path("unused"))
+        self.thread = threading.get_ident()
+        self.instances.append(self)
+
+    def detect(self, image: DecodedImage) -> list[FaceDetection]:
+        count = int(image.pixels[0, 0, 0]) // 50
+        return [
+            FaceDetection(
+                box=np.array([10.0 * i, 0.0, 10.0 * i + 8, 8.0]),
+                score=0.9,
+                landmarks=_ARCFACE_LANDMARKS / 4 + 10 * i,
+            )
+            for i in range(count)
+        ]
+
+    def embed(self, crops: np.ndarray) -> np.ndarray:
+        assert threading.get_ident() == self.thread
+        self.batches.append(len(crops))
+        vectors = np.zeros((len(crops), 512), dtype=np.float32)
+        vectors[:, 0] = 1.0
+        return vectors
+
+
+def test_index_pending_batches_embeddings_and_persists_in_order(
+    tmp_path: Path, app_config, database
+):
+    library = tmp_path / "library"
+    library.mkdir()
+    face_counts = [3, 0, 2, 4, 1, 0, 3]
+    for index, count in enumerate(face_counts):
+        Image.new("RGB", (400, 200), (count * 50 + 10, 0, 0)).save(library / f"{index}.jpg")
+    (library / "broken.jpg").write_bytes(b"not a jpeg")
+    names = [f"{index}.jpg" for index in range(len(face_counts))] + ["broken.jpg"]
+    with get_session() as session:
+        root = Root(path=str(library), name="library")
+        session.add(root)
+        session.flush()
+        session.add_all(Photo(root_id=root.id, relative_path=name, filename=name) for name in names)
+
+    app_config.face_recognition.batch_size = 4
+    _CountingEmbedder.batches, _CountingEmbedder.instances = [], []
+    checkpoints: list[int] = []
+    indexer = FaceIndexer(app_config, embedder_factory=_CountingEmbedder)
+    stats = indexer.index_pending(checkpoint=checkpoints.append)
+
+    assert (stats.photos, stats.faces, stats.failed) == (8, 13, 1)
+    assert _CountingEmbedder.batches == [4, 4, 4, 1]
+    assert len(_CountingEmbedder.instances) <= app_config.face_recognition.workers
+    assert set(stats.stage_seconds) == {"decode", "detect", "align", "embed", "persist"}
+    assert checkpoints == [8]
+
+    with get_session() as session:
+        photos = session.query(Photo).order_by(Photo.id).all()
+        assert all(photo.faces_indexed_at is not None for photo in photos)
+        assert [len(photo.faces) for photo in photos] == face_counts + [0]
+        # Bounding boxes are scaled back to original pixels (decoded at 400 wide).
+        assert photos[0].faces[1].bbox == (10, 0, 8, 8)
+        assert len(FaceStore.open(app_config, session)) == 13
+        assert session.query(Face).count() == 13
+
+    assert indexer.index_pending().photos == 0
+
+
+class _FailingEmbedder(_CountingEmbedder):
+    """Raises while detecting faces in images with two faces."""
+
+    def detect(self, image: DecodedImage) -> list[FaceDetection]:
+        if int(image.pixels[0, 0, 0]) // 50 == 2:
+            raise RuntimeError("detector failed")
+        return super().detect(image)
+
+
+def test_failed_detection_counts_as_failed_and_marks_the_photo_indexed(
+    tmp_path: Path, app_config, database
+):
+    library = tmp_path / "library"
+    library.mkdir()
+    face_counts = [1, 2, 3]
+    for index, count in enumerate(face_counts):
+        Image.new("RGB", (400, 200), (count * 50 + 10, 0, 0)).save(library / f"{index}.jpg")
+    with get_session() as session:
+        root = Root(path=str(library), name="library")
+        session.add(root)
+        session.flush()
+        session.add_all(
+            Photo(root_id=root.id, relative_path=f"{index}.jpg", filename=f"{index}.jpg")
+            for index in range(len(face_counts))
+        )
+
+    stats = FaceIndexer(app_config, embedder_factory=_FailingEmbedder).index_pending()
+
+    assert (stats.photos, stats.faces, stats.failed) == (3, 4, 1)
+    with get_session() as session:
+        photos = session.query(Photo).order_by(Photo.id).all()
+        assert all(photo.faces_indexed_at is not None for photo in photos)
+        assert [len(photo.faces) for photo in photos] == [1, 0, 3]
+
+
+def test_job_does_nothing_while_face_recognition_is_disabled(tmp_path: Path, app_config, database):
+    with get_session() as session:
+        root = Root(path=str(tmp_path), name="library")
+        session.add(root)
+        session.flush()
+        session.add(Photo(root_id=root.id, relative_path="a.jpg", filename="a.jpg"))
+    manager = JobManager(app_config.jobs)
+    register_face_index_job(manager, app_config)
+
+    job = manager.enqueue(JOB_TYPE, {})
+    manager.run_all()
+
+    assert not app_config.face_recognition.enabled
+    assert job.status == "done" and job.message == "Face recognition is disabled"
+    with get_session() as session:
+        assert session.query(Photo).one().faces_indexed_at is None
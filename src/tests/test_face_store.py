@@ -0,0 +1,128 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src.core import face_store
+from src.core.db import get_session
+from src.core.face_store import FaceStore
+from src.core.faces import DetectedFace
+from src.core.models import Face, Photo, Root
+
+
+def _photo_id(tmp_path) -> int:
+    with get_session() as session:
+        root = Root(path=str(tmp_path), name="root")
+        session.add(root)
+        session.flush()
+        photo = Photo(root_id=root.id, relative_path="a.jpg", filename="a.jpg")
+        session.add(photo)
+        session.flush()
+        return photo.id
+
+
+def _faces(vectors: np.ndarray) -> list[DetectedFace]:
+    return [
+        DetectedFace(bbox=(index, 0, 10, 10), quality=0.9, embedding=vector)
+        for index, vector in enumerate(vectors)
+    ]
+
+
+def test_similarity_query_survives_reopen_and_growth(tmp_path, app_config, database, monkeypatch):
+    monkeypatch.setattr(face_store, "_MIN_CAPACITY", 4)
+    photo_id = _photo_id(tmp_path)
+    vectors = np.random.default_rng(3).normal(size=(10, 512)).astype(np.float32)
+
+    with get_session() as session:
+        store = FaceStore.open(app_config, session)
+        first = store.add_faces(session, photo_id, _faces(vectors[:3]))
+        second = store.add_faces(session, photo_id, _faces(vectors[3:]))
+        assert store.matrix.capacity == 10
+        face_ids = [face.id for face in first + second]
+
+    with get_session() as session:
+        reopened = FaceStore.open(app_config, session)
+        assert len(reopened) == 10
+        query = vectors[7] + np.random.default_rng(4).normal(scale=0.05, size=512)
+        matches = reopened.similar(query, top_k=3)
+        assert matches[0][0] == face_ids[7] and matches[0][1] > 0.99
+        assert len(matches) == 3 and matches[1][1] < 0.5
+        stored = reopened.embeddings(session, [face_ids[2]])
+        assert np.allclose(stored[0], vectors[2] / np.linalg.norm(vectors[2]), atol=1e-6)
+        assert session.get(Face, face_ids[0]).bbox == (0, 0, 10, 10)
+
+
+def test_removed_faces_are_not_returned(tmp_path, app_config, database):
+    photo_id = _photo_id(tmp_path)
+    vectors = np.eye(4, 512, dtype=np.float32)
+
+    with get_session() as session:
+        store = FaceStore.open(app_config, session)
+        faces = store.add_faces(session, photo_id, _faces(vectors))
+        assert store.remove_faces(session, [faces[1].id]) == 1
+        assert [face_id for face_id, _ in store.similar(vectors[1], top_k=4)] == [
+            faces[0].id,
+            faces[2].id,
+            faces[3].id,
+        ]
+        assert store.similar(vectors[1], min_similarity=0.5) == []
+
+
+def test_stores_open_at_once_never_write_the_same_rows(tmp_path, app_config, database):
+    photo_id = _photo_id(tmp_path)
+    vectors = np.eye(6, 512, dtype=np.float32)
+    with get_session() as session:
+        first = FaceStore.open(app_config, session)
+        second = FaceStore.open(app_config, session)
+
+    first_added = threading.Event()
+    second_done = threading.Event()
+
+    def add_second() -> None:
+        first_added.wait()
+        with get_session() as session:
+            second.add_faces(session, photo_id, _faces(vectors[3:]))
+        second_done.set()
+
+    writer = threading.Thread(target=add_second)
+    writer.start()
+    with get_session() as session:
+        first.add_faces(session, photo_id, _faces(vectors[:3]))
+        first_added.set()
+        # The second store waits for this transaction instead of taking rows 0-2.
+        assert not second_done.wait(0.3)
+    writer.join()
+
+    with get_session() as session:
+        faces = session.query(Face).order_by(Face.embedding_row).all()
+        assert [face.embedding_row for face in faces] == list(range(6))
+        stored = FaceStore.open(app_config, session).embeddings(
+            session, [face.id for face in faces]
+        )
+    assert np.array_equal(stored, vectors)
+
+
+def test_embedding_matrix_rejects_mismatched_dimension(tmp_path):
+    matrix = face_store.EmbeddingMatrix(tmp_path / "e.npy", dim=8)
+    matrix.append(np.ones((2, 8)))
+    with pytest.raises(ValueError):
+        face_store.EmbeddingMatrix(tmp_path / "e.npy", dim=16)
+
+
+def test_growth_keeps_other_open_matrices_on_the_same_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(face_store, "_MIN_CAPACITY", 4)
+    path = tmp_path / "e.npy"
+    first = face_store.EmbeddingMatrix(path, dim=8)
+    first.append(np.ones((3, 8)))
+    first.flush()
+
+    second = face_store.EmbeddingMatrix(path, dim=8, rows=3)
+    second.append(np.full((2, 8), 2.0))
+    assert second.capacity == 8 and np.load(path).shape == (8, 8)
+
+    first.write([0], np.full((1, 8), 3.0))
+    first.flush()
+    assert second.view[0].tolist() == [3.0] * 8
+    assert second.view[4].tolist() == [2.0] * 8
+    first._grow(6)
+    assert first.capacity == 8 and np.array_equal(first.view, second.view[:3])
@@ -1,6 +1,45 @@
-from src.core.faces import FaceEmbedder
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from src.core.faces import (
+    _ARCFACE_LANDMARKS,
+    DecodedImage,
+    FaceDetection,
+    FaceEmbedder,
+    decode_image,
+)
 
 
 def test_embedder_init(tmp_path):
     embedder = FaceEmbedder(tmp_path / "model.onnx")
     assert embedder.model_path.exists() is False or embedder.model_path == tmp_path / "model.onnx"
+
+
+def test_decode_image_draft_and_orientation(tmp_path):
+    path = tmp_path / "wide.jpg"
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotate 90 degrees clockwise for display
+    Image.new("RGB", (4000, 1000), (200, 10, 10)).save(path, exif=exif)
+
+    image = decode_image(path, max_side=500)
+
+    assert image.pixels.shape == (500, 125, 3)
+    assert image.scale == 8.0
+    assert np.abs(image.pixels[250, 60].astype(int) - (200, 10, 10)).max() < 10
+
+
+def test_align_maps_template_landmarks_onto_the_crop():
+    pixels = np.zeros((400, 400, 3), dtype=np.uint8)
+    landmarks = _ARCFACE_LANDMARKS * 2 + 100
+    for x, y in landmarks.astype(int):
+        pixels[y - 2 : y + 3, x - 2 : x + 3] = 255
+    detection = FaceDetection(box=np.array([100, 100, 324, 324]), score=0.9, landmarks=landmarks)
+
+    crop = FaceEmbedder(Path("unused")).align(DecodedImage(pixels, 1.0), detection)
+
+    assert crop.shape == (112, 112, 3)
+    for x, y in np.round(_ARCFACE_LANDMARKS).astype(int):
+        assert crop[y, x].max() > 128
+    assert detection.to_detected_face(2.0, np.zeros(4)).bbox == (200, 200, 448, 448)
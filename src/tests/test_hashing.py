@@ -1,9 +1,21 @@
 from pathlib import Path
 
-from src.core.hashing import hash_file
+from src.core.hashing import compute_file_hash, compute_fingerprint
 
 
-def test_hash_file(tmp_path: Path):
+def test_compute_file_hash(tmp_path: Path):
     file_path = tmp_path / "sample.txt"
     file_path.write_text("hello")
-    assert hash_file(file_path) == hash_file(file_path)
+    assert compute_file_hash(file_path) == compute_file_hash(file_path)
+
+
+def test_fingerprint_reads_size_head_and_tail(tmp_path: Path):
+    first = tmp_path / "a.bin"
+    second = tmp_path / "b.bin"
+    first.write_bytes(b"head" + b"x" * 10_000 + b"tail")
+    second.write_bytes(b"head" + b"y" * 10_000 + b"tail")
+
+    assert compute_fingerprint(first, block_size=4) == compute_fingerprint(second, block_size=4)
+    assert compute_fingerprint(first) != compute_fingerprint(second)
+    second.write_bytes(b"head" + b"x" * 10_000 + b"tai!")
+    assert compute_fingerprint(first, block_size=4) != compute_fingerprint(second, block_size=4)
@@ -0,0 +1,76 @@
+import os
+from pathlib import Path
+
+from src.core import hashing
+from src.core.db import get_session
+from src.core.models import FileHash, Photo, Root
+from src.services import hashing_service
+from src.services.hashing_service import HashingService
+
+
+def _count_full_hashes(monkeypatch) -> list[Path]:
+    calls: list[Path] = []
+
+    def counting(path, *args):
+        calls.append(Path(path))
+        return hashing.compute_file_hash(path, *args)
+
+    monkeypatch.setattr(hashing_service, "compute_file_hash", counting)
+    return calls
+
+
+def test_full_hash_only_for_fingerprint_collisions(
+    tmp_path: Path, app_config, database, monkeypatch
+):
+    (tmp_path / "a.jpg").write_bytes(b"same content")
+    (tmp_path / "b.jpg").write_bytes(b"same content")
+    (tmp_path / "c.jpg").write_bytes(b"other content!")
+    full_hashes = _count_full_hashes(monkeypatch)
+
+    with get_session() as session, HashingService(app_config) as service:
+        results = service.hash_files(session, sorted(tmp_path.glob("*.jpg")))
+
+    assert sorted(path.name for path in full_hashes) == ["a.jpg", "b.jpg"]
+    assert results[tmp_path / "a.jpg"].sha256 == results[tmp_path / "b.jpg"].sha256
+    assert results[tmp_path / "c.jpg"].sha256 is None
+
+
+def test_cache_skips_unchanged_files(tmp_path: Path, app_config, database, monkeypatch):
+    paths = [tmp_path / "a.jpg", tmp_path / "b.jpg"]
+    for path in paths:
+        path.write_bytes(b"identical")
+    full_hashes = _count_full_hashes(monkeypatch)
+
+    with get_session() as session, HashingService(app_config) as service:
+        service.hash_files(session, paths)
+    with get_session() as session, HashingService(app_config) as service:
+        service.hash_files(session, paths)
+    assert len(full_hashes) == 2
+
+    paths[1].write_bytes(b"identical")
+    stat = paths[1].stat()
+    os.utime(paths[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    with get_session() as session, HashingService(app_config) as service:
+        service.hash_files(session, paths)
+        cached = session.get(FileHash, str(paths[1]))
+        assert cached.mtime_ns == stat.st_mtime_ns + 1_000_000
+    assert [path.name for path in full_hashes[2:]] == ["b.jpg"]
+
+
+def test_hash_photos_fills_file_hash(tmp_path: Path, app_config, database):
+    (tmp_path / "a.jpg").write_bytes(b"x" * 100)
+    with get_session() as session:
+        root = Root(path=str(tmp_path), name="root")
+        session.add(root)
+        session.flush()
+        photo = Photo(root_id=root.id, relative_path="a.jpg", filename="a.jpg")
+        session.add(photo)
+        session.flush()
+        photo_id = photo.id
+
+    with get_session() as session, HashingService(app_config) as service:
+        assert service.hash_photos(session, full=True) == 1
+
+    with get_session() as session:
+        expected = hashing.compute_file_hash(tmp_path / "a.jpg")
+        assert session.get(Photo, photo_id).file_hash == expected
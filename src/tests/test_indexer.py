@@ -0,0 +1,101 @@
+from pathlib import Path
+
+from PIL import Image
+
+from src.core.db import get_session
+from src.core.models import Photo, Root
+from src.core.thumbnails import get_thumbnail_path
+from src.services import indexer
+from src.services.indexer import index_new_photos
+
+
+def test_index_new_photos_uses_worker_pool(tmp_path: Path, app_config, database):
+    library = tmp_path / "library"
+    library.mkdir()
+    for index in range(3):
+        Image.new("RGB", (320, 240), (index * 40, 80, 120)).save(library / f"img{index}.jpg")
+    (library / "broken.jpg").write_bytes(b"not a jpeg")
+
+    with get_session() as session:
+        root = Root(path=str(library), name="library")
+        session.add(root)
+        session.flush()
+        for name in ["img0.jpg", "img1.jpg", "img2.jpg", "broken.jpg"]:
+            session.add(Photo(root_id=root.id, relative_path=name, filename=name))
+
+    index_new_photos(app_config)
+
+    with get_session() as session:
+        photos = {photo.filename: photo for photo in session.query(Photo).all()}
+        for name in ["img0.jpg", "img1.jpg", "img2.jpg"]:
+            photo = photos[name]
+            assert photo.thumb_status == "ready"
+            assert photo.taken_at is not None
+            assert photo.exif is not None
+            assert get_thumbnail_path(photo.id, "small", app_config).exists()
+        assert photos["broken.jpg"].thumb_status == "error"
+
+
+def test_index_checkpoint_lets_a_resumed_run_skip_written_photos(
+    tmp_path: Path, app_config, database
+):
+    library = tmp_path / "library"
+    library.mkdir()
+    names = [f"img{index}.jpg" for index in range(4)]
+    for name in names:
+        Image.new("RGB", (64, 48), (10, 80, 120)).save(library / name)
+    with get_session() as session:
+        root = Root(path=str(library), name="library")
+        session.add(root)
+        session.flush()
+        photos = [Photo(root_id=root.id, relative_path=name, filename=name) for name in names]
+        session.add_all(photos)
+        session.flush()
+        ids = [photo.id for photo in photos]
+
+    checkpoints: list[int] = []
+    index_new_photos(app_config, checkpoint=checkpoints.append)
+    assert checkpoints[-1] == ids[-1]
+
+    with get_session() as session:
+        for photo in session.query(Photo).filter(Photo.id.in_(ids[:2])):
+            photo.thumb_status = "none"
+    resumed: list[int] = []
+    index_new_photos(app_config, after_id=ids[0], checkpoint=resumed.append)
+
+    assert resumed == [ids[1]]
+    with get_session() as session:
+        assert session.get(Photo, ids[0]).thumb_status == "none"
+        assert session.get(Photo, ids[1]).thumb_status == "ready"
+
+
+def test_index_streams_candidates_in_keyset_pages(
+    tmp_path: Path, app_config, database, monkeypatch
+):
+    library = tmp_path / "library"
+    library.mkdir()
+    names = [f"img{index}.jpg" for index in range(5)]
+    for name in names:
+        Image.new("RGB", (64, 48), (200, 80, 10)).save(library / name)
+    with get_session() as session:
+        root = Root(path=str(library), name="library")
+        session.add(root)
+        session.flush()
+        session.add_all(Photo(root_id=root.id, relative_path=name, filename=name) for name in names)
+
+    pages: list[int] = []
+    original = indexer._load_index_tasks
+
+    def recording(session, after_id=0, limit=None):
+        page = original(session, after_id, limit)
+        pages.append(len(page))
+        return page
+
+    monkeypatch.setattr(indexer, "INDEX_PAGE_SIZE", 2)
+    monkeypatch.setattr(indexer, "_load_index_tasks", recording)
+    progress: list[float] = []
+    index_new_photos(app_config, progress=lambda value, message=None: progress.append(value))
+
+    assert pages == [2, 2, 1, 0]
+    with get_session() as session:
+        assert {photo.thumb_status for photo in session.query(Photo)} == {"ready"}
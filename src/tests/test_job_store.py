@@ -0,0 +1,78 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from src.core.config import JobsConfig
+from src.core.db import get_session
+from src.core.models import JobRecord
+from src.services.job_store import JobStore
+from src.services.jobs import JobManager, JobPriority
+
+
+def test_interrupted_job_resumes_from_checkpoint(database):
+    started = threading.Event()
+    seen: list[dict | None] = []
+
+    def import_items(payload, context):
+        seen.append(context.checkpoint)
+        start = (context.checkpoint or {}).get("next", 0)
+        for item in range(start, payload["count"]):
+            if item == 2 and start == 0:
+                started.set()
+                while True:
+                    context.raise_if_cancelled()
+                    time.sleep(0.001)
+            context.save_checkpoint({"next": item + 1}, progress=(item + 1) / payload["count"])
+        return "imported"
+
+    first = JobManager(JobsConfig(max_workers=1), store=JobStore())
+    first.register("import", import_items)
+    first.start()
+    job = first.enqueue("import", {"count": 5}, priority=JobPriority.BULK)
+    assert started.wait(5)
+    queued = first.enqueue("import", {"count": 1})
+    first.shutdown(interrupt=True)
+
+    with get_session() as session:
+        record = session.get(JobRecord, job.id)
+        assert (record.status, record.checkpoint, record.progress) == ("queued", {"next": 2}, 0.4)
+
+    second = JobManager(JobsConfig(max_workers=1), store=JobStore())
+    second.register("import", import_items)
+    resumed = second.resume_pending()
+    assert [item.id for item in resumed] == [queued.id, job.id]
+    second.run_all()
+
+    assert seen == [None, None, {"next": 2}]
+    assert [item.status for item in second.jobs] == ["done", "done"]
+    with get_session() as session:
+        statuses = session.scalars(select(JobRecord.status).order_by(JobRecord.id)).all()
+    assert statuses == ["done", "done"]
+
+
+def test_compaction_keeps_recent_failures_and_unfinished_jobs(database):
+    store = JobStore()
+    manager = JobManager(JobsConfig(failed_retention_days=7), store=store)
+    manager.register("ok", lambda payload, context: None)
+    manager.register("fail", lambda payload, context: 1 / 0)
+    done = manager.enqueue("ok", {})
+    old_failure = manager.enqueue("fail", {})
+    recent_failure = manager.enqueue("fail", {})
+    manager.run_all()
+    pending = manager.enqueue("ok", {"later": True})
+
+    with get_session() as session:
+        session.execute(
+            update(JobRecord)
+            .where(JobRecord.id == old_failure.id)
+            .values(finished_at=datetime.utcnow() - timedelta(days=8))
+        )
+
+    restarted = JobManager(JobsConfig(failed_retention_days=7), store=JobStore())
+    assert [job.payload for job in restarted.resume_pending()] == [{"later": True}]
+    with get_session() as session:
+        remaining = session.scalars(select(JobRecord.id).order_by(JobRecord.id)).all()
+    assert remaining == [recent_failure.id, pending.id]
+    assert done.status == "done"
@@ -0,0 +1,153 @@
+import threading
+
+from src.core.config import JobsConfig
+from src.services.jobs import JobCancelled, JobManager, JobPriority
+
+
+def _blocking_manager(order: list[str]) -> tuple[JobManager, threading.Event]:
+    release = threading.Event()
+    manager = JobManager(JobsConfig(max_workers=1))
+
+    def block(payload, report):
+        release.wait(5)
+
+    def record(payload, report):
+        order.append(payload["name"])
+
+    manager.register("block", block)
+    manager.register("record", record)
+    return manager, release
+
+
+def test_jobs_run_in_priority_order_after_the_running_one():
+    order: list[str] = []
+    manager, release = _blocking_manager(order)
+    manager.start()
+    manager.enqueue("block", {})
+    manager.enqueue("record", {"name": "reindex"}, priority=JobPriority.BULK)
+    manager.enqueue("record", {"name": "duplicates"})
+    manager.enqueue("record", {"name": "thumbnail"}, priority=JobPriority.INTERACTIVE)
+    release.set()
+
+    assert manager.wait(5)
+    assert order == ["thumbnail", "duplicates", "reindex"]
+    manager.shutdown()
+
+
+def test_failing_handler_marks_job_as_error():
+    manager = JobManager()
+
+    def fail(payload, report):
+        report(0.5, "halfway")
+        raise ValueError("disk on fire")
+
+    manager.register("fail", fail)
+    job = manager.enqueue("fail", {})
+    missing = manager.enqueue("unknown", {})
+    manager.run_all()
+
+    assert job.status == "error"
+    assert job.message == "disk on fire"
+    assert job.progress == 0.5
+    assert "ValueError" in job.error
+    assert missing.status == "error"
+
+
+def test_cancel_queued_and_running_jobs():
+    order: list[str] = []
+    manager, release = _blocking_manager(order)
+    started = threading.Event()
+    checkpoints: list[int] = []
+
+    def loop(payload, context):
+        started.set()
+        for step in range(1000):
+            checkpoints.append(step)
+            context.report(step / 1000)
+            release.wait(0.01)
+        return "finished"
+
+    manager.register("loop", loop)
+    manager.start()
+    running = manager.enqueue("loop", {})
+    queued = manager.enqueue("record", {"name": "never"})
+    assert started.wait(5)
+
+    manager.cancel(queued)
+    manager.cancel(running)
+    assert manager.wait(5)
+
+    assert queued.status == "cancelled"
+    assert running.status == "cancelled" and running.result is None
+    assert len(checkpoints) < 1000
+    assert order == []
+    manager.shutdown()
+
+
+def test_listeners_see_progress_and_final_status():
+    manager = JobManager()
+    updates: list[tuple[str, float]] = []
+    manager.add_listener(lambda job: updates.append((job.status, job.progress)))
+
+    def work(payload, context):
+        context.report(0.25)
+        if context.cancelled:
+            raise JobCancelled()
+        context(0.75, "almost")
+        return 42
+
+    manager.register("work", work)
+    job = manager.enqueue("work", {})
+    manager.run_all()
+
+    assert job.result == 42 and job.message == "almost"
+    assert updates == [
+        ("queued", 0.0),
+        ("running", 0.0),
+        ("running", 0.25),
+        ("running", 0.75),
+        ("done", 1.0),
+    ]
+
+
+def test_only_the_newest_finished_jobs_are_kept():
+    manager = JobManager(JobsConfig(max_workers=1, finished_jobs_kept=2))
+    manager.register("noop", lambda payload, report: None)
+    jobs = [manager.enqueue("noop", {}) for _ in range(5)]
+    manager.run_all()
+
+    assert all(job.status == "done" for job in jobs)
+    assert manager.jobs == jobs[3:]
+    assert manager.get(jobs[0].id) is None
+
+
+def test_exclusive_jobs_of_one_type_never_run_together():
+    manager = JobManager(JobsConfig(max_workers=3))
+    release = threading.Event()
+    running: list[int] = []
+    overlapped = threading.Event()
+    lock = threading.Lock()
+
+    def index(payload, report):
+        with lock:
+            running.append(payload["n"])
+            if len(running) > 1:
+                overlapped.set()
+        release.wait(5)
+        with lock:
+            running.remove(payload["n"])
+
+    others: list[str] = []
+    manager.register("index", index, exclusive=True)
+    manager.register("record", lambda payload, report: others.append(payload["name"]))
+    manager.start()
+    first = manager.enqueue("index", {"n": 1})
+    second = manager.enqueue("index", {"n": 2})
+    manager.enqueue("record", {"name": "thumbnail"})
+
+    assert manager.wait(0.5) is False
+    assert others == ["thumbnail"] and second.status == "queued"
+    release.set()
+    assert manager.wait(5)
+    assert first.status == second.status == "done" and not overlapped.is_set()
+    manager.shutdown()
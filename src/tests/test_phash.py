@@ -0,0 +1,101 @@
+from io import BytesIO
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+from PIL import Image, ImageDraw
+from sqlalchemy import text
+
+from src.core import db
+from src.core.db import get_session
+from src.core.models import Photo, Root
+from src.core.phash import PerceptualHashIndex, dhash, hamming_distance, to_signed64
+from src.core.thumbnails import ingest_image, thumbnail_phash
+from src.services.near_duplicates import find_near_duplicates, find_similar
+
+
+def _scene(seed: int) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    image = Image.new("RGB", (640, 480), "white")
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.integers(0, 560), rng.integers(0, 400)
+        colour = tuple(int(value) for value in rng.integers(0, 255, 3))
+        draw.ellipse((x, y, x + 80, y + 80), fill=colour)
+    return image
+
+
+def test_dhash_survives_resize_and_reencode():
+    original = _scene(1)
+    buffer = BytesIO()
+    original.resize((320, 240)).save(buffer, format="JPEG", quality=60)
+    copy = Image.open(BytesIO(buffer.getvalue()))
+
+    assert hamming_distance(dhash(original), dhash(copy)) <= 4
+    assert hamming_distance(dhash(original), dhash(_scene(2))) > 10
+
+
+def test_ingest_hashes_small_thumbnail(tmp_path: Path, app_config):
+    _scene(3).save(tmp_path / "scene.jpg")
+    photo = SimpleNamespace(id=5, relative_path=Path("scene.jpg"), root_path=tmp_path)
+
+    result = ingest_image(photo, app_config, sizes=["small"])
+    again = ingest_image(photo, app_config, sizes=["small"])
+
+    assert result.phash is not None
+    assert again.phash == thumbnail_phash(result.thumbnails["small"])
+
+
+def test_groups_match_brute_force_without_false_merges():
+    rng = np.random.default_rng(7)
+    bases = rng.integers(0, 2**63, 300, dtype=np.int64)
+    hashes = list(bases)
+    for base in bases[:50]:
+        flips = rng.choice(64, size=3, replace=False)
+        hashes.append(to_signed64(int(base) ^ sum(1 << int(bit) for bit in flips)))
+    photo_ids = list(range(1, len(hashes) + 1))
+    index = PerceptualHashIndex(photo_ids, hashes)
+
+    expected = {
+        frozenset({first, second})
+        for first in photo_ids
+        for second in photo_ids
+        if first < second
+        and hamming_distance(int(hashes[first - 1]), int(hashes[second - 1])) <= 4
+    }
+    groups = index.near_duplicate_groups(radius=4)
+
+    assert {frozenset(group) for group in groups} == expected
+    assert index.similar_to(int(hashes[0]), radius=4) == [(1, 0), (301, 3)]
+
+
+def test_near_duplicate_groups_are_transitive_and_include_identical_hashes():
+    index = PerceptualHashIndex([1, 2, 3, 4, 5], [0, 0b11, 0b1111, 0, -1])
+
+    assert index.near_duplicate_groups(radius=2) == [[1, 2, 3, 4]]
+    assert index.near_duplicate_groups(radius=0) == [[1, 4]]
+
+
+def test_find_near_duplicates_reads_stored_hashes(tmp_path, app_config, database):
+    with get_session() as session:
+        root = Root(path=str(tmp_path), name="root")
+        session.add(root)
+        session.flush()
+        for name, phash in [("a", 0b1010), ("b", 0b1011), ("c", -1), ("d", None)]:
+            session.add(
+                Photo(root_id=root.id, relative_path=name, filename=name, phash=phash)
+            )
+
+    with get_session() as session:
+        assert find_near_duplicates(session, radius=2) == [[1, 2]]
+        assert find_similar(session, 1, radius=2) == [(2, 1)]
+
+
+def test_init_database_adds_phash_column_to_existing_table(app_config, database):
+    with database.begin() as connection:
+        connection.exec_driver_sql("ALTER TABLE photos DROP COLUMN phash")
+    db.init_database(app_config)
+
+    with database.connect() as connection:
+        columns = [row[1] for row in connection.execute(text("PRAGMA table_info(photos)"))]
+    assert "phash" in columns
@@ -0,0 +1,64 @@
+import os
+from pathlib import Path
+
+from src.core.db import get_session
+from src.core.models import Photo, Root
+from src.services.scanner import scan_root
+
+
+def _touch(path: Path, content: bytes = b"jpeg") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+def _scan(root_id: int, app_config, **kwargs):
+    with get_session() as session:
+        return scan_root(session.get(Root, root_id), app_config, session, **kwargs)
+
+
+def _statuses() -> dict[str, str]:
+    with get_session() as session:
+        return {photo.relative_path: photo.status for photo in session.query(Photo)}
+
+
+def test_rescan_skips_unchanged_directories(tmp_path: Path, app_config, database):
+    library = tmp_path / "library"
+    _touch(library / "a.jpg")
+    _touch(library / "2023" / "b.JPG")
+    _touch(library / "2023" / "notes.txt")
+    _touch(library / "2023" / "trip" / "c.png")
+    _touch(library / "2024" / "d.jpeg")
+
+    with get_session() as session:
+        root = Root(path=str(library), name="library")
+        session.add(root)
+        session.flush()
+        root_id = root.id
+
+    first = _scan(root_id, app_config)
+    assert first.added == 4
+    assert _statuses() == {
+        "a.jpg": "active",
+        "2023/b.JPG": "active",
+        "2023/trip/c.png": "active",
+        "2024/d.jpeg": "active",
+    }
+
+    second = _scan(root_id, app_config)
+    assert second.directories_scanned == 0
+    assert second.directories_skipped == 4
+    assert (second.added, second.updated, second.missing) == (0, 0, 0)
+
+    _touch(library / "2023" / "trip" / "e.jpg")
+    os.remove(library / "2024" / "d.jpeg")
+    os.rmdir(library / "2024")
+    third = _scan(root_id, app_config)
+    assert third.directories_scanned == 2
+    assert (third.added, third.missing) == (1, 1)
+    statuses = _statuses()
+    assert statuses["2023/trip/e.jpg"] == "active"
+    assert statuses["2024/d.jpeg"] == "missing"
+
+    (library / "2023" / "b.JPG").write_bytes(b"edited in place")
+    assert _scan(root_id, app_config).updated == 0
+    assert _scan(root_id, app_config, full=True).updated == 1
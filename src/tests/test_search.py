@@ -0,0 +1,218 @@
+import itertools
+import re
+from datetime import datetime
+
+from sqlalchemy import event
+
+from src.core.bulk import bulk_insert_photos
+from src.core.db import get_session
+from src.core.models import ExifData, Photo, PhotoTag, Root, Tag
+from src.core.search import (
+    TEXT_MATCH_LIMIT,
+    count_photos,
+    encode_cursor,
+    query_photos,
+    query_photos_page,
+)
+
+# "img" matches more than TEXT_MATCH_LIMIT seeded photos, "rare" only a few.
+_FILTER_OPTIONS = {
+    "text": [None, "img", "rare"],
+    "tags": [None, [1], [1, 2]],
+    "date_from": [None, datetime(2020, 1, 1)],
+    "date_to": [None, datetime(2021, 1, 1)],
+    "favorites_only": [False, True],
+    "root_ids": [None, [1], [1, 2]],
+    "status": [None, "active"],
+}
+
+_COMBINATIONS = [
+    dict(zip(_FILTER_OPTIONS, values)) for values in itertools.product(*_FILTER_OPTIONS.values())
+]
+
+
+# The photo query of a narrow text filter, restricted to a bound list of matching ids.
+_BOUNDED_IDS = re.compile(r"photos\.id IN \(\?")
+
+
+def _seed_text_matches(engine) -> None:
+    with get_session() as session:
+        root = Root(path="/library", name="library")
+        session.add(root)
+        session.flush()
+        names = [f"img_{i}.jpg" for i in range(TEXT_MATCH_LIMIT + 10)]
+        names += [f"rare_{i}.jpg" for i in range(3)]
+        bulk_insert_photos(
+            session,
+            (
+                {
+                    "root_id": root.id,
+                    "relative_path": name,
+                    "filename": name,
+                    "taken_at": datetime(2020, 1, 1 + i % 28),
+                }
+                for i, name in enumerate(names)
+            ),
+            chunk_size=1000,
+        )
+
+
+def _explain(engine, query=query_photos, **filters) -> list[tuple[str, list[str]]]:
+    captured = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        with get_session() as session:
+            query(session, **filters)
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+    plans = []
+    raw = engine.raw_connection()
+    try:
+        for statement, parameters in captured:
+            plan = raw.cursor().execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plans.append((statement, [row[3] for row in plan.fetchall()]))
+    finally:
+        raw.close()
+    return plans
+
+
+def _plan_failures(engine, query=query_photos, **extra) -> dict[str, list[str]]:
+    failures = {}
+    for filters in _COMBINATIONS:
+        plans = _explain(engine, query, **filters, **extra)
+        steps = [step for _, plan in plans for step in plan]
+        full_scan = any(step.startswith("SCAN photos") and "INDEX" not in step for step in steps)
+        # A narrow full-text filter fetches at most TEXT_MATCH_LIMIT ids that
+        # are then sorted, so only that statement's sort is bounded by design.
+        temp_sort = any(
+            "TEMP B-TREE" in step and not _BOUNDED_IDS.search(statement)
+            for statement, plan in plans
+            for step in plan
+        )
+        if full_scan or temp_sort:
+            failures[repr(filters)] = steps
+    return failures
+
+
+def test_query_plans_avoid_full_scans_and_sorts(database):
+    _seed_text_matches(database)
+    broad = [statement for statement, _ in _explain(database, text="img")]
+    narrow = [statement for statement, _ in _explain(database, text="rare")]
+    assert any("photos.id + " in statement for statement in broad)
+    assert any(_BOUNDED_IDS.search(statement) for statement in narrow)
+
+    failures = _plan_failures(database)
+    assert not failures, failures
+
+
+def test_keyset_plans_avoid_full_scans_and_sorts(database):
+    _seed_text_matches(database)
+    cursor = encode_cursor(Photo(id=500, taken_at=datetime(2020, 6, 1)))
+    failures = _plan_failures(database, query_photos_page, cursor=cursor)
+    assert not failures, failures
+
+
+def test_keyset_pages_match_offset_order(database):
+    with get_session() as session:
+        root = Root(path="/library", name="library")
+        session.add(root)
+        session.flush()
+        session.add_all(
+            Photo(
+                root_id=root.id,
+                relative_path=f"{i}.jpg",
+                filename=f"{i}.jpg",
+                taken_at=None if i % 5 == 0 else datetime(2020, 1, 1 + i % 3),
+            )
+            for i in range(23)
+        )
+
+    with get_session() as session:
+        expected = [photo.id for photo in query_photos(session, limit=100)]
+        seen = []
+        cursor = None
+        while True:
+            page = query_photos_page(session, cursor=cursor, limit=4)
+            seen.extend(photo.id for photo in page.photos)
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+
+    assert seen == expected
+
+
+def test_tag_filter_returns_each_photo_once(database):
+    with get_session() as session:
+        root = Root(path="/library", name="library")
+        session.add(root)
+        session.flush()
+        tags = [Tag(name="beach"), Tag(name="family")]
+        session.add_all(tags)
+        photos = [
+            Photo(
+                root_id=root.id,
+                relative_path=f"{i}.jpg",
+                filename=f"{i}.jpg",
+                taken_at=datetime(2020, 1, i + 1),
+            )
+            for i in range(3)
+        ]
+        session.add_all(photos)
+        session.flush()
+        session.add_all(
+            [
+                PhotoTag(photo_id=photos[0].id, tag_id=tags[0].id),
+                PhotoTag(photo_id=photos[0].id, tag_id=tags[1].id),
+                PhotoTag(photo_id=photos[2].id, tag_id=tags[1].id),
+            ]
+        )
+        tag_ids = [tag.id for tag in tags]
+        expected = [photos[2].id, photos[0].id]
+
+    with get_session() as session:
+        result = query_photos(session, tags=tag_ids)
+        assert [photo.id for photo in result] == expected
+        assert count_photos(session, tags=tag_ids) == 2
+        assert count_photos(session) == 3
+
+
+def test_text_search_matches_tokens_tags_and_camera(database):
+    with get_session() as session:
+        root = Root(path="/library", name="library")
+        session.add(root)
+        session.flush()
+        beach = Photo(root_id=root.id, relative_path="2019/Holiday/IMG_1.jpg", filename="IMG_1.jpg")
+        other = Photo(root_id=root.id, relative_path="2020/work/DSC_2.jpg", filename="DSC_2.jpg")
+        session.add_all([beach, other])
+        session.flush()
+        tag = Tag(name="Sunset")
+        session.add(tag)
+        session.flush()
+        session.add(PhotoTag(photo_id=other.id, tag_id=tag.id))
+        session.add(ExifData(photo_id=other.id, camera_make="Fujifilm"))
+        beach_id, other_id = beach.id, other.id
+
+    with get_session() as session:
+        def ids(text):
+            return [photo.id for photo in query_photos(session, text=text)]
+
+        assert ids("holi") == [beach_id]
+        assert ids("img 1") == [beach_id]
+        assert ids("sun") == [other_id]
+        assert ids("fuji dsc") == [other_id]
+        assert ids("olid") == []
+        assert count_photos(session, text="jpg") == 2
+
+    with get_session() as session:
+        session.get(Tag, tag.id).name = "Dusk"
+        session.delete(session.get(ExifData, other_id))
+
+    with get_session() as session:
+        assert query_photos(session, text="sunset") == []
+        assert query_photos(session, text="fuji") == []
+        assert [photo.id for photo in query_photos(session, text="dusk")] == [other_id]
@@ -0,0 +1,56 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from PIL import Image
+
+from src.core.thumb_store import PackedThumbnailStore
+from src.core.thumbnails import ingest_image
+
+
+def test_put_get_and_reopen(tmp_path: Path):
+    store = PackedThumbnailStore(tmp_path / "packs", pack_size_bytes=64)
+    store.put(1, "small", b"a" * 40)
+    store.put(2, "small", b"b" * 40)
+    store.put(1, "small", b"c" * 10)
+    store.delete(2)
+
+    view = store.get(1, "small")
+    assert isinstance(view, memoryview)
+    assert view.tobytes() == b"c" * 10
+    assert store.get(2, "small") is None
+
+    reopened = PackedThumbnailStore(tmp_path / "packs", pack_size_bytes=64)
+    assert bytes(reopened.get(1, "small")) == b"c" * 10
+    assert (2, "small") not in reopened
+    assert len(list((tmp_path / "packs").glob("pack-*.bin"))) == 2
+
+
+def test_compact_reclaims_replaced_and_dead_photos(tmp_path: Path):
+    store = PackedThumbnailStore(tmp_path / "packs")
+    for photo_id in (1, 2, 3):
+        store.put(photo_id, "small", bytes([photo_id]) * 100)
+    store.put(1, "small", b"x" * 100)
+
+    result = store.compact(live_photo_ids={1, 2})
+
+    assert (result.kept, result.dropped) == (2, 1)
+    assert result.reclaimed_bytes == 200
+    assert bytes(store.get(1, "small")) == b"x" * 100
+    assert store.get(3, "small") is None
+    store.put(4, "medium", b"y" * 5)
+    reopened = PackedThumbnailStore(tmp_path / "packs")
+    assert bytes(reopened.get(2, "small")) == bytes([2]) * 100
+    assert bytes(reopened.get(4, "medium")) == b"y" * 5
+
+
+def test_ingest_image_encodes_for_packed_store(tmp_path: Path, app_config):
+    Image.new("RGB", (400, 300), (90, 20, 160)).save(tmp_path / "photo.jpg")
+    photo = SimpleNamespace(id=9, relative_path=Path("photo.jpg"), root_path=tmp_path)
+    app_config.thumbnails.store = "packed"
+
+    result = ingest_image(photo, app_config, sizes=["small", "medium"])
+
+    assert result.thumbnails == {}
+    assert set(result.encoded) == {"small", "medium"}
+    assert not (Path(app_config.cache_dir) / "thumbs").exists()
+    assert result.encoded["small"][:2] == b"\xff\xd8"
@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from PIL import Image
+
+from src.core.thumbnails import get_thumbnail_path
+from src.services.thumbnail_cache import ThumbnailCache
+
+
+def _write_thumbnail(app_config, photo_id: int, size: int = 1000, age_days: float = 0) -> Path:
+    path = get_thumbnail_path(photo_id, "small", app_config)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes([photo_id % 256]) * size)
+    stamp = time.time() - age_days * 86400
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def test_memory_tier_serves_repeat_reads_and_evicts_by_bytes(app_config):
+    for photo_id in (1, 2, 3):
+        _write_thumbnail(app_config, photo_id)
+    cache = ThumbnailCache(app_config, memory_limit_bytes=2000)
+
+    assert cache.get(1, "small") == bytes([1]) * 1000
+    assert cache.get(1, "small") is not None
+    cache.get(2, "small")
+    cache.get(3, "small")
+
+    assert cache.stats.memory_hits == 1
+    assert cache.stats.disk_hits == 3
+    assert cache.stats.memory_evictions == 1
+    assert cache.stats.memory_bytes == 2000
+    assert cache.get(4, "small") is None
+    assert cache.stats.misses == 1
+
+
+def test_disk_tier_evicts_least_recently_used_and_expired(app_config):
+    paths = {
+        photo_id: _write_thumbnail(app_config, photo_id, age_days=10 - photo_id)
+        for photo_id in (1, 2, 3)
+    }
+    stale = _write_thumbnail(app_config, 9, age_days=app_config.thumbnails.max_age_days + 1)
+    cache = ThumbnailCache(app_config, disk_limit_bytes=2500)
+
+    cache.get(1, "small")  # refreshes photo 1, leaving photo 2 least recently used
+    removed = cache.evict()
+
+    assert removed == 2
+    assert not stale.exists()
+    assert not paths[2].exists()
+    assert paths[1].exists() and paths[3].exists()
+    assert cache.stats.disk_bytes == 2000
+
+
+def test_get_or_create_renders_and_discard_removes(tmp_path: Path, app_config):
+    Image.new("RGB", (300, 200), (30, 60, 90)).save(tmp_path / "photo.jpg")
+    photo = SimpleNamespace(id=5, relative_path=Path("photo.jpg"), root_path=tmp_path)
+    cache = ThumbnailCache(app_config)
+
+    data = cache.get_or_create(photo, "small")
+
+    assert data[:2] == b"\xff\xd8"
+    assert cache.get(5, "small") == data
+    assert cache.stats.memory_hits == 1
+    cache.discard(5)
+    assert not get_thumbnail_path(5, "small", app_config).exists()
+    assert cache.get(5, "small") is None
+
+
+def test_disk_reads_do_not_wait_for_each_other(app_config, monkeypatch):
+    for photo_id in (1, 2, 3):
+        _write_thumbnail(app_config, photo_id)
+    cache = ThumbnailCache(app_config)
+    cache.get(3, "small")
+    read_file = cache._read_file
+    slow_read_started, release = threading.Event(), threading.Event()
+
+    def read(key):
+        if key[0] == 1:
+            slow_read_started.set()
+            release.wait(5)
+        return read_file(key)
+
+    monkeypatch.setattr(cache, "_read_file", read)
+    slow = threading.Thread(target=cache.get, args=(1, "small"))
+    slow.start()
+    assert slow_read_started.wait(5)
+
+    # A new thumbnail written elsewhere (e.g. by the indexer) is found and indexed.
+    _write_thumbnail(app_config, 4, size=500)
+    assert cache.get(2, "small") == bytes([2]) * 1000
+    assert cache.get(4, "small") == bytes([4]) * 500
+    release.set()
+    slow.join()
+    assert cache.stats.disk_hits == 4
+    assert cache.stats.disk_bytes == 3500
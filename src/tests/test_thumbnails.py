@@ -0,0 +1,56 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from PIL import Image, ImageFile
+
+from src.core.thumbnails import ensure_thumbnails, ingest_image
+
+
+def _photo(tmp_path: Path, size=(800, 600)) -> SimpleNamespace:
+    source = tmp_path / "source.jpg"
+    exif = Image.Exif()
+    exif[0x010F] = "TestCam"
+    Image.new("RGB", size, (10, 120, 200)).save(source, exif=exif)
+    return SimpleNamespace(id=7, relative_path=Path("source.jpg"), root_path=tmp_path)
+
+
+def test_ingest_image_decodes_once(tmp_path: Path, app_config, monkeypatch):
+    photo = _photo(tmp_path)
+    decodes = []
+    original_load = ImageFile.ImageFile.load
+
+    def counting_load(self):
+        if self.tile:
+            decodes.append(self)
+        return original_load(self)
+
+    monkeypatch.setattr(ImageFile.ImageFile, "load", counting_load)
+    result = ingest_image(photo, app_config)
+
+    assert len(decodes) == 1
+    assert result.exif["camera_make"] == "TestCam"
+    for label, max_dimension in app_config.thumb_sizes.items():
+        with Image.open(result.thumbnails[label]) as thumb:
+            assert max(thumb.size) == max_dimension
+
+
+def test_ensure_thumbnails_skips_existing(tmp_path: Path, app_config):
+    photo = _photo(tmp_path)
+    first = ensure_thumbnails(photo, app_config, sizes=["small"])
+    mtime = first["small"].stat().st_mtime_ns
+    second = ensure_thumbnails(photo, app_config, sizes=["small"])
+    assert second["small"].stat().st_mtime_ns == mtime
+
+
+def test_thumbnails_apply_orientation_after_draft_decode(tmp_path: Path, app_config):
+    source = tmp_path / "rotated.jpg"
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new("RGB", (1600, 1200), (200, 40, 40)).save(source, exif=exif)
+    photo = SimpleNamespace(id=3, relative_path=Path("rotated.jpg"), root_path=tmp_path)
+
+    thumbnails = ensure_thumbnails(photo, app_config, sizes=["small", "large"])
+
+    with Image.open(thumbnails["small"]) as small, Image.open(thumbnails["large"]) as large:
+        assert small.size == (48, 64)
+        assert large.size == (192, 256)
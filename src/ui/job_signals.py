@@ -0,0 +1,35 @@
+"""Qt signal bridge exposing background job updates to the UI thread."""
+from __future__ import annotations
+
+from PySide6.QtCore import QObject, Signal
+
+from src.services.jobs import Job, JobManager
+
+
+class JobSignalBridge(QObject):
+    """Re-emit `JobManager` listener callbacks as Qt signals.
+
+    Listeners run on job worker threads; emitting from there queues the
+    signals onto the thread that owns this object, so connected slots can
+    update widgets directly. Each emission carries a snapshot of the job's
+    state at the time of the update.
+    """
+
+    # job id, job type, status, progress (0-1), message
+    jobChanged = Signal(int, str, str, float, str)
+    # job id, job type, final status, message
+    jobFinished = Signal(int, str, str, str)
+
+    def __init__(self, job_manager: JobManager, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._job_manager = job_manager
+        job_manager.add_listener(self._on_job_update)
+
+    def detach(self) -> None:
+        self._job_manager.remove_listener(self._on_job_update)
+
+    def _on_job_update(self, job: Job) -> None:
+        message = job.message or ""
+        self.jobChanged.emit(job.id, job.job_type, job.status, job.progress, message)
+        if job.finished:
+            self.jobFinished.emit(job.id, job.job_type, job.status, message)
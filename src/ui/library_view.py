@@ -6,6 +6,8 @@ from typing import Optional
 from PySide6.QtCore import Signal, Slot
 from PySide6.QtWidgets import QLineEdit, QVBoxLayout, QWidget
 
+from src.services.thumbnail_cache import ThumbnailCache
+from src.ui.search_controller import SearchController
 from src.ui.widgets.thumbnail_grid import ThumbnailGrid
 
 
@@ -14,12 +16,19 @@ class LibraryView(QWidget):
 
     searchTextChanged: Signal = Signal(str)
 
-    def __init__(self, parent: Optional[QWidget] = None) -> None:
+    def __init__(
+        self,
+        parent: Optional[QWidget] = None,
+        thumbnail_cache: Optional[ThumbnailCache] = None,
+        search_controller: Optional[SearchController] = None,
+    ) -> None:
         super().__init__(parent)
         self._search_input = QLineEdit(parent=self)
         self._search_input.setPlaceholderText("Search photos…")
 
-        self.thumbnail_grid: ThumbnailGrid = ThumbnailGrid(parent=self)
+        self.thumbnail_grid: ThumbnailGrid = ThumbnailGrid(
+            parent=self, thumbnail_cache=thumbnail_cache
+        )
 
         layout = QVBoxLayout()
         layout.addWidget(self._search_input)
@@ -28,6 +37,10 @@ class LibraryView(QWidget):
 
         self._search_input.textChanged.connect(self._on_search_text_changed)
 
+        self.search_controller = search_controller
+        if search_controller is not None:
+            self._connect_search(search_controller)
+
     def search_text(self) -> str:
         """Return the current search query text."""
 
@@ -38,6 +51,16 @@ class LibraryView(QWidget):
 
         self._search_input.setText(text)
 
+    def _connect_search(self, controller: SearchController) -> None:
+        """Route typing to the controller and its results to the grid."""
+
+        model = self.thumbnail_grid.thumbnail_model
+        self.searchTextChanged.connect(controller.set_text)
+        controller.resultsReset.connect(self.thumbnail_grid.set_items)
+        controller.resultsAppended.connect(self.thumbnail_grid.append_items)
+        controller.hasMoreChanged.connect(model.set_has_more)
+        model.moreRequested.connect(controller.fetch_more)
+
     @Slot(str)
     def _on_search_text_changed(self, text: str) -> None:
         self.searchTextChanged.emit(text)
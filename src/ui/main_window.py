@@ -3,26 +3,92 @@ from __future__ import annotations
 
 from typing import Optional
 
-from PySide6.QtCore import QSize, Qt
-from PySide6.QtWidgets import QAction, QLabel, QMainWindow, QMenuBar
+from PySide6.QtCore import QSize, Slot
+from PySide6.QtGui import QCloseEvent
+from PySide6.QtWidgets import QAction, QMainWindow, QMenuBar
+
+from src.core.config import AppConfig
+from src.services.indexer import JOB_TYPE as INDEX_JOB_TYPE
+from src.services.jobs import JobManager, JobPriority
+from src.services.thumbnail_cache import ThumbnailCache
+from src.ui.job_signals import JobSignalBridge
+from src.ui.library_view import LibraryView
+from src.ui.search_controller import SearchController
 
 
 class MainWindow(QMainWindow):
     """Primary application window presenting the photo library."""
 
-    def __init__(self, parent: Optional[QMainWindow] = None) -> None:
+    def __init__(
+        self,
+        config: Optional[AppConfig] = None,
+        job_manager: Optional[JobManager] = None,
+        parent: Optional[QMainWindow] = None,
+    ) -> None:
         super().__init__(parent)
         self.setWindowTitle("Photo Manager")
         self.resize(QSize(1024, 768))
 
-        placeholder = QLabel("Library goes here", parent=self)
-        placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.setCentralWidget(placeholder)
+        self.config = config
+        self.job_manager = job_manager
+        self.thumbnail_cache = ThumbnailCache(config) if config is not None else None
+        self.search_controller = SearchController(self) if config is not None else None
+        self.job_signals = JobSignalBridge(job_manager, self) if job_manager is not None else None
+
+        self.library_view = LibraryView(
+            parent=self,
+            thumbnail_cache=self.thumbnail_cache,
+            search_controller=self.search_controller,
+        )
+        self.setCentralWidget(self.library_view)
 
         menu_bar = QMenuBar(parent=self)
         self._build_menus(menu_bar)
         self.setMenuBar(menu_bar)
 
+        if self.search_controller is not None:
+            self.search_controller.totalCountChanged.connect(self._on_total_count_changed)
+            self.search_controller.searchFailed.connect(self._on_search_failed)
+            self.search_controller.search_now()
+        if self.job_signals is not None:
+            self.job_signals.jobChanged.connect(self._on_job_changed)
+            self.job_signals.jobFinished.connect(self._on_job_finished)
+
+    def closeEvent(self, event: QCloseEvent) -> None:  # noqa: N802 - Qt override
+        if self.search_controller is not None:
+            self.search_controller.shutdown()
+        if self.job_signals is not None:
+            self.job_signals.detach()
+        super().closeEvent(event)
+
+    @Slot(int)
+    def _on_total_count_changed(self, total: int) -> None:
+        self.statusBar().showMessage(f"{total:,} photos")
+
+    @Slot(str)
+    def _on_search_failed(self, message: str) -> None:
+        self.statusBar().showMessage(f"Search failed: {message}")
+
+    @Slot(int, str, str, float, str)
+    def _on_job_changed(
+        self, _job_id: int, job_type: str, status: str, progress: float, message: str
+    ) -> None:
+        if status == "running":
+            self.statusBar().showMessage(message or f"{job_type}: {progress:.0%}")
+
+    @Slot(int, str, str, str)
+    def _on_job_finished(self, _job_id: int, job_type: str, status: str, message: str) -> None:
+        if status == "done":
+            self.statusBar().showMessage(f"{job_type} finished", 5000)
+            if job_type == INDEX_JOB_TYPE and self.search_controller is not None:
+                self.search_controller.search_now()
+        else:
+            self.statusBar().showMessage(f"{job_type} {status}: {message}")
+
+    def _reindex(self) -> None:
+        if self.job_manager is not None:
+            self.job_manager.enqueue(INDEX_JOB_TYPE, {}, priority=JobPriority.BULK)
+
     def _build_menus(self, menu_bar: QMenuBar) -> None:
         file_menu = menu_bar.addMenu("&File")
         exit_action = QAction("E&xit", parent=self)
@@ -35,4 +101,7 @@ class MainWindow(QMainWindow):
         view_menu.addAction(library_action)
 
         tools_menu = menu_bar.addMenu("&Tools")
-        tools_menu.addAction(QAction("&Reindex", parent=self))
+        reindex_action = QAction("&Reindex", parent=self)
+        reindex_action.setEnabled(self.job_manager is not None)
+        reindex_action.triggered.connect(self._reindex)
+        tools_menu.addAction(reindex_action)
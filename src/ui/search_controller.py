@@ -0,0 +1,257 @@
+"""Debounced background search feeding the library thumbnail grid."""
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal, Slot
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.core.db import get_session
+from src.core.models import Root
+from src.core.search import count_photos, query_photos_page
+from src.ui.widgets.thumbnail_model import ThumbnailItem
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEBOUNCE_MS = 250
+DEFAULT_PAGE_SIZE = 200
+
+
+@dataclass(frozen=True)
+class SearchRequest:
+    """Filters passed through to `query_photos_page` and `count_photos`."""
+
+    text: str | None = None
+    tags: list[int] | None = None
+    date_from: datetime | None = None
+    date_to: datetime | None = None
+    favorites_only: bool = False
+    root_ids: list[int] | None = None
+    status: str | None = "active"
+
+    def query_kwargs(self) -> dict:
+        return {
+            "text": self.text or None,
+            "tags": self.tags,
+            "date_from": self.date_from,
+            "date_to": self.date_to,
+            "favorites_only": self.favorites_only,
+            "root_ids": self.root_ids,
+            "status": self.status,
+        }
+
+
+class _SearchSignals(QObject):
+    page = Signal(int, bool, list, object)
+    count = Signal(int, int)
+    failed = Signal(int, str)
+
+
+class _SearchTask(QRunnable):
+    """Run one search page (and optionally the count) on its own read session."""
+
+    def __init__(
+        self,
+        generation: int,
+        request: SearchRequest,
+        cursor: str | None,
+        page_size: int,
+        with_count: bool,
+        signals: _SearchSignals,
+    ) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+        self.generation = generation
+        self._request = request
+        self._cursor = cursor
+        self._page_size = page_size
+        self._with_count = with_count
+        self._signals = signals
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self.done = False
+        self._dbapi_connection: sqlite3.Connection | None = None
+
+    def cancel(self) -> None:
+        """Stop the task, aborting the statement it is running, if any."""
+
+        with self._lock:
+            self._cancelled = True
+            if self._dbapi_connection is not None:
+                self._dbapi_connection.interrupt()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def run(self) -> None:
+        try:
+            with get_session() as session:
+                with self._lock:
+                    if self._cancelled:
+                        return
+                    self._dbapi_connection = session.connection().connection.dbapi_connection
+                try:
+                    self._search(session)
+                finally:
+                    # Detach before the connection goes back to the pool, so a
+                    # late cancel() cannot interrupt another session's query.
+                    with self._lock:
+                        self._dbapi_connection = None
+        except Exception as exc:  # noqa: BLE001
+            if not self._cancelled:
+                logger.exception("Photo search failed")
+                self._signals.failed.emit(self.generation, str(exc))
+        finally:
+            self.done = True
+
+    def _search(self, session: Session) -> None:
+        kwargs = self._request.query_kwargs()
+        page = query_photos_page(session, cursor=self._cursor, limit=self._page_size, **kwargs)
+        root_paths = dict(session.execute(select(Root.id, Root.path)).tuples())
+        items = [
+            ThumbnailItem(
+                id=photo.id,
+                filename=photo.filename,
+                relative_path=Path(photo.relative_path),
+                root_path=Path(root_paths[photo.root_id]),
+            )
+            for photo in page.photos
+        ]
+        if self._cancelled:
+            return
+        self._signals.page.emit(self.generation, self._cursor is None, items, page.next_cursor)
+
+        if self._with_count:
+            total = count_photos(session, **kwargs)
+            if not self._cancelled:
+                self._signals.count.emit(self.generation, total)
+
+
+class SearchController(QObject):
+    """Turns search input into background queries whose results reach the grid in order.
+
+    Text changes are debounced; when the timer fires a new search generation
+    starts and any search still running is cancelled, interrupting its SQLite
+    statement. Each search runs on a pool thread with its own session, emits
+    the first page as soon as it is read (`resultsReset`) and only then counts
+    the total (`totalCountChanged`). Further pages are loaded by
+    `fetch_more` with the keyset cursor of the previous page. Results of a
+    superseded generation are never emitted.
+    """
+
+    resultsReset = Signal(list)
+    resultsAppended = Signal(list)
+    totalCountChanged = Signal(int)
+    hasMoreChanged = Signal(bool)
+    searchFailed = Signal(str)
+
+    def __init__(
+        self,
+        parent: Optional[QObject] = None,
+        *,
+        debounce_ms: int = DEFAULT_DEBOUNCE_MS,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> None:
+        super().__init__(parent)
+        self._page_size = page_size
+        self._request = SearchRequest()
+        self._generation = 0
+        self._next_cursor: str | None = None
+        self._fetching = False
+        self._tasks: list[_SearchTask] = []
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(2)
+        self._signals = _SearchSignals(self)
+        self._signals.page.connect(self._on_page)
+        self._signals.count.connect(self._on_count)
+        self._signals.failed.connect(self._on_failed)
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(debounce_ms)
+        self._debounce.timeout.connect(self.search_now)
+
+    @property
+    def request(self) -> SearchRequest:
+        return self._request
+
+    @Slot(str)
+    def set_text(self, text: str) -> None:
+        """Update the search text; the query runs once typing pauses."""
+
+        self._request = replace(self._request, text=text.strip())
+        self._debounce.start()
+
+    def set_request(self, request: SearchRequest) -> None:
+        """Replace every filter and search immediately."""
+
+        self._request = request
+        self.search_now()
+
+    @Slot()
+    def search_now(self) -> None:
+        self._debounce.stop()
+        self._generation += 1
+        self._next_cursor = None
+        self._cancel_tasks()
+        self._start(cursor=None, with_count=True)
+
+    @Slot()
+    def fetch_more(self) -> None:
+        """Load the page after the last one delivered, if there is one."""
+
+        if self._next_cursor is None or self._fetching:
+            return
+        self._start(cursor=self._next_cursor, with_count=False)
+
+    def shutdown(self) -> None:
+        self._debounce.stop()
+        self._cancel_tasks()
+        self._pool.waitForDone()
+
+    def _start(self, cursor: str | None, with_count: bool) -> None:
+        self._fetching = True
+        self._tasks = [task for task in self._tasks if not task.done]
+        task = _SearchTask(
+            self._generation, self._request, cursor, self._page_size, with_count, self._signals
+        )
+        self._tasks.append(task)
+        self._pool.start(task)
+
+    def _cancel_tasks(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+
+    @Slot(int, bool, list, object)
+    def _on_page(self, generation: int, first: bool, items: list, next_cursor: str | None) -> None:
+        if generation != self._generation:
+            return
+        self._fetching = False
+        self._next_cursor = next_cursor
+        if first:
+            self.resultsReset.emit(items)
+        else:
+            self.resultsAppended.emit(items)
+        self.hasMoreChanged.emit(next_cursor is not None)
+
+    @Slot(int, int)
+    def _on_count(self, generation: int, total: int) -> None:
+        if generation == self._generation:
+            self.totalCountChanged.emit(total)
+
+    @Slot(int, str)
+    def _on_failed(self, generation: int, message: str) -> None:
+        if generation == self._generation:
+            self._fetching = False
+            self.searchFailed.emit(message)
@@ -1,19 +1,158 @@
 """Thumbnail grid view for displaying photo thumbnails."""
 from __future__ import annotations
 
-from typing import Optional
+from typing import Optional, Sequence
 
-from PySide6.QtCore import QSize, Qt
-from PySide6.QtWidgets import QListView, QWidget
+from PySide6.QtCore import QModelIndex, QPersistentModelIndex, QRect, QSize, Qt, QTimer, Slot
+from PySide6.QtGui import QColor, QImage, QPainter
+from PySide6.QtWidgets import QListView, QStyle, QStyledItemDelegate, QStyleOptionViewItem, QWidget
+
+from src.services.thumbnail_cache import ThumbnailCache
+from src.ui.widgets.thumbnail_model import ThumbnailItem, ThumbnailModel, ThumbnailRole
+
+
+# Delay coalescing scroll and resize events into one visible-range update.
+_VISIBLE_RANGE_DELAY_MS = 15
+_PLACEHOLDER_COLOR = QColor(60, 60, 60)
+
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    """Paints a loaded thumbnail, or a placeholder tile, above the file name."""
+
+    def paint(
+        self,
+        painter: QPainter,
+        option: QStyleOptionViewItem,
+        index: QModelIndex | QPersistentModelIndex,
+    ) -> None:
+        painter.save()
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+
+        icon_size = option.decorationSize
+        text_height = option.fontMetrics.height()
+        tile = QRect(
+            option.rect.x() + (option.rect.width() - icon_size.width()) // 2,
+            option.rect.y() + 4,
+            icon_size.width(),
+            icon_size.height(),
+        )
+        image: Optional[QImage] = index.data(ThumbnailRole)
+        if image is None:
+            painter.fillRect(tile, _PLACEHOLDER_COLOR)
+        else:
+            painter.drawImage(
+                QRect(
+                    tile.x() + (tile.width() - image.width()) // 2,
+                    tile.y() + (tile.height() - image.height()) // 2,
+                    image.width(),
+                    image.height(),
+                ),
+                image,
+            )
+
+        text_rect = QRect(
+            option.rect.x() + 4, tile.bottom() + 4, option.rect.width() - 8, text_height
+        )
+        name = option.fontMetrics.elidedText(
+            str(index.data(Qt.ItemDataRole.DisplayRole) or ""),
+            Qt.TextElideMode.ElideMiddle,
+            text_rect.width(),
+        )
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignHCenter, name)
+        painter.restore()
+
+    def sizeHint(
+        self, option: QStyleOptionViewItem, index: QModelIndex | QPersistentModelIndex
+    ) -> QSize:
+        return QSize(
+            option.decorationSize.width() + 8,
+            option.decorationSize.height() + option.fontMetrics.height() + 12,
+        )
 
 
 class ThumbnailGrid(QListView):
-    """List view configured to present a grid of photo thumbnails."""
+    """List view configured to present a grid of photo thumbnails.
 
-    def __init__(self, parent: Optional[QWidget] = None) -> None:
+    Thumbnails are loaded asynchronously by `ThumbnailModel` for the rows in
+    view (plus a prefetch margin), recomputed whenever the grid scrolls,
+    resizes or its rows change.
+    """
+
+    def __init__(
+        self, parent: Optional[QWidget] = None, thumbnail_cache: Optional[ThumbnailCache] = None
+    ) -> None:
         super().__init__(parent)
+        self._thumbnail_cache = thumbnail_cache
         self._configure_view()
 
+        self.thumbnail_model = ThumbnailModel(
+            thumbnail_cache, parent=self, icon_size=self.iconSize()
+        )
+        self.setModel(self.thumbnail_model)
+        self.setItemDelegate(ThumbnailDelegate(self))
+
+        self._visible_range_timer = QTimer(self)
+        self._visible_range_timer.setSingleShot(True)
+        self._visible_range_timer.setInterval(_VISIBLE_RANGE_DELAY_MS)
+        self._visible_range_timer.timeout.connect(self._request_visible_rows)
+        self.verticalScrollBar().valueChanged.connect(self._schedule_visible_rows)
+        self.thumbnail_model.modelReset.connect(self._schedule_visible_rows)
+        self.thumbnail_model.rowsInserted.connect(self._schedule_visible_rows)
+
+    def set_thumbnail_cache(self, thumbnail_cache: Optional[ThumbnailCache]) -> None:
+        self._thumbnail_cache = thumbnail_cache
+        self.thumbnail_model.set_thumbnail_cache(thumbnail_cache)
+        self._schedule_visible_rows()
+
+    def set_items(self, items: Sequence[ThumbnailItem]) -> None:
+        """Show `items`, replacing the current rows and scrolling back to the top."""
+
+        self.thumbnail_model.set_items(items)
+        self.scrollToTop()
+
+    def append_items(self, items: Sequence[ThumbnailItem]) -> None:
+        self.thumbnail_model.append_items(items)
+
+    def thumbnail_image(self, photo_id: int, size_label: str = "small") -> Optional[QImage]:
+        """Decode a thumbnail served by the cache, or return None when it is not available."""
+
+        if self._thumbnail_cache is None:
+            return None
+        data = self._thumbnail_cache.get(photo_id, size_label)
+        if data is None:
+            return None
+        image = QImage.fromData(bytes(data), "JPG")
+        return None if image.isNull() else image
+
+    def visible_rows(self) -> tuple[int, int]:
+        """Return the first and last row intersecting the viewport (last < first when empty)."""
+
+        count = self.thumbnail_model.rowCount()
+        if count == 0:
+            return 0, -1
+        cell = self.gridSize()
+        columns = max(1, self.viewport().width() // max(1, cell.width()))
+        top_line = self.verticalOffset() // max(1, cell.height())
+        lines = self.viewport().height() // max(1, cell.height()) + 2
+        first = min(count - 1, top_line * columns)
+        last = min(count - 1, (top_line + lines) * columns - 1)
+        return first, last
+
+    def resizeEvent(self, event) -> None:  # noqa: N802 - Qt override
+        super().resizeEvent(event)
+        self._schedule_visible_rows()
+
+    @Slot()
+    def _schedule_visible_rows(self, *_args) -> None:
+        self._visible_range_timer.start()
+
+    @Slot()
+    def _request_visible_rows(self) -> None:
+        first, last = self.visible_rows()
+        if last >= first:
+            self.thumbnail_model.request_rows(first, last)
+
     def _configure_view(self) -> None:
         """Apply defaults suited for displaying image thumbnails."""
 
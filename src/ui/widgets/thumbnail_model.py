@@ -0,0 +1,288 @@
+"""List model that loads thumbnails on a worker pool for the rows the grid shows."""
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QObject,
+    QPersistentModelIndex,
+    QRunnable,
+    QSize,
+    QThread,
+    QThreadPool,
+    Qt,
+    Signal,
+    Slot,
+)
+from PySide6.QtGui import QImage
+
+from src.services.thumbnail_cache import ThumbnailCache
+
+
+logger = logging.getLogger(__name__)
+
+PhotoIdRole = Qt.ItemDataRole.UserRole + 1
+ThumbnailRole = Qt.ItemDataRole.UserRole + 2
+
+# Rows beyond the visible range whose thumbnails are loaded ahead of scrolling.
+DEFAULT_PREFETCH_ROWS = 48
+# Decoded images kept by the model; older ones are re-read from the cache.
+DEFAULT_MAX_IMAGES = 600
+
+
+@dataclass(frozen=True)
+class ThumbnailItem:
+    """A photo shown in the grid, with what is needed to locate its thumbnail."""
+
+    id: int
+    filename: str
+    relative_path: Path
+    root_path: Path
+
+
+class _LoaderSignals(QObject):
+    loaded = Signal(int, int, QImage)
+    failed = Signal(int, int)
+
+
+class _ThumbnailTask(QRunnable):
+    """Fetch (rendering if needed) and decode one thumbnail off the UI thread."""
+
+    def __init__(
+        self,
+        item: ThumbnailItem,
+        generation: int,
+        cache: ThumbnailCache,
+        size_label: str,
+        icon_size: QSize,
+        signals: _LoaderSignals,
+    ) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+        self.item = item
+        self.cancelled = False
+        self.done = False
+        self._generation = generation
+        self._cache = cache
+        self._size_label = size_label
+        self._icon_size = icon_size
+        self._signals = signals
+
+    def run(self) -> None:
+        try:
+            self._load()
+        finally:
+            self.done = True
+
+    def _load(self) -> None:
+        if self.cancelled:
+            return
+        try:
+            data = self._cache.get_or_create(self.item, self._size_label)
+            image = QImage.fromData(bytes(data), "JPG")
+            if image.isNull():
+                raise ValueError("thumbnail could not be decoded")
+            image = image.scaled(
+                self._icon_size,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
+            )
+        except Exception:  # noqa: BLE001
+            logger.warning("Unable to load thumbnail for photo id=%s", self.item.id, exc_info=True)
+            if not self.cancelled:
+                self._signals.failed.emit(self.item.id, self._generation)
+            return
+        if not self.cancelled:
+            self._signals.loaded.emit(self.item.id, self._generation, image)
+
+
+class ThumbnailModel(QAbstractListModel):
+    """Photos for `ThumbnailGrid`, with thumbnails loaded on demand.
+
+    The view reports its visible rows through `request_rows`; thumbnails for
+    those rows and a prefetch margin around them are loaded on a dedicated
+    thread pool, visible rows first. Queued requests that leave that window
+    are cancelled, and results from before the last `set_items` are dropped.
+    Rows without an image yet return None for `ThumbnailRole`, which the
+    delegate draws as a placeholder. Further rows are requested through Qt's
+    fetchMore protocol and the `moreRequested` signal.
+    """
+
+    moreRequested = Signal()
+
+    def __init__(
+        self,
+        thumbnail_cache: Optional[ThumbnailCache] = None,
+        parent: Optional[QObject] = None,
+        *,
+        size_label: str = "small",
+        icon_size: QSize = QSize(160, 160),
+        prefetch_rows: int = DEFAULT_PREFETCH_ROWS,
+        max_images: int = DEFAULT_MAX_IMAGES,
+    ) -> None:
+        super().__init__(parent)
+        self._cache = thumbnail_cache
+        self._size_label = size_label
+        self._icon_size = icon_size
+        self._prefetch_rows = prefetch_rows
+        self._max_images = max_images
+
+        self._items: list[ThumbnailItem] = []
+        self._rows_by_id: dict[int, int] = {}
+        self._images: OrderedDict[int, QImage] = OrderedDict()
+        self._failed: set[int] = set()
+        self._pending: dict[int, _ThumbnailTask] = {}
+        # Every task handed to the pool, referenced until its run() returns.
+        self._tasks: list[_ThumbnailTask] = []
+        self._generation = 0
+        self._has_more = False
+        self._more_requested = False
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(2, QThread.idealThreadCount() // 2))
+        self._signals = _LoaderSignals(self)
+        self._signals.loaded.connect(self._on_loaded)
+        self._signals.failed.connect(self._on_failed)
+
+    def set_thumbnail_cache(self, thumbnail_cache: Optional[ThumbnailCache]) -> None:
+        self._cache = thumbnail_cache
+
+    def set_icon_size(self, icon_size: QSize) -> None:
+        self._icon_size = icon_size
+
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._items)
+
+    def canFetchMore(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more and not self._more_requested
+
+    def fetchMore(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> None:
+        # The view calls this when scrolled to the end; the owner of the
+        # result set answers `moreRequested` with `append_items`.
+        if self.canFetchMore(parent):
+            self._more_requested = True
+            self.moreRequested.emit()
+
+    def set_has_more(self, has_more: bool) -> None:
+        """Tell the model whether rows beyond those loaded can be requested."""
+
+        self._has_more = has_more
+
+    def data(
+        self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.ItemDataRole.DisplayRole
+    ) -> Any:
+        if not index.isValid() or not 0 <= index.row() < len(self._items):
+            return None
+        item = self._items[index.row()]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return item.filename
+        if role == PhotoIdRole:
+            return item.id
+        if role == ThumbnailRole:
+            image = self._images.get(item.id)
+            if image is not None:
+                self._images.move_to_end(item.id)
+            return image
+        return None
+
+    def set_items(self, items: Sequence[ThumbnailItem]) -> None:
+        """Replace the rows, cancelling every outstanding thumbnail request."""
+
+        self.beginResetModel()
+        self._cancel_pending(set())
+        self._generation += 1
+        self._items = list(items)
+        self._rows_by_id = {item.id: row for row, item in enumerate(self._items)}
+        self._failed.clear()
+        self._more_requested = False
+        self.endResetModel()
+
+    def append_items(self, items: Sequence[ThumbnailItem]) -> None:
+        """Add rows at the end, e.g. the next page of a search result."""
+
+        self._more_requested = False
+        if not items:
+            return
+        first = len(self._items)
+        self.beginInsertRows(QModelIndex(), first, first + len(items) - 1)
+        for offset, item in enumerate(items):
+            self._rows_by_id[item.id] = first + offset
+        self._items.extend(items)
+        self.endInsertRows()
+
+    def item(self, row: int) -> ThumbnailItem:
+        return self._items[row]
+
+    def request_rows(self, first: int, last: int) -> None:
+        """Load thumbnails for visible rows `first..last` plus the prefetch margin."""
+
+        if self._cache is None or not self._items:
+            return
+        first = max(0, first)
+        last = min(len(self._items) - 1, last)
+        start = max(0, first - self._prefetch_rows)
+        stop = min(len(self._items) - 1, last + self._prefetch_rows)
+
+        wanted = [self._items[row].id for row in range(start, stop + 1)]
+        self._cancel_pending(set(wanted))
+
+        # Visible rows outrank the prefetch margin, nearer rows outrank farther ones.
+        ordered = sorted(
+            range(start, stop + 1),
+            key=lambda row: 0 if first <= row <= last else min(abs(row - first), abs(row - last)),
+        )
+        self._tasks = [task for task in self._tasks if not task.done]
+        for priority, row in enumerate(reversed(ordered)):
+            item = self._items[row]
+            if item.id in self._images or item.id in self._pending or item.id in self._failed:
+                continue
+            task = _ThumbnailTask(
+                item,
+                self._generation,
+                self._cache,
+                self._size_label,
+                self._icon_size,
+                self._signals,
+            )
+            self._pending[item.id] = task
+            self._tasks.append(task)
+            self._pool.start(task, priority)
+
+    def cancel_all(self) -> None:
+        self._cancel_pending(set())
+
+    def _cancel_pending(self, keep: set[int]) -> None:
+        for photo_id in [photo_id for photo_id in self._pending if photo_id not in keep]:
+            task = self._pending.pop(photo_id)
+            task.cancelled = True
+            # A task already running stays in `_tasks` until it returns.
+            if self._pool.tryTake(task):
+                task.done = True
+
+    @Slot(int, int, QImage)
+    def _on_loaded(self, photo_id: int, generation: int, image: QImage) -> None:
+        if generation != self._generation:
+            return
+        self._pending.pop(photo_id, None)
+        row = self._rows_by_id.get(photo_id)
+        if row is None:
+            return
+        self._images[photo_id] = image
+        self._images.move_to_end(photo_id)
+        while len(self._images) > self._max_images:
+            self._images.popitem(last=False)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [ThumbnailRole])
+
+    @Slot(int, int)
+    def _on_failed(self, photo_id: int, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._pending.pop(photo_id, None)
+        self._failed.add(photo_id)